@@ -0,0 +1,218 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Aggregates of the querysets (see. MemoryQuerySet.aggregate).
+
+The django aggregate expressions are compiled into MemoryAggregate: the attribute path, the
+filter lookups and the accumulator class. The accumulators are fed with the values one by
+one, the aggregates are computed in a single pass over the objects.
+"""
+import math
+from typing import Any, Dict, List, Optional, Type
+
+from django.db import NotSupportedError
+from django.db.models.expressions import F, Star
+
+from memory_db.lookups import compile_q, Condition, resolve_path
+
+# Result of the aggregates which are not computed without reading the values
+MISSING: Any = object()
+
+
+class Accumulator:
+    """
+    Streaming computation of an aggregate: add each value, then get the result.
+
+    The null values are ignored, the result of no values is None (as in SQL). With distinct,
+    the values already added are ignored.
+    """
+
+    def __init__(self, distinct: bool = False):
+        self.seen: Optional[set] = set() if distinct else None
+
+    def add(self, value: Any):
+        """Add a value."""
+        if value is None:
+            return
+        if self.seen is not None:
+            if value in self.seen:
+                return
+            self.seen.add(value)
+        self.accumulate(value)
+
+    def accumulate(self, value: Any):
+        """Add a new not null value."""
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        """Return the aggregate of the added values."""
+        raise NotImplementedError
+
+
+class CountAccumulator(Accumulator):
+    """Count the values."""
+
+    def __init__(self, distinct: bool = False):
+        super().__init__(distinct)
+        self.count = 0
+
+    def accumulate(self, value: Any):
+        """Count the value."""
+        self.count += 1
+
+    def result(self) -> int:
+        """Return the count, 0 without values."""
+        return self.count
+
+
+class SumAccumulator(CountAccumulator):
+    """Sum the values."""
+
+    def __init__(self, distinct: bool = False):
+        super().__init__(distinct)
+        self.total: Any = 0
+
+    def accumulate(self, value: Any):
+        """Add the value to the total."""
+        self.count += 1
+        self.total += value
+
+    def result(self) -> Any:
+        """Return the total."""
+        return self.total if self.count else None
+
+
+class AvgAccumulator(SumAccumulator):
+    """Average the values."""
+
+    def result(self) -> Any:
+        """Return the total divided by the count."""
+        return self.total / self.count if self.count else None
+
+
+class MinAccumulator(Accumulator):
+    """Keep the smallest value."""
+
+    def __init__(self, distinct: bool = False):
+        super().__init__()
+        self.value: Any = None
+
+    def accumulate(self, value: Any):
+        """Keep the value if it is the smallest."""
+        if self.value is None or value < self.value:
+            self.value = value
+
+    def result(self) -> Any:
+        """Return the smallest value."""
+        return self.value
+
+
+class MaxAccumulator(MinAccumulator):
+    """Keep the greatest value."""
+
+    def accumulate(self, value: Any):
+        """Keep the value if it is the greatest."""
+        if self.value is None or value > self.value:
+            self.value = value
+
+
+class VarianceAccumulator(CountAccumulator):
+    """Compute the variance of the values with the Welford's online algorithm."""
+
+    def __init__(self, distinct: bool = False, sample: bool = False):
+        super().__init__(distinct)
+        self.sample = sample
+        # Integers: the arithmetic follows the type of the values (float, Decimal...)
+        self.mean = 0
+        self.squares = 0
+
+    def accumulate(self, value: Any):
+        """Update the mean and the sum of the squared differences from the mean."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.squares += delta * (value - self.mean)
+
+    def result(self) -> Optional[float]:
+        """Return the population variance, or the sample variance."""
+        count = self.count - 1 if self.sample else self.count
+        return self.squares / count if count > 0 else None
+
+
+class StdDevAccumulator(VarianceAccumulator):
+    """Compute the standard deviation of the values."""
+
+    def result(self) -> Optional[float]:
+        """Return the square root of the variance."""
+        variance = super().result()
+        return None if variance is None else math.sqrt(variance)
+
+
+ACCUMULATORS: Dict[str, Type[Accumulator]] = {
+    'Count': CountAccumulator,
+    'Sum': SumAccumulator,
+    'Avg': AvgAccumulator,
+    'Min': MinAccumulator,
+    'Max': MaxAccumulator,
+    'StdDev': StdDevAccumulator,
+    'Variance': VarianceAccumulator,
+}
+
+
+class MemoryAggregate:
+    """
+    Compiled django aggregate expression.
+
+    The path is the attribute path of the aggregated field, None for Count('*'). The lookups
+    are the compiled filter argument of the aggregate.
+    """
+
+    def __init__(self, model, aggregate):
+        self.name = aggregate.name
+        try:
+            self.accumulator_class = ACCUMULATORS[self.name]
+        except KeyError:
+            raise NotSupportedError(f'{self.name} aggregate is not supported')
+        expression = aggregate.source_expressions[0]
+        if isinstance(expression, Star):
+            self.path: Optional[str] = None
+        elif isinstance(expression, F):
+            self.path = resolve_path(model, expression.name)[0]
+        else:
+            raise NotSupportedError(f'{self.name} of {expression} is not supported')
+        # Aggregate.distinct since django 2.2, before a template parameter of Count
+        self.distinct = bool(
+            getattr(aggregate, 'distinct', False) or aggregate.extra.get('distinct')
+        )
+        self.default = getattr(aggregate, 'default', None)
+        self.lookups: List[Condition] = []
+        if aggregate.filter is not None:
+            self.lookups = compile_q(model, aggregate.filter)
+        self.sample = getattr(aggregate, 'function', '').endswith('_SAMP')
+
+    def __repr__(self):
+        """Aggregate representation."""
+        return f'<{self.__class__.__name__}: {self.name}({self.path or "*"})>'
+
+    def accumulator(self) -> Accumulator:
+        """Create an accumulator of the aggregate values."""
+        if issubclass(self.accumulator_class, VarianceAccumulator):
+            return self.accumulator_class(self.distinct, self.sample)  # type: ignore
+        return self.accumulator_class(self.distinct)
+
+    def result(self, value: Any) -> Any:
+        """Return the result of the aggregate, its default instead of None."""
+        return self.default if value is None else value
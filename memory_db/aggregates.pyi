@@ -0,0 +1,103 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from typing import Any, Dict, List, Optional, Type
+
+from django.db.models import Aggregate
+
+from memory_db.lookups import Condition
+from memory_db.models import MemoryModel
+
+MISSING: Any
+
+
+class Accumulator:
+    seen: Optional[set] = ...
+
+    def __init__(self, distinct: bool = ...):
+        ...
+
+    def add(self, value: Any):
+        ...
+
+    def accumulate(self, value: Any):
+        ...
+
+    def result(self) -> Any:
+        ...
+
+
+class CountAccumulator(Accumulator):
+    count: int = ...
+
+    def result(self) -> int:
+        ...
+
+
+class SumAccumulator(CountAccumulator):
+    total: Any = ...
+
+    def result(self) -> Any:  # type: ignore
+        ...
+
+
+class AvgAccumulator(SumAccumulator):
+    ...
+
+
+class MinAccumulator(Accumulator):
+    value: Any = ...
+
+
+class MaxAccumulator(MinAccumulator):
+    ...
+
+
+class VarianceAccumulator(CountAccumulator):
+    sample: bool = ...
+    mean: Any = ...
+    squares: Any = ...
+
+    def __init__(self, distinct: bool = ..., sample: bool = ...):
+        ...
+
+    def result(self) -> Optional[float]:  # type: ignore
+        ...
+
+
+class StdDevAccumulator(VarianceAccumulator):
+    ...
+
+
+ACCUMULATORS: Dict[str, Type[Accumulator]]
+
+
+class MemoryAggregate:
+    name: str = ...
+    accumulator_class: Type[Accumulator] = ...
+    path: Optional[str] = ...
+    distinct: bool = ...
+    default: Any = ...
+    lookups: List[Condition] = ...
+    sample: bool = ...
+
+    def __init__(self, model: Type[MemoryModel], aggregate: Aggregate):
+        ...
+
+    def accumulator(self) -> Accumulator:
+        ...
+
+    def result(self, value: Any) -> Any:
+        ...
@@ -0,0 +1,224 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Binary snapshot files.
+
+A file starts with MAGIC, the length of the header and the pickled header. The header
+describe the columns and contain the indexes, the string tables and the columns which are
+not stored in arrays. The arrays are then written one after the other, aligned on 8 bytes,
+and are read from a read only memory map of the file.
+
+The header is unpickled: only open the files written by dump_snapshot.
+"""
+import array
+import hashlib
+import mmap
+import os
+import pickle  # nosec
+import struct
+import sys
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from .columnar import Column, MemoryColumnarSnapshot, STRING_TYPES
+from .snapshot import MemorySnapshot
+
+MAGIC = b'MEMDB\x00\x00\x01'
+HEADER_LENGTH = struct.Struct('<Q')
+ALIGNMENT = 8
+
+
+def fields_fingerprint(model) -> str:
+    """
+    Return a hash of the model Meta.fields definition.
+
+    Only the attributes stable between two processes are hashed: the callables (default...)
+    are given by their qualified name, not by their repr holding their address.
+    """
+    definition = [(
+        _qualified_name(type(field)),
+        field.name,
+        field.get_attname(),
+        field.db_column,
+        field.get_internal_type(),
+        field.null,
+        field.blank,
+        field.primary_key,
+        _qualified_name(field.default) if callable(field.default) else repr(field.default),
+    ) for field in model._meta.fields]
+    return hashlib.sha256(repr(definition).encode()).hexdigest()
+
+
+def _qualified_name(value: Any) -> str:
+    """Return the module and qualified name of a class, a function or a callable object."""
+    module = getattr(value, '__module__', None) or getattr(
+        getattr(value, '__self__', None), '__module__', None
+    )  # builtin methods: the module of their class
+    qualname = getattr(value, '__qualname__', None) or type(value).__qualname__
+    return f'{module}.{qualname}'
+
+
+def dump_snapshot(snapshot: MemorySnapshot, path: str, source_key: Any = None):
+    """
+    Write the Meta.fields values and the indexes of the snapshot in a binary file.
+
+    The file is written next to the path then renamed, the processes reading the previous
+    file keep their memory map.
+    """
+    model = snapshot.model
+    if snapshot.deleted:
+        snapshot = MemorySnapshot(model, snapshot)
+    blocks: List[bytes] = []
+    offset = 0
+    columns: Dict[str, tuple] = {}
+    for field in model._meta.fields:
+        attname = field.get_attname()
+        column = Column.from_values(field, list(snapshot.values(attname)))
+        if isinstance(column.data, array.array):
+            data = column.data.tobytes()
+            columns[attname] = ('array', column.data.typecode, offset, len(data), column.convert)
+        elif field.get_internal_type() in STRING_TYPES:
+            table: Dict[Any, int] = {}
+            codes = array.array('q', (table.setdefault(value, len(table)) for value in column.data))
+            data = codes.tobytes()
+            columns[attname] = ('strings', 'q', offset, len(data), list(table))
+        else:
+            columns[attname] = ('values', list(column.data))
+            continue
+        blocks.append(data)
+        offset += len(data)
+        padding = -offset % ALIGNMENT
+        blocks.append(b'\x00' * padding)
+        offset += padding
+    indexes = {}
+    for attname, index_classes in model._meta.index_classes.items():
+        for index_class in index_classes:
+            indexes[attname, index_class] = snapshot.get_index(attname, index_class)
+    header = pickle.dumps({
+        'byteorder': sys.byteorder,
+        'fingerprint': fields_fingerprint(model),
+        'source_key': source_key,
+        'length': len(snapshot),
+        'columns': columns,
+        'indexes': indexes,
+    })
+    padding = -(len(MAGIC) + HEADER_LENGTH.size + len(header)) % ALIGNMENT
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary_path, 'wb') as stream:
+            stream.write(MAGIC)
+            stream.write(HEADER_LENGTH.pack(len(header)))
+            stream.write(header)
+            stream.write(b'\x00' * padding)
+            for block in blocks:
+                stream.write(block)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def _read_header(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Read the header of a binary snapshot file, return None if it is not one."""
+    if stream.read(len(MAGIC)) != MAGIC:
+        return None
+    length, = HEADER_LENGTH.unpack(stream.read(HEADER_LENGTH.size))
+    try:
+        return pickle.loads(stream.read(length))  # nosec
+    except Exception:  # written by another version
+        return None
+
+
+class MemoryMappedSnapshot(MemoryColumnarSnapshot):
+    """
+    Columnar snapshot read from a binary snapshot file (see. dump_snapshot).
+
+    The numbers and booleans columns and the codes of the strings are read from a memory map
+    of the file: they are not copied in the process memory and the processes reading the same
+    file share its pages. The indexes are not built again.
+
+    Use the open class method to check the file is up to date.
+    """
+
+    def __init__(
+        self,
+        model,
+        path: str,
+        version: int = 0,
+        header: Optional[Dict[str, Any]] = None,
+        stream: Optional[BinaryIO] = None
+    ):
+        self.model = model
+        self.version = version
+        self.source = None
+        self.path = path
+        # the header and the map from the same descriptor, even if the file is replaced
+        if stream is None:
+            with open(path, 'rb') as stream:
+                header = self._map_file(stream, header)
+        else:
+            header = self._map_file(stream, header)
+        data_start = len(MAGIC) + HEADER_LENGTH.size + HEADER_LENGTH.unpack(
+            self.map[len(MAGIC):len(MAGIC) + HEADER_LENGTH.size]
+        )[0]
+        data_start += -data_start % ALIGNMENT
+        buffer = memoryview(self.map)
+        self.columns = {}
+        for attname, description in header['columns'].items():
+            if description[0] == 'values':
+                self.columns[attname] = Column(description[1])
+                continue
+            kind, typecode, offset, length, extra = description
+            start = data_start + offset
+            data = buffer[start:start + length].cast(typecode)
+            convert = extra if kind == 'array' else extra.__getitem__
+            self.columns[attname] = Column(data, convert)
+        self.length = header['length']
+        self.indexes = dict(header['indexes'])
+        self.statistics = {}
+        self._getters = [(attname, column.getter()) for attname, column in self.columns.items()]
+
+    def _map_file(self, stream: BinaryIO, header: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Read the header if not given and map the file, return the header."""
+        if header is None:
+            header = _read_header(stream)
+            if header is None:
+                raise ValueError(f'{self.path} is not a snapshot file')
+        self.map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        return header
+
+    @classmethod
+    def open(cls, model, path: str, source_key: Any = None, version: int = 0) \
+            -> Optional['MemoryMappedSnapshot']:
+        """
+        Open a binary snapshot file.
+
+        Return None when the file does not exist, or was written for another source key or
+        another definition of the model fields.
+        """
+        try:
+            stream = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        with stream:
+            header = _read_header(stream)
+            if (
+                header is None or header['byteorder'] != sys.byteorder
+                or header['fingerprint'] != fields_fingerprint(model)
+                or header['source_key'] != source_key
+            ):
+                return None
+            return cls(model, path, version, header, stream)
@@ -0,0 +1,59 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import mmap
+import struct
+from typing import Any, BinaryIO, Dict, Optional, Type, TypeVar
+
+from memory_db.columnar import MemoryColumnarSnapshot
+from memory_db.models import MemoryModel
+from memory_db.snapshot import MemorySnapshot
+
+_T = TypeVar("_T", bound=MemoryModel, covariant=True)
+
+MAGIC: bytes
+HEADER_LENGTH: struct.Struct
+ALIGNMENT: int
+
+
+def fields_fingerprint(model: Type[MemoryModel]) -> str:
+    ...
+
+
+def dump_snapshot(snapshot: MemorySnapshot[Any], path: str, source_key: Any = ...) -> None:
+    ...
+
+
+class MemoryMappedSnapshot(MemoryColumnarSnapshot[_T]):
+    path: str = ...
+    map: mmap.mmap = ...
+
+    def __init__(
+        self,
+        model: Type[_T],
+        path: str,
+        version: int = ...,
+        header: Optional[Dict[str, Any]] = ...,
+        stream: Optional[BinaryIO] = ...
+    ):
+        ...
+
+    @classmethod
+    def open(cls,
+             model: Type[_T],
+             path: str,
+             source_key: Any = ...,
+             version: int = ...) -> Optional['MemoryMappedSnapshot[_T]']:
+        ...
@@ -0,0 +1,203 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import array
+import operator
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, \
+    TYPE_CHECKING
+
+from django.db import NotSupportedError
+from django.db.models.fields import Field
+
+from memory_db.lookups import compile_predicate, field_getter
+from memory_db.snapshot import MemorySnapshot
+
+if TYPE_CHECKING:
+    from .lookups import Condition, MemoryLookup
+
+ARRAY_TYPECODES = {
+    'AutoField': ('q', int),
+    'BigAutoField': ('q', int),
+    'BigIntegerField': ('q', int),
+    'IntegerField': ('q', int),
+    'PositiveBigIntegerField': ('q', int),
+    'PositiveIntegerField': ('q', int),
+    'PositiveSmallIntegerField': ('q', int),
+    'SmallAutoField': ('q', int),
+    'SmallIntegerField': ('q', int),
+    'FloatField': ('d', float),
+    'BooleanField': ('b', bool),
+}
+STRING_TYPES = {'CharField', 'EmailField', 'SlugField', 'TextField', 'URLField'}
+
+
+class Column:
+    """
+    Values of a field for all the objects.
+
+    `data` is an array for numbers and booleans, a list otherwise. `convert` restore the
+    python type of the array items (bool).
+    """
+
+    def __init__(self, data: Sequence[Any], convert: Optional[Callable[[Any], Any]] = None):
+        self.data = data
+        self.convert = convert
+
+    def __len__(self):
+        """Return the count of values."""
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Loop over the values."""
+        if self.convert is None:
+            return iter(self.data)
+        return map(self.convert, self.data)
+
+    def getter(self) -> Callable[[int], Any]:
+        """Create a getter of the value at a position."""
+        if self.convert is None:
+            return self.data.__getitem__
+        data = self.data
+        convert = self.convert
+
+        def get(position: int):
+            """Get the value at the position."""
+            return convert(data[position])
+
+        return get
+
+    @classmethod
+    def from_values(cls, field: Field, values: List[Any]) -> 'Column':
+        """
+        Create the most compact column for the field values.
+
+        Numbers and booleans are stored in an array unless some values are null (or not of the
+        field type). Strings are interned.
+        """
+        internal_type = field.get_internal_type()
+        if internal_type in ARRAY_TYPECODES:
+            typecode, type_ = ARRAY_TYPECODES[internal_type]
+            if all(type(value) is type_ for value in values):
+                try:
+                    data = array.array(typecode, values)
+                except OverflowError:
+                    return cls(values)
+                return cls(data, bool if type_ is bool else None)
+        elif internal_type in STRING_TYPES:
+            intern = sys.intern
+            values = [intern(value) if type(value) is str else value for value in values]
+        return cls(values)
+
+
+class MemoryColumnarSnapshot(MemorySnapshot):
+    """
+    Loaded data of a manager stored by column.
+
+    Each Meta.fields value is stored in a compact column (see. Column) instead of the objects
+    returned by the get_all method. Filters and values are evaluated on the columns, model
+    objects are created when the queryset is iterated.
+
+    Only the Meta.fields values are kept. Objects are created again each time they are
+    iterated.
+    """
+
+    def __init__(self, model, rows: Iterable[Any], version: int = 0):
+        self.model = model
+        self.version = version
+        self.source = None
+        self.indexes = {}
+        self.statistics = {}
+        fields = list(model._meta.fields)
+        getters = [operator.attrgetter(field.get_attname()) for field in fields]
+        values: List[List[Any]] = [[] for _ in fields]
+        for row in rows:
+            for getter, field_values in zip(getters, values):
+                field_values.append(getter(row))
+        self.columns: Dict[str, Column] = {
+            field.get_attname(): Column.from_values(field, field_values)
+            for field, field_values in zip(fields, values)
+        }
+        self.length = len(values[0]) if values else 0
+        self._getters = [(attname, column.getter()) for attname, column in self.columns.items()]
+
+    def __iter__(self):
+        """Loop over the model objects."""
+        return map(self.__getitem__, range(self.length))
+
+    def __len__(self):
+        """Return the count of objects."""
+        return self.length
+
+    def __getitem__(self, position):
+        """Create the model object at the position."""
+        return self.model(**{attname: getter(position) for attname, getter in self._getters})
+
+    def is_source(self, rows: Iterable[Any]) -> bool:
+        """Return False, the get_all rows are not kept."""
+        return False
+
+    def changed(self, version: int, created=(), updated=None, deleted=()):
+        """Raise NotSupportedError, the columns are read only."""
+        raise NotSupportedError(f'{self.__class__.__name__} is read only')
+
+    def reloaded(self, rows: Iterable[Any], version: int):
+        """Return None, the columns are read only: the rows are loaded in a new snapshot."""
+        return None
+
+    def _position_predicate(self, lookup: 'MemoryLookup') -> Callable[[int], bool]:
+        """Create the test of the lookup on the column value at a position."""
+        get = self.value_getter(lookup.path)
+        test = lookup.test
+
+        def predicate(position: int) -> bool:
+            """Test the lookup on the column value."""
+            return test(get(position))
+
+        return predicate
+
+    def position_predicate(self, lookups: List['Condition']) -> Callable[[int], bool]:
+        """Compile the lookups into a test of the column values at a position."""
+        return compile_predicate(lookups, self._position_predicate)
+
+    def values(self, attname: str) -> Iterable[Any]:
+        """Loop over the field column."""
+        return iter(self.columns[attname])
+
+    def value_getter(self, path: str) -> Callable[[int], Any]:
+        """Create a getter reading the column of the first attribute of the path."""
+        attname, _, attributes = path.partition('.')
+        if attname not in self.columns:
+            getter = field_getter(self.model, path)
+            return lambda position: getter(self[position])
+        column_getter = self.columns[attname].getter()
+        if not attributes:
+            return column_getter
+        getter = field_getter(self.model, attributes)
+
+        def get(position: int):
+            """Get the attribute path value of the column value at the position."""
+            return getter(column_getter(position))
+
+        return get
+
+    def filter(  # noqa: A003
+        self, positions: Iterable[int], lookups: List['Condition'], negated: bool = False
+    ) -> Iterable[int]:
+        """Loop over the positions of the objects matching all the lookups (or not)."""
+        predicate = compile_predicate(lookups, self._position_predicate, self.get_rank(positions))
+        if negated:
+            return (position for position in positions if not predicate(position))
+        return (position for position in positions if predicate(position))
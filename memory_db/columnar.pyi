@@ -0,0 +1,77 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, \
+    TypeVar
+
+from django.db.models.fields import Field
+
+from memory_db.lookups import Condition
+from memory_db.models import MemoryModel
+from memory_db.snapshot import MemorySnapshot
+
+_T = TypeVar("_T", bound=MemoryModel, covariant=True)
+
+ARRAY_TYPECODES: Dict[str, Tuple[str, type]]
+STRING_TYPES: Iterable[str]
+
+
+class Column:
+    data: Sequence[Any] = ...
+    convert: Optional[Callable[[Any], Any]] = ...
+
+    def __init__(self, data: Sequence[Any], convert: Optional[Callable[[Any], Any]] = ...):
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+    def __iter__(self) -> Iterator[Any]:
+        ...
+
+    def getter(self) -> Callable[[int], Any]:
+        ...
+
+    @classmethod
+    def from_values(cls, field: Field, values: List[Any]) -> 'Column':
+        ...
+
+
+class MemoryColumnarSnapshot(MemorySnapshot[_T]):
+    columns: Dict[str, Column] = ...
+    length: int = ...
+
+    def __init__(self, model: Type[_T], rows: Iterable[_T], version: int = ...):
+        ...
+
+    def changed(
+        self,
+        version: int,
+        created: Iterable[_T] = ...,
+        updated: Optional[Dict[int, _T]] = ...,
+        deleted: Iterable[int] = ...
+    ) -> MemorySnapshot[_T]:
+        ...
+
+    def reloaded(self, rows: Iterable[_T], version: int) -> None:
+        ...
+
+    def position_predicate(self, lookups: List[Condition]) -> Callable[[int], bool]:
+        ...
+
+    def filter(  # noqa: A003
+        self, positions: Iterable[int], lookups: List[Condition], negated: bool = ...
+    ) -> Iterable[int]:
+        ...
@@ -0,0 +1,138 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import abc
+import csv
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from django.core.checks.messages import CheckMessage
+from django.core.exceptions import ImproperlyConfigured
+
+from .manager import MemoryManager
+from .snapshot import MemorySnapshot
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+
+class MemoryFileManager(MemoryManager, metaclass=abc.ABCMeta):
+    """
+    Manager loading the objects from the rows of a file.
+
+    The rows are parsed one by one and converted with the model from_db_many method. The
+    file is read again when its modification time or its size change.
+    """
+
+    path: Optional[str] = None
+    encoding = 'utf8'
+    newline: Optional[str] = None
+
+    def get_path(self) -> str:
+        """Return the path of the file."""
+        if self.path is None:
+            raise ImproperlyConfigured(f'{self.__class__.__name__} is missing a path')
+        return self.path
+
+    def get_file_stat(self) -> Tuple[int, int]:
+        """Return the (modification time, size) of the file."""
+        stat = os.stat(self.get_path())
+        return stat.st_mtime_ns, stat.st_size
+
+    def get_source_key(self) -> Tuple[str, int, int]:
+        """
+        Return the path, the modification time and the size of the file.
+
+        Taken before reading, a change during the read is seen by the next is_stale.
+        """
+        return (self.get_path(), *self.get_file_stat())
+
+    def get_all(self):
+        """Load the objects of the file rows."""
+        with open(self.get_path(), encoding=self.encoding, newline=self.newline) as stream:
+            return list(self.model.from_db_many(self.read_rows(stream)))
+
+    def check_data(self, **options) -> List[CheckMessage]:
+        """Check the rows of the file (see. MemoryModel.check_data_many options)."""
+        with open(self.get_path(), encoding=self.encoding, newline=self.newline) as stream:
+            return list(self.model.check_data_many(self.read_rows(stream), **options))
+
+    def is_stale(self, snapshot: MemorySnapshot) -> bool:
+        """Return True if the file changed since it was read."""
+        try:
+            return self.get_source_key() != self.source_key
+        except FileNotFoundError:  # keep the objects until the file is back
+            return False
+
+    @abc.abstractmethod
+    def read_rows(self, stream: TextIO) -> Iterator[Dict[str, Any]]:
+        """Loop over the rows of the file."""
+
+
+class CSVFileManager(MemoryFileManager):
+    """Manager loading the objects from a CSV file with a header line."""
+
+    newline = ''
+    dialect = 'excel'
+    delimiter = ','
+
+    def read_rows(self, stream: TextIO) -> Iterator[Dict[str, Any]]:
+        """Loop over the CSV lines."""
+        return csv.DictReader(stream, dialect=self.dialect, delimiter=self.delimiter)
+
+
+class JSONLinesFileManager(MemoryFileManager):
+    """Manager loading the objects from a JSON Lines file (a JSON object per line)."""
+
+    def read_rows(self, stream: TextIO) -> Iterator[Dict[str, Any]]:
+        """Loop over the non empty lines."""
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+class YAMLFileManager(MemoryFileManager):
+    """
+    Manager loading the objects from a YAML file.
+
+    Each document of the file is a row, or a list of rows. The items of the lists are
+    constructed one by one.
+    """
+
+    def read_rows(self, stream: TextIO) -> Iterator[Dict[str, Any]]:
+        """Loop over the YAML rows."""
+        if yaml is None:
+            raise ImproperlyConfigured('YAMLFileManager requires PyYAML')
+        loader = yaml.SafeLoader(stream)
+        try:
+            loader.get_event()  # stream start
+            while not loader.check_event(yaml.StreamEndEvent):
+                loader.get_event()  # document start
+                if loader.check_event(yaml.SequenceStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(yaml.SequenceEndEvent):
+                        yield loader.construct_document(loader.compose_node(None, None))
+                    loader.get_event()
+                else:
+                    row = loader.construct_document(loader.compose_node(None, None))
+                    if row is not None:  # empty document
+                        yield row
+                loader.get_event()  # document end
+                loader.anchors = {}
+        finally:
+            loader.dispose()
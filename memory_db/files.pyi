@@ -0,0 +1,80 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import abc
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, TypeVar
+
+from django.core.checks.messages import CheckMessage
+
+from memory_db.manager import MemoryManager
+from memory_db.models import MemoryModel
+from memory_db.snapshot import MemorySnapshot
+
+_Tco = TypeVar("_Tco", bound=MemoryModel, covariant=True)
+
+
+class MemoryFileManager(MemoryManager[_Tco], metaclass=abc.ABCMeta):
+    path: Optional[str] = ...
+    encoding: str = ...
+    newline: Optional[str] = ...
+
+    def get_path(self) -> str:
+        ...
+
+    def get_file_stat(self) -> Tuple[int, int]:
+        ...
+
+    def get_source_key(self) -> Tuple[str, int, int]:
+        ...
+
+    def get_all(self) -> List[_Tco]:
+        ...
+
+    def check_data(
+        self,
+        *,
+        chunk_size: int = ...,
+        max_errors: Optional[int] = ...,
+        executor: Optional[Executor] = ...
+    ) -> List[CheckMessage]:
+        ...
+
+    def is_stale(self, snapshot: MemorySnapshot[_Tco]) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def read_rows(self, stream: TextIO) -> Iterator[Dict[str, Any]]:
+        ...
+
+
+class CSVFileManager(MemoryFileManager[_Tco]):
+    dialect: str = ...
+    delimiter: str = ...
+
+    def read_rows(self, stream: TextIO) -> Iterator[Dict[str, Any]]:
+        ...
+
+
+class JSONLinesFileManager(MemoryFileManager[_Tco]):
+
+    def read_rows(self, stream: TextIO) -> Iterator[Dict[str, Any]]:
+        ...
+
+
+class YAMLFileManager(MemoryFileManager[_Tco]):
+
+    def read_rows(self, stream: TextIO) -> Iterator[Dict[str, Any]]:
+        ...
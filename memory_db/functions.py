@@ -15,7 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import functools
 import operator
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Optional
 
 from memory_db.utils import cast_value
 
@@ -31,29 +31,66 @@ class MemoryFunctions:
 
     def __init__(self):
         self.__registery = dict()
+        self.__costs: Dict[str, int] = dict()
 
     def register(
-        self, func: Callable[[Any, Any], bool], *, name: Optional[str] = None, default=False
+        self,
+        func: Callable[[Any, Any], bool],
+        *,
+        name: Optional[str] = None,
+        default=False,
+        cost: int = 1
     ):
         """
         Register a new function in the registery.
 
-        By default, the name of the function is the function name
+        By default, the name of the function is the function name. The cost is the relative
+        time of a test, the cheapest lookups of a filter are tested first (the isnull lookups,
+        of cost 0, can guard the others).
         """
+        name = name or func.__name__
         if default:
             self.default = func
-        name = name or func.__name__
+            self.default_name = name
         self.__registery[name] = func
+        self.__costs[name] = cost
         return func
 
     def registered(self, name):
         """Return True if the function is a registered function."""
         return name in self.__registery
 
+    def cost(self, name) -> int:
+        """Get the relative cost of the function."""
+        return self.__costs[name]
+
     def get(self, name):
         """Get the function associated to the name."""
         return self.__registery[name]
 
+    def prepare(self, name, filter_value):
+        """Get the function associated to the name bound to the filter value."""
+        return prepare(self.get(name), filter_value)
+
+
+def prepare(func, filter_value) -> Callable[[Any], bool]:
+    """
+    Bind the filter value to the function.
+
+    Return a test taking the object value only. When the function define a `prepare`
+    attribute it is used to do the filter value work (casting, upper...) once for all the
+    objects.
+    """
+    prepare_func = getattr(func, 'prepare', None)
+    if prepare_func is not None:
+        return prepare_func(filter_value)
+
+    def test(value):
+        """Apply the function with the bound filter value."""
+        return func(value, filter_value)
+
+    return test
+
 
 MEMORY_FUNCTIONS = MemoryFunctions()  # pylint: disable=invalid-name
 
@@ -67,19 +104,69 @@ def cast_op(op):
         filter_value = cast_value(value, filter_value)
         return op(value, filter_value)
 
+    def prepare_op(filter_value):
+        """Cast the filter value once per value type."""
+        casts: Dict[type, Any] = {}
+
+        def test(value):
+            """Apply the comparaison operator with the casted filter value."""
+            value_type = type(value)
+            try:
+                cast = casts[value_type]
+            except KeyError:
+                cast = casts[value_type] = cast_value(value, filter_value)
+            return op(value, cast)
+
+        return test
+
+    wrapper.prepare = prepare_op  # type: ignore
+    return wrapper
+
+
+def range_op(op):
+    """Create a comparison operator with casting method, null values never match."""
+    cast = cast_op(op)
+
+    @functools.wraps(op)
+    def wrapper(value, filter_value):
+        """Cast and compare the not null values."""
+        return value is not None and cast(value, filter_value)
+
+    def prepare_op(filter_value):
+        """Cast the filter value once per value type."""
+        cast_test = cast.prepare(filter_value)  # type: ignore
+
+        def test(value):
+            """Compare the not null values."""
+            return value is not None and cast_test(value)
+
+        return test
+
+    wrapper.prepare = prepare_op  # type: ignore
     return wrapper
 
 
 def icast_op(op):
-    """Create a non sensitive operator."""
+    """Create a non sensitive operator, the non string values never match."""
 
     @functools.wraps(op)
     def wrapper(value: str, filter_value: str):
         """Call the comparaison operator with upper strings."""
-        assert isinstance(value, str)
         assert isinstance(filter_value, str)
-        return op(value.upper(), filter_value.upper())
+        return isinstance(value, str) and op(value.upper(), filter_value.upper())
+
+    def prepare_op(filter_value: str):
+        """Upper the filter value once."""
+        assert isinstance(filter_value, str)
+        upper_test = prepare(op, filter_value.upper())
+
+        def test(value: str):
+            """Call the comparaison operator with upper strings."""
+            return isinstance(value, str) and upper_test(value.upper())
 
+        return test
+
+    wrapper.prepare = prepare_op  # type: ignore
     return wrapper
 
 
@@ -91,31 +178,53 @@ def rev_op(op):
         """Call the comparaison operator with upper strings."""
         return op(filter_value, value)
 
+    def prepare_op(filter_value):
+        """Bind the filter value as the first argument."""
+
+        def test(value):
+            """Call the comparaison operator with switched args."""
+            return op(filter_value, value)
+
+        return test
+
+    wrapper.prepare = prepare_op  # type: ignore
     return wrapper
 
 
 MEMORY_FUNCTIONS.register(cast_op(operator.eq), name='exact', default=True)
-MEMORY_FUNCTIONS.register(icast_op(operator.eq), name='iexact')
+MEMORY_FUNCTIONS.register(icast_op(operator.eq), name='iexact', cost=2)
 MEMORY_FUNCTIONS.register(rev_op(operator.contains), name='in')
-MEMORY_FUNCTIONS.register(operator.contains, name='contains')
-MEMORY_FUNCTIONS.register(icast_op(cast_op(operator.contains)), name='icontains')
-MEMORY_FUNCTIONS.register(cast_op(operator.le), name='lte')
-MEMORY_FUNCTIONS.register(cast_op(operator.lt), name='lt')
-MEMORY_FUNCTIONS.register(cast_op(operator.ge), name='gte')
-MEMORY_FUNCTIONS.register(cast_op(operator.gt), name='gt')
+MEMORY_FUNCTIONS.register(operator.contains, name='contains', cost=2)
+MEMORY_FUNCTIONS.register(icast_op(cast_op(operator.contains)), name='icontains', cost=3)
+MEMORY_FUNCTIONS.register(range_op(operator.le), name='lte')
+MEMORY_FUNCTIONS.register(range_op(operator.lt), name='lt')
+MEMORY_FUNCTIONS.register(range_op(operator.ge), name='gte')
+MEMORY_FUNCTIONS.register(range_op(operator.gt), name='gt')
 MEMORY_FUNCTIONS.register(str.startswith, name='startswith')
-MEMORY_FUNCTIONS.register(icast_op(str.startswith), name='istartswith')
+MEMORY_FUNCTIONS.register(icast_op(str.startswith), name='istartswith', cost=2)
 MEMORY_FUNCTIONS.register(str.endswith, name='endswith')
-MEMORY_FUNCTIONS.register(icast_op(str.endswith), name='iendswith')
+MEMORY_FUNCTIONS.register(icast_op(str.endswith), name='iendswith', cost=2)
 
 
-@MEMORY_FUNCTIONS.register
+@functools.partial(MEMORY_FUNCTIONS.register, cost=0)
 def isnull(value, filter_value):
     """Check if value is considered as NULL."""
+    return prepare_isnull(filter_value)(value)
+
+
+def prepare_isnull(filter_value):
+    """Import the related manager class once."""
     from .manager import MemoryBaseRelatedManager
 
-    if isinstance(value, MemoryBaseRelatedManager):
-        isnull = len(value) == 0
-    else:
-        isnull = (value is None)
-    return isnull == filter_value
+    def test(value):
+        """Check if value is considered as NULL."""
+        if isinstance(value, MemoryBaseRelatedManager):
+            isnull = len(value) == 0
+        else:
+            isnull = (value is None)
+        return isnull == filter_value
+
+    return test
+
+
+isnull.prepare = prepare_isnull  # type: ignore
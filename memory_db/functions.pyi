@@ -17,10 +17,23 @@ from typing import Any, Callable
 
 MemoryFunctionType = Callable[[Any, Any], bool]
 
+MemoryTestType = Callable[[Any], bool]
+
 
 class MemoryFunctions:
+    default_name: str = ...
+
+    def register(
+        self,
+        func: MemoryFunctionType = ...,
+        *,
+        name: str = ...,
+        default: bool = ...,
+        cost: int = ...
+    ):
+        ...
 
-    def register(self, func: MemoryFunctionType = ..., *, name: str = ...):
+    def cost(self, name: str) -> int:
         ...
 
     def default(self) -> MemoryFunctionType:
@@ -32,5 +45,12 @@ class MemoryFunctions:
     def get(self, name: str) -> MemoryFunctionType:
         ...
 
+    def prepare(self, name: str, filter_value: Any) -> MemoryTestType:
+        ...
+
+
+def prepare(func: MemoryFunctionType, filter_value: Any) -> MemoryTestType:
+    ...
+
 
 MEMORY_FUNCTIONS: MemoryFunctions
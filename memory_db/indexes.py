@@ -0,0 +1,264 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import bisect
+import copy
+import operator
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cached_property import cached_property
+
+from memory_db.utils import cast_value
+
+
+class MemoryIndex:
+    """
+    Index of the objects positions by field value.
+
+    `lookup` return the sorted positions of the objects matching a lookup, or None when the
+    index can't be used for the lookup. The returned lists must not be modified.
+
+    An index is never modified either: `changed` return a new index sharing the lists of the
+    values which did not change.
+    """
+
+    lookups: Iterable[str] = ()
+
+    def __init__(self, values: Iterable[Any]):
+        """Build the index from the field value of each object."""
+
+    def changed(
+        self, removed: Sequence[Tuple[int, Any]], added: Sequence[Tuple[int, Any]]
+    ) -> 'MemoryIndex':
+        """
+        Return a copy of the index without the removed (position, value) and with the added.
+
+        Raise TypeError when an added value can't be indexed.
+        """
+        raise NotImplementedError
+
+    def lookup(self, function_name: str, filter_value: Any) -> Optional[List[int]]:
+        """Return the candidate positions for the lookup."""
+        if function_name not in self.lookups:
+            return None
+        return getattr(self, f'lookup_{function_name}')(filter_value)
+
+
+class HashIndex(MemoryIndex):
+    """
+    Dict based index.
+
+    Probe the positions of the `exact`, `iexact` and `in` lookups in O(1) per value.
+    """
+
+    lookups = ('exact', 'iexact', 'in')
+
+    def __init__(self, values: Iterable[Any]):
+        """Map each value to the list of its positions."""
+        positions: Dict[Any, List[int]] = defaultdict(list)
+        samples: Dict[type, Any] = {}
+        for position, value in enumerate(values):
+            positions[value].append(position)
+            samples.setdefault(type(value), value)
+        self.positions = dict(positions)
+        self.samples = samples
+
+    def __len__(self):
+        """Return the count of distinct values."""
+        return len(self.positions)
+
+    def changed(
+        self, removed: Sequence[Tuple[int, Any]], added: Sequence[Tuple[int, Any]]
+    ) -> 'HashIndex':
+        """Copy the positions lists of the changed values only."""
+        index = copy.copy(self)
+        index.__dict__.pop('upper_positions', None)
+        index.positions = dict(self.positions)
+        index.samples = dict(self.samples)
+        changed: Dict[Any, List[int]] = {}
+        for position, value in removed:
+            if value not in changed:
+                changed[value] = list(index.positions[value])
+            bucket = changed[value]
+            del bucket[bisect.bisect_left(bucket, position)]
+        for position, value in added:
+            if value not in changed:
+                changed[value] = list(index.positions.get(value, ()))
+            bisect.insort(changed[value], position)
+            index.samples.setdefault(type(value), value)
+        for value, bucket in changed.items():
+            if bucket:
+                index.positions[value] = bucket
+            else:
+                del index.positions[value]
+        return index
+
+    @cached_property
+    def upper_positions(self) -> Dict[str, List[int]]:
+        """Map each upper string value to the list of its positions."""
+        upper_positions: Dict[str, List[int]] = defaultdict(list)
+        for value, positions in self.positions.items():
+            if isinstance(value, str):
+                upper_positions[value.upper()].extend(positions)
+        for positions in upper_positions.values():
+            positions.sort()
+        return dict(upper_positions)
+
+    def get(self, *values: Any) -> Optional[List[int]]:
+        """Return the sorted positions of the values."""
+        try:
+            buckets = [self.positions[value] for value in set(values) if value in self.positions]
+        except TypeError:  # unhashable value
+            return None
+        if len(buckets) == 1:
+            return buckets[0]
+        return sorted(set().union(*buckets))
+
+    def lookup_exact(self, filter_value: Any) -> Optional[List[int]]:
+        """Probe the filter value casted as each indexed value type."""
+        return self.get(*(cast_value(sample, filter_value) for sample in self.samples.values()))
+
+    def lookup_iexact(self, filter_value: Any) -> Optional[List[int]]:
+        """Probe the upper filter value."""
+        if not isinstance(filter_value, str):
+            return None
+        return self.upper_positions.get(filter_value.upper(), [])
+
+    def lookup_in(self, filter_value: Any) -> Optional[List[int]]:
+        """Probe each filter value."""
+        if not isinstance(filter_value, (list, tuple, set, frozenset)):
+            return None
+        return self.get(*filter_value)
+
+
+class SortedIndex(MemoryIndex):
+    """
+    Sorted array based index.
+
+    Bisect the positions of the `lt`, `lte`, `gt` and `gte` lookups in O(log n) and give the
+    positions of the objects ordered by the field value.
+    """
+
+    lookups = ('lt', 'lte', 'gt', 'gte')
+
+    def __init__(self, values: Iterable[Any]):
+        """
+        Sort the (value, position) pairs of the non null values.
+
+        Raise TypeError if the values are not comparables.
+        """
+        pairs = []
+        nulls = []
+        for position, value in enumerate(values):
+            if value is None:
+                nulls.append(position)
+            else:
+                pairs.append((value, position))
+        pairs.sort(key=operator.itemgetter(0))
+        self.keys = [value for value, _ in pairs]
+        self.positions = [position for _, position in pairs]
+        self.nulls = nulls
+
+    def __len__(self):
+        """Return the count of indexed values."""
+        return len(self.keys)
+
+    def changed(
+        self, removed: Sequence[Tuple[int, Any]], added: Sequence[Tuple[int, Any]]
+    ) -> 'SortedIndex':
+        """
+        Remove and insert the pairs in copies of the keys and positions lists.
+
+        The positions of the equal values stay sorted, as sorted() would have left them.
+        """
+        index = copy.copy(self)
+        keys = index.keys = self.keys[:]
+        positions = index.positions = self.positions[:]
+        nulls = index.nulls = self.nulls[:]
+        for position, value in removed:
+            if value is None:
+                del nulls[bisect.bisect_left(nulls, position)]
+                continue
+            start = bisect.bisect_left(keys, value)
+            stop = bisect.bisect_right(keys, value, start)
+            offset = bisect.bisect_left(positions, position, start, stop)
+            del keys[offset]
+            del positions[offset]
+        for position, value in added:
+            if value is None:
+                bisect.insort(nulls, position)
+                continue
+            start = bisect.bisect_left(keys, value)
+            stop = bisect.bisect_right(keys, value, start)
+            offset = bisect.bisect_left(positions, position, start, stop)
+            keys.insert(offset, value)
+            positions.insert(offset, position)
+        return index
+
+    def range(self, filter_value: Any, *, lower: bool, inclusive: bool) -> Optional[List[int]]:
+        """
+        Return the sorted positions of the values lower or greater than the filter value.
+
+        The filter value is casted as the indexed values.
+        """
+        if not self.keys:
+            return []
+        filter_value = cast_value(self.keys[0], filter_value)
+        bisect_ = bisect.bisect_right if lower == inclusive else bisect.bisect_left
+        try:
+            limit = bisect_(self.keys, filter_value)
+        except TypeError:  # not comparable
+            return None
+        positions = self.positions[:limit] if lower else self.positions[limit:]
+        positions.sort()
+        return positions
+
+    def lookup_lt(self, filter_value: Any) -> Optional[List[int]]:
+        """Bisect the values lower than the filter value."""
+        return self.range(filter_value, lower=True, inclusive=False)
+
+    def lookup_lte(self, filter_value: Any) -> Optional[List[int]]:
+        """Bisect the values lower or equal to the filter value."""
+        return self.range(filter_value, lower=True, inclusive=True)
+
+    def lookup_gt(self, filter_value: Any) -> Optional[List[int]]:
+        """Bisect the values greater than the filter value."""
+        return self.range(filter_value, lower=False, inclusive=False)
+
+    def lookup_gte(self, filter_value: Any) -> Optional[List[int]]:
+        """Bisect the values greater or equal to the filter value."""
+        return self.range(filter_value, lower=False, inclusive=True)
+
+    def ordered(self, reverse: bool = False) -> Optional[Iterable[int]]:
+        """
+        Return the positions ordered by value, as sorted() would do.
+
+        Return None when some values are null, as they can't be ordered.
+        """
+        if self.nulls:
+            return None
+        if not reverse:
+            return iter(self.positions)
+        return self._reversed()
+
+    def _reversed(self):
+        # sorted(reverse=True) keep the objects with equal values in their initial order
+        keys = self.keys
+        stop = len(keys)
+        while stop:
+            start = bisect.bisect_left(keys, keys[stop - 1], 0, stop)
+            yield from self.positions[start:stop]
+            stop = start
@@ -0,0 +1,92 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class MemoryIndex:
+    lookups: Iterable[str] = ...
+
+    def __init__(self, values: Iterable[Any]):
+        ...
+
+    def lookup(self, function_name: str, filter_value: Any) -> Optional[List[int]]:
+        ...
+
+    def changed(
+        self, removed: Sequence[Tuple[int, Any]], added: Sequence[Tuple[int, Any]]
+    ) -> 'MemoryIndex':
+        ...
+
+
+class HashIndex(MemoryIndex):
+    positions: Dict[Any, List[int]] = ...
+    samples: Dict[type, Any] = ...
+
+    def __len__(self) -> int:
+        ...
+
+    def changed(
+        self, removed: Sequence[Tuple[int, Any]], added: Sequence[Tuple[int, Any]]
+    ) -> 'HashIndex':
+        ...
+
+    @property
+    def upper_positions(self) -> Dict[str, List[int]]:
+        ...
+
+    def get(self, *values: Any) -> Optional[List[int]]:
+        ...
+
+    def lookup_exact(self, filter_value: Any) -> Optional[List[int]]:
+        ...
+
+    def lookup_iexact(self, filter_value: Any) -> Optional[List[int]]:
+        ...
+
+    def lookup_in(self, filter_value: Any) -> Optional[List[int]]:
+        ...
+
+
+class SortedIndex(MemoryIndex):
+    keys: List[Any] = ...
+    positions: List[int] = ...
+    nulls: List[int] = ...
+
+    def __len__(self) -> int:
+        ...
+
+    def changed(
+        self, removed: Sequence[Tuple[int, Any]], added: Sequence[Tuple[int, Any]]
+    ) -> 'SortedIndex':
+        ...
+
+    def range(self, filter_value: Any, *, lower: bool, inclusive: bool) -> Optional[List[int]]:
+        ...
+
+    def lookup_lt(self, filter_value: Any) -> Optional[List[int]]:
+        ...
+
+    def lookup_lte(self, filter_value: Any) -> Optional[List[int]]:
+        ...
+
+    def lookup_gt(self, filter_value: Any) -> Optional[List[int]]:
+        ...
+
+    def lookup_gte(self, filter_value: Any) -> Optional[List[int]]:
+        ...
+
+    def ordered(self, reverse: bool = ...) -> Optional[Iterator[int]]:
+        ...
@@ -0,0 +1,245 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import operator
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+from memory_db.functions import MEMORY_FUNCTIONS
+
+Predicate = Callable[[Any], bool]
+Rank = Callable[[Any], float]
+
+
+def resolve_path(model, key: str) -> Tuple[str, str]:
+    """
+    Split a lookup key into an attribute path and a function name.
+
+    `value__in` give `('value', 'in')`, `pk` give `('id', 'exact')` when the model primary
+    key is named `id`.
+    """
+    keys = key.split('__')
+    function_name = MEMORY_FUNCTIONS.default_name
+    if (
+        MEMORY_FUNCTIONS.registered(keys[-1])
+        and (len(keys) > 1 or keys[-1] not in model._meta.fields_map)
+    ):
+        function_name = keys.pop()
+    if keys and keys[0] == 'pk' and model._meta.pk is not None:
+        keys[0] = model._meta.pk.name
+    return '.'.join(keys), function_name
+
+
+def field_getter(model, path: str) -> Callable[[Any], Any]:
+    """
+    Create a getter of the attribute path on the model objects.
+
+    Raise FieldDoesNotExist when the object does not have the attribute.
+    """
+    getter = operator.attrgetter(path) if path else _identity
+
+    def get(obj):
+        """Get the attribute path value of the object."""
+        try:
+            return getter(obj)
+        except AttributeError:
+            raise FieldDoesNotExist("%s has no field named '%s'" % (model.__name__, path))
+
+    return get
+
+
+def _identity(obj):
+    return obj
+
+
+class MemoryLookup:
+    """
+    Compiled lookup of a filter keyword argument.
+
+    The attribute path, the function and the filter value are resolved once when the lookup
+    is created. The `predicate` is then called for each object. The `cost` is the relative
+    time of the test: the function cost plus one by related object in the path.
+    """
+
+    def __init__(self, model, key: str, filter_value: Any):
+        self.model = model
+        self.key = key
+        self.filter_value = filter_value
+        self.path, self.function_name = resolve_path(model, key)
+        self.getter = field_getter(model, self.path)
+        self.test = MEMORY_FUNCTIONS.prepare(self.function_name, filter_value)
+        self.cost = MEMORY_FUNCTIONS.cost(self.function_name) + self.path.count('.')
+        self.predicate = self._compile()
+
+    def __repr__(self):
+        """Lookup representation."""
+        return f'<{self.__class__.__name__}: {self.key}={self.filter_value!r}>'
+
+    def _compile(self) -> Callable[[Any], bool]:
+        getter = self.getter
+        test = self.test
+
+        def predicate(obj) -> bool:
+            """Test the object value."""
+            return test(getter(obj))
+
+        return predicate
+
+    def compile(  # noqa: A003
+        self,
+        leaf: Callable[['MemoryLookup'], Predicate],
+        rank: Optional[Rank] = None
+    ) -> Predicate:
+        """Return the predicate created by leaf for the lookup."""
+        return leaf(self)
+
+
+class MemoryCondition:
+    """
+    Compiled Q object: lookups and conditions combined with AND or OR, negated or not.
+
+    The children are sorted by cost, the predicate test the cheapest first and stop at the
+    first one giving the result (a false child of an AND, a true child of an OR).
+    """
+
+    AND = Q.AND
+    OR = Q.OR
+
+    def __init__(self, model, q: Q):
+        self.model = model
+        self.connector = q.connector
+        self.negated = q.negated
+        children = [
+            compile_condition(model, child)
+            if isinstance(child, Q) else MemoryLookup(model, *child) for child in q.children
+        ]
+        self.children = sorted(children, key=_cost)
+        self.cost = sum(child.cost for child in self.children)
+        self.predicate = self.compile(_object_predicate)
+
+    def __repr__(self):
+        """Condition representation."""
+        children = f' {self.connector} '.join(map(repr, self.children))
+        return f'<{self.__class__.__name__}: {"NOT " if self.negated else ""}({children})>'
+
+    def compile(  # noqa: A003
+        self,
+        leaf: Callable[[MemoryLookup], Predicate],
+        rank: Optional[Rank] = None
+    ) -> Predicate:
+        """
+        Combine the predicates created by leaf for the lookups of the condition.
+
+        Used by the snapshots testing their own values in place of the objects, and ordering
+        the children by rank (see. MemorySnapshot.rank).
+        """
+        predicates = [child.compile(leaf, rank) for child in _ranked(self.children, rank)]
+        stop = self.connector == self.OR
+        negated = self.negated
+
+        def predicate(obj) -> bool:
+            """Test the children until one give the result."""
+            for child_predicate in predicates:
+                if bool(child_predicate(obj)) == stop:
+                    return stop != negated
+            return stop == negated
+
+        return predicate
+
+
+Condition = Union[MemoryLookup, MemoryCondition]
+
+
+def _cost(condition: Condition) -> int:
+    return condition.cost
+
+
+def _ranked(conditions: List[Condition], rank: Optional[Rank]) -> List[Condition]:
+    """Sort the conditions by rank, by cost without rank."""
+    if len(conditions) < 2:
+        return conditions
+    return sorted(conditions, key=rank or _cost)
+
+
+def _object_predicate(lookup: MemoryLookup) -> Predicate:
+    return lookup.predicate
+
+
+def compile_lookups(model, filters: Dict[str, Any]) -> List[MemoryLookup]:
+    """Compile each filter keyword argument."""
+    return [MemoryLookup(model, key, value) for key, value in filters.items()]
+
+
+def compile_condition(model, q: Q) -> Condition:
+    """Compile a Q object, a single lookup is not wrapped in a condition."""
+    if len(q.children) == 1 and not q.negated and not isinstance(q.children[0], Q):
+        return MemoryLookup(model, *q.children[0])
+    return MemoryCondition(model, q)
+
+
+def compile_q(model, q: Q) -> List[Condition]:
+    """
+    Compile a Q object into the list of its conditions which must all match.
+
+    The lookups of a Q combined with AND are compiled as filter keyword arguments: their
+    indexes can be used.
+    """
+    if q.connector == Q.AND and not q.negated:
+        conditions: List[Condition] = []
+        for child in q.children:
+            if isinstance(child, Q):
+                conditions += compile_q(model, child)
+            else:
+                conditions.append(MemoryLookup(model, *child))
+        return conditions
+    return [MemoryCondition(model, q)]
+
+
+def compile_filters(model, filters: Dict[str, Any]) -> Callable[[Any], bool]:
+    """
+    Compile the filter keyword arguments into a single predicate.
+
+    The predicate return True when all the lookups match.
+    """
+    return compile_predicate(compile_lookups(model, filters))
+
+
+def compile_predicate(
+    lookups: List[Condition],
+    leaf: Optional[Callable[[MemoryLookup], Predicate]] = None,
+    rank: Optional[Rank] = None
+) -> Callable[[Any], bool]:
+    """
+    Combine the lookups predicates, return True when all the lookups match.
+
+    The lookups of lowest rank are tested first, the cheapest ones without rank. leaf create
+    the predicates of the lookups, it test the objects by default (see.
+    MemoryCondition.compile).
+    """
+    leaf = leaf or _object_predicate
+    predicates = [lookup.compile(leaf, rank) for lookup in _ranked(lookups, rank)]
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def predicate(obj) -> bool:
+        """Test all the lookups."""
+        for lookup_predicate in predicates:
+            if not lookup_predicate(obj):
+                return False
+        return True
+
+    return predicate
@@ -0,0 +1,102 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from django.db.models import Q
+
+from memory_db.functions import MemoryTestType
+from memory_db.models import MemoryModel
+
+Predicate = Callable[[Any], bool]
+Rank = Callable[[Any], float]
+
+
+def resolve_path(model: Type[MemoryModel], key: str) -> Tuple[str, str]:
+    ...
+
+
+def field_getter(model: Type[MemoryModel], path: str) -> Callable[[Any], Any]:
+    ...
+
+
+class MemoryLookup:
+    model: Type[MemoryModel] = ...
+    key: str = ...
+    filter_value: Any = ...
+    path: str = ...
+    function_name: str = ...
+    getter: Callable[[Any], Any] = ...
+    test: MemoryTestType = ...
+    predicate: Predicate = ...
+    cost: int = ...
+
+    def __init__(self, model: Type[MemoryModel], key: str, filter_value: Any):
+        ...
+
+    def compile(  # noqa: A003
+        self,
+        leaf: Callable[['MemoryLookup'], Predicate],
+        rank: Optional[Rank] = ...
+    ) -> Predicate:
+        ...
+
+
+class MemoryCondition:
+    AND: str = ...
+    OR: str = ...
+    model: Type[MemoryModel] = ...
+    connector: str = ...
+    negated: bool = ...
+    children: List['Condition'] = ...
+    cost: int = ...
+    predicate: Predicate = ...
+
+    def __init__(self, model: Type[MemoryModel], q: Q):
+        ...
+
+    def compile(  # noqa: A003
+        self,
+        leaf: Callable[[MemoryLookup], Predicate],
+        rank: Optional[Rank] = ...
+    ) -> Predicate:
+        ...
+
+
+Condition = Union[MemoryLookup, MemoryCondition]
+
+
+def compile_lookups(model: Type[MemoryModel], filters: Dict[str, Any]) -> List[MemoryLookup]:
+    ...
+
+
+def compile_filters(model: Type[MemoryModel], filters: Dict[str, Any]) -> Predicate:
+    ...
+
+
+def compile_condition(model: Type[MemoryModel], q: Q) -> Condition:
+    ...
+
+
+def compile_q(model: Type[MemoryModel], q: Q) -> List[Condition]:
+    ...
+
+
+def compile_predicate(
+    lookups: List[Condition],
+    leaf: Optional[Callable[[MemoryLookup], Predicate]] = ...,
+    rank: Optional[Rank] = ...
+) -> Predicate:
+    ...
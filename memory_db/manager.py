@@ -14,14 +14,54 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import abc
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Optional
 
 from django.db.models.manager import BaseManager
 
+from .binary import dump_snapshot, MemoryMappedSnapshot
 from .query import MemoryQuerySet
+from .snapshot import MemorySnapshot, SnapshotDiff
 
 
 class MemoryBaseManager(BaseManager, metaclass=abc.ABCMeta):
-    """MemoryManager meta class overloading the queryset initialization."""
+    """
+    MemoryManager meta class overloading the queryset initialization.
+
+    The get_all data is cached in a snapshot, reloaded when it is older than
+    cache_timeout seconds (None: never, 0: on each query), when it is stale or
+    invalidated. load_duration is the time, in seconds, of the last load.
+
+    When snapshot_path is set, the loaded data is dumped in this binary file and the next
+    loads read the file, without calling get_all, as long as get_source_key return the same
+    key and the model fields are not changed (see. MemoryMappedSnapshot).
+
+    The snapshots are never modified: a load build a new one and replace the previous one,
+    still used by the querysets started on it. The loads are serialized by a lock, the
+    snapshot is read without it.
+
+    With diff_reload, the get_all rows are compared with the loaded snapshot by primary key
+    and only the changed objects are applied to it (see. MemorySnapshot.reloaded).
+    last_diff give the counts of the changes of the last load, None after a full load (the
+    first one, or after invalidate).
+    """
+
+    snapshot_class = MemorySnapshot
+    cache_timeout: Optional[float] = None
+    snapshot_path: Optional[str] = None
+    _snapshot: Optional[MemorySnapshot] = None
+    load_duration: float = 0
+    source_key: Any = None
+    diff_reload = False
+    last_diff: Optional[SnapshotDiff] = None
+    _loaded_at: float = 0
+    _version = 0
+
+    def __init__(self):
+        super().__init__()
+        self._load_lock = threading.RLock()
 
     def get_queryset(self):
         """Get a new QuerySet object.
@@ -29,19 +69,166 @@ class MemoryBaseManager(BaseManager, metaclass=abc.ABCMeta):
         Subclasses can override this method to
         easily customize the behavior of the Manager.
         """
-        return self._queryset_class(model=self.model, get_all=self.get_all)
+        return self._queryset_class(
+            model=self.model,
+            get_all=self.get_snapshot,
+            aget_all=self.aget_snapshot,
+            write=self.write
+        )
+
+    @property
+    def version(self) -> int:
+        """Return the version of the data, increased each time new data is loaded."""
+        return self._version
+
+    def get_snapshot(self) -> MemorySnapshot:
+        """Return the cached get_all data with its indexes, load it if needed."""
+        snapshot = self._snapshot
+        if snapshot is None or self.is_expired() or self.is_stale(snapshot):
+            snapshot = self._reload(snapshot)
+        return snapshot
+
+    def _reload(self, snapshot: Optional[MemorySnapshot]) -> MemorySnapshot:
+        with self._load_lock:
+            current = self._snapshot
+            # Already loaded by another thread while waiting for the lock
+            if current is None or current is snapshot:
+                current = self._load()
+            return current
+
+    def get_source_key(self) -> Any:
+        """
+        Return a key of the state of the data source, like its modification time.
+
+        The key is stored in the snapshot file (see. snapshot_path), which is read again only
+        with the same key. Override this method when the source can change.
+        """
+        return None
+
+    async def aget_snapshot(self) -> MemorySnapshot:
+        """
+        Return the cached data as get_snapshot, load it with aget_all if needed.
+
+        aget_all is awaited without the lock of the loads, the snapshot is replaced with it:
+        a snapshot loaded by a thread meanwhile is kept.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self.is_expired() or self.is_stale(snapshot):
+            snapshot = await self._aload(snapshot)
+        return snapshot
+
+    def _load(self) -> MemorySnapshot:
+        start = time.perf_counter()
+        source_key = self.get_source_key()
+        if self.snapshot_path is not None:
+            snapshot = self._load_snapshot_file(source_key)
+        else:
+            snapshot = self._get_rows_snapshot(self.get_all())
+        return self._set_snapshot(snapshot, source_key, start)
+
+    async def _aload(self, snapshot: Optional[MemorySnapshot]) -> MemorySnapshot:
+        if self.snapshot_path is not None:
+            return await asyncio.get_event_loop().run_in_executor(None, self._reload, snapshot)
+        start = time.perf_counter()
+        source_key = self.get_source_key()
+        rows = await self.aget_all()
+        with self._load_lock:
+            current = self._snapshot
+            # Already loaded by a thread or another task while awaiting aget_all
+            if current is not None and current is not snapshot:
+                return current
+            return self._set_snapshot(self._get_rows_snapshot(rows), source_key, start)
+
+    def _get_rows_snapshot(self, rows) -> MemorySnapshot:
+        snapshot = self._snapshot
+        # Keep the snapshot, and its indexes, as long as get_all return the same list
+        if snapshot is None or not snapshot.is_source(rows):
+            self._version += 1
+            reloaded = None
+            if self.diff_reload and snapshot is not None:
+                reloaded = snapshot.reloaded(rows, self._version)
+            if reloaded is None:
+                snapshot = self.snapshot_class(self.model, rows, version=self._version)
+                self.last_diff = None
+            else:
+                snapshot, self.last_diff = reloaded
+        return snapshot
+
+    def _set_snapshot(self, snapshot: MemorySnapshot, source_key: Any, start: float) \
+            -> MemorySnapshot:
+        self._snapshot = snapshot
+        self.source_key = source_key
+        self._loaded_at = time.monotonic()
+        self.load_duration = time.perf_counter() - start
+        return snapshot
+
+    def _load_snapshot_file(self, source_key: Any) -> MemorySnapshot:
+        self._version += 1
+        path = self.snapshot_path
+        snapshot = MemoryMappedSnapshot.open(self.model, path, source_key, self._version)
+        if snapshot is None:
+            rows = self.get_all()
+            dump_snapshot(self.snapshot_class(self.model, rows), path, source_key)
+            snapshot = MemoryMappedSnapshot(self.model, path, self._version)
+        return snapshot
+
+    def write(self, change: Callable[[MemorySnapshot, int], MemorySnapshot]) -> MemorySnapshot:
+        """
+        Replace the snapshot by change(snapshot, version), the snapshot with the changes.
+
+        Used by the querysets create, update... methods. The changes are lost when new data
+        is loaded from get_all.
+        """
+        with self._load_lock:
+            snapshot = self.get_snapshot()
+            snapshot = change(snapshot, self._version + 1)
+            self._version += 1
+            self._snapshot = snapshot
+            return snapshot
+
+    def is_expired(self) -> bool:
+        """Return True if the snapshot is older than cache_timeout."""
+        if self.cache_timeout is None:
+            return False
+        return time.monotonic() - self._loaded_at >= self.cache_timeout
+
+    def is_stale(self, snapshot: MemorySnapshot) -> bool:
+        """
+        Return True if the data source changed since the snapshot was loaded.
+
+        Override this method to reload the data when the source change.
+        """
+        return False
+
+    def invalidate(self):
+        """Drop the snapshot, the data will be loaded again on the next query."""
+        self._snapshot = None
+
+    def refresh(self) -> MemorySnapshot:
+        """Load the data again."""
+        self.invalidate()
+        return self.get_snapshot()
 
     @abc.abstractmethod
     def get_all(self):
         """Return a list with all the data."""
 
+    async def aget_all(self):
+        """
+        Return a list with all the data, used by the async methods of the querysets.
+
+        Call get_all in the default executor by default, override it to load the data
+        with asynchronous I/O. Not used with a snapshot_path.
+        """
+        return await asyncio.get_event_loop().run_in_executor(None, self.get_all)
+
 
 class MemoryManager(
     MemoryBaseManager.from_queryset(MemoryQuerySet), metaclass=abc.ABCMeta
 ):  # type: ignore
     """Manager for MemoryQueryset.
 
-    should implement the get_all method which should be cached.
+    should implement the get_all method.
     """
 
     @abc.abstractmethod
@@ -49,7 +236,7 @@ class MemoryManager(
         """
         Return a list with all the data.
 
-        Could/should be cached (see. functools.lru_cache)
+        The result is cached by the manager (see. cache_timeout).
         """
 
 
@@ -62,8 +249,9 @@ class MemoryBaseRelatedManager(MemoryBaseManager):
         self.model = model
 
     def add(self, *objects, bulk=False):
-        """Add objects to the manager."""
-        self._all += objects
+        """Add objects to the manager, in a new list: the loaded snapshot is not modified."""
+        self._all = self._all + list(objects)
+        self.invalidate()
 
     def get_all(self):
         """Get all fields for the manager."""
@@ -14,10 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import abc
-from typing import Iterable, List, Mapping, Optional, Type, TypeVar, Union
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Type, TypeVar, Union
 
 from memory_db.models import MemoryModel
 from memory_db.query import MemoryQuerySet
+from memory_db.snapshot import MemorySnapshot, SnapshotDiff
 
 _Tco = TypeVar("_Tco", bound=MemoryModel, covariant=True)
 _T = TypeVar("_T", bound=MemoryModel)
@@ -28,14 +29,57 @@ class MemoryBaseManager(MemoryQuerySet[_Tco], metaclass=abc.ABCMeta):
 
     name: str = ...
     model: Type[_Tco] = ...
+    snapshot_class: Type[MemorySnapshot] = ...
+    cache_timeout: Optional[float] = ...
+    snapshot_path: Optional[str] = ...
+    load_duration: float = ...
+    source_key: Any = ...
+    diff_reload: bool = ...
+    last_diff: Optional[SnapshotDiff] = ...
+
+    def __init__(self) -> None:
+        ...
 
     def get_queryset(self) -> MemoryQuerySet[_Tco]:
         ...
 
+    @property
+    def version(self) -> int:
+        ...
+
+    def get_snapshot(self) -> MemorySnapshot[_Tco]:
+        ...
+
+    async def aget_snapshot(self) -> MemorySnapshot[_Tco]:
+        ...
+
+    def get_source_key(self) -> Any:
+        ...
+
+    def is_expired(self) -> bool:
+        ...
+
+    def is_stale(self, snapshot: MemorySnapshot[_Tco]) -> bool:
+        ...
+
+    def write(
+        self, change: Callable[[MemorySnapshot[_Tco], int], MemorySnapshot[_Tco]]
+    ) -> MemorySnapshot[_Tco]:
+        ...
+
+    def invalidate(self) -> None:
+        ...
+
+    def refresh(self) -> MemorySnapshot[_Tco]:
+        ...
+
     @abc.abstractmethod
     def get_all(self) -> Iterable[_Tco]:
         ...
 
+    async def aget_all(self) -> Iterable[_Tco]:
+        ...
+
     @classmethod
     def from_queryset(
         cls,
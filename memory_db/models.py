@@ -13,14 +13,20 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import collections
 import inspect
-from typing import Dict, Type
+import itertools
+import os
+from concurrent.futures import Executor
+from types import MemberDescriptorType
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Type
 
-from django.core.checks.messages import Error
+from django.core.checks.messages import CheckMessage, Error
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist, ValidationError
 from django.db.models.fields import CharField, Field
 
 from .options import MemoryMeta
+from .utils import compile_row_converter
 
 
 class MemoryModelBase(type):
@@ -36,16 +42,56 @@ class MemoryModelBase(type):
         meta_class = attrs.pop('Meta', None)
         if not meta_class:
             raise ImproperlyConfigured(f'Add Meta class to {name}')
+        if not issubclass(meta_class, MemoryMeta):
+            raise ImproperlyConfigured(f"{name}'s Meta class is not a MemoryMeta")
+        if meta_class.slots:
+            mcs._add_slots(bases, attrs, meta_class)
         new_class: Type[MemoryModelBase] = \
             super(MemoryModelBase, mcs).__new__(mcs, name, bases, attrs)
         for attr in attrs.values():
             if not inspect.isclass(attr) and hasattr(attr, 'model'):
                 attr.model = new_class
-        if not issubclass(meta_class, MemoryMeta):
-            raise ImproperlyConfigured(f"{name}'s Meta class is not a MemoryMeta")
         setattr(new_class, '_meta', meta_class(new_class, name))
         return new_class
 
+    @staticmethod
+    def _add_slots(bases, attrs: dict, meta_class: Type[MemoryMeta]):
+        """
+        Add the fields attnames to the class __slots__ and generate its __init__.
+
+        The attributes already defined by the base classes slots are not added again.
+        """
+        attnames = [field.get_attname() for field in meta_class.fields]
+        slots = list(attrs.get('__slots__', ()))
+        for attname in attnames:
+            if attname not in slots and not any(
+                isinstance(getattr(base, attname, None), MemberDescriptorType) for base in bases
+            ):
+                slots.append(attname)
+        attrs['__slots__'] = tuple(slots)
+        if '__init__' not in attrs:
+            pk = getattr(meta_class, 'pk', None)
+            attrs['__init__'] = _slots_init(attnames, pk.get_attname() if pk else None)
+
+
+def _slots_init(attnames: Iterable[str], pk_attname: Optional[str]) -> Callable[..., None]:
+    """
+    Generate the __init__ method of a model with __slots__.
+
+    The generated method set each field attribute without looping over the Meta.fields.
+    """
+    lines = ['def __init__(self, **kwargs):']
+    if pk_attname is not None:
+        lines += [
+            "    if 'pk' in kwargs:",
+            f'        kwargs[{pk_attname!r}] = kwargs.pop(\'pk\')',
+        ]
+    lines.append('    get = kwargs.get')
+    lines += [f'    self.{attname} = get({attname!r})' for attname in attnames]
+    namespace: Dict[str, Callable[..., None]] = {}
+    exec('\n'.join(lines), namespace)  # nosec
+    return namespace['__init__']
+
 
 class MemoryModel(metaclass=MemoryModelBase):
     """MemoryModel is a dictionary.
@@ -59,6 +105,8 @@ class MemoryModel(metaclass=MemoryModelBase):
     mixing with a MemoryManager to load the data and treat it as a standard QuerySet
     """
 
+    __slots__ = ()
+
     _meta: MemoryMeta
 
     def __init__(self, **kwargs):
@@ -73,8 +121,13 @@ class MemoryModel(metaclass=MemoryModelBase):
         super().__init__()
 
     def __hash__(self):
-        """Model hash."""
-        return hash(tuple(self.__dict__.items()))
+        """Hash the primary key, or the Meta.fields values of the objects without one."""
+        pk = self._meta.pk
+        if pk is not None:
+            value = getattr(self, pk.get_attname())
+            if value is not None:
+                return hash(value)
+        return hash(tuple(getattr(self, field.get_attname()) for field in self._meta.fields))
 
     def __getattr__(self, key):
         """Item getter."""
@@ -90,24 +143,33 @@ class MemoryModel(metaclass=MemoryModelBase):
 
         Basically map row[field.db_name] to init_kwargs[field.name]
         """
-        kwargs = {}
-        errors: Dict[str, ValidationError] = {}
-        for field in cls._meta.fields:
-            attname = field.get_attname()
-            column = field.db_column or attname
-            if column is not None:
-                value = row.get(column, field.get_default())
-                if field.blank and value == '':
-                    value = field.get_default()
-                else:
-                    try:
-                        value = field.to_python(value)
-                    except ValidationError as exc:
-                        errors[field.name] = exc
-                kwargs[attname] = value
-        if errors:
-            raise ValidationError(errors)
-        return cls(**kwargs)
+        return cls(**cls._meta.row_converter(row))
+
+    @classmethod
+    def from_db_many(
+        cls,
+        rows: Iterable[dict],
+        errors: Optional[Dict[int, ValidationError]] = None
+    ) -> Iterator['MemoryModel']:
+        """
+        Load models from rows data, as from_db.
+
+        The rows converter is compiled once, the conversions of the repeated dates, decimals...
+        are kept in a memo.
+
+        With an errors dict, the invalid rows are skipped and their ValidationError stored by
+        row index. Otherwise the first invalid row raise its ValidationError.
+        """
+        convert = compile_row_converter(cls._meta.fields, memoize=True)
+        for index, row in enumerate(rows):
+            try:
+                kwargs = convert(row)
+            except ValidationError as exc:
+                if errors is None:
+                    raise
+                errors[index] = exc
+            else:
+                yield cls(**kwargs)
 
     @classmethod
     def check_data(cls, row: Dict[str, str]):
@@ -141,7 +203,86 @@ class MemoryModel(metaclass=MemoryModelBase):
                     )
         return errors
 
+    @classmethod
+    def check_data_many(
+        cls,
+        rows: Iterable[Dict[str, str]],
+        *,
+        chunk_size: int = 1000,
+        max_errors: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> Iterator[CheckMessage]:
+        """
+        Check the data of the rows, as check_data, and loop over the errors.
+
+        The rows are checked by chunks, in the executor processes (or threads) when given.
+        The errors objects start with the row number (from 1) and the rows are no more read
+        after max_errors errors.
+        """
+        iterator = iter(rows)
+        chunks = iter(lambda: list(itertools.islice(iterator, chunk_size)), [])
+        if executor is None:
+            results = (_check_chunk(cls, start, chunk) for start, chunk in _numbered(chunks))
+        else:
+            results = _submitted(executor, cls, chunks)
+        if max_errors is not None:
+            results = _limited(results, max_errors)
+        for errors in results:
+            yield from errors
+
     class Meta(MemoryMeta):
         """Meta data."""
 
         pk: Field = CharField(name='key')
+
+
+def _numbered(chunks: Iterable[List[Dict[str, str]]]) -> Iterator[tuple]:
+    """Loop over the chunks with the number of their first row."""
+    start = 1
+    for chunk in chunks:
+        yield start, chunk
+        start += len(chunk)
+
+
+def _check_chunk(model: Type[MemoryModel], start: int, rows: List[Dict[str, str]]) \
+        -> List[CheckMessage]:
+    """Check the data of the rows, add the row number to the errors objects."""
+    return [
+        type(error)(error.msg, hint=error.hint, obj=f'row {number}, {error.obj}', id=error.id)
+        for number, row in enumerate(rows, start) for error in model.check_data(row)
+    ]
+
+
+def _submitted(
+    executor: Executor, model: Type[MemoryModel], chunks: Iterable[List[Dict[str, str]]]
+) -> Iterator[List[CheckMessage]]:
+    """
+    Check the chunks in the executor, loop over the results in the rows order.
+
+    Only two chunks by processor are submitted in advance, the rows are read as the results
+    are consumed. The pending chunks are cancelled when the loop is stopped.
+    """
+    pending: Deque = collections.deque()
+    numbered = _numbered(chunks)
+    try:
+        for start, chunk in itertools.islice(numbered, 2 * (os.cpu_count() or 1)):
+            pending.append(executor.submit(_check_chunk, model, start, chunk))
+        while pending:
+            yield pending.popleft().result()
+            for start, chunk in itertools.islice(numbered, 1):
+                pending.append(executor.submit(_check_chunk, model, start, chunk))
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _limited(results: Iterable[List[CheckMessage]], max_errors: int) \
+        -> Iterator[List[CheckMessage]]:
+    """Stop the results after max_errors errors."""
+    if max_errors <= 0:
+        return
+    for errors in results:
+        yield errors[:max_errors]
+        max_errors -= len(errors)
+        if max_errors <= 0:
+            return
@@ -13,10 +13,11 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from typing import Any, Dict, Iterable, Type, TypeVar
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterable, Iterator, Optional, Type, TypeVar
 
 from django.core.checks.messages import CheckMessage
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 
 from memory_db.manager import MemoryBaseManager
 from memory_db.options import MemoryMeta
@@ -43,6 +44,25 @@ class MemoryModel(metaclass=MemoryModelBase):
     def from_db(cls: Type[_T], row: Dict[str, Any]) -> _T:
         ...
 
+    @classmethod
+    def from_db_many(
+        cls: Type[_T],
+        rows: Iterable[Dict[str, Any]],
+        errors: Optional[Dict[int, ValidationError]] = ...
+    ) -> Iterator[_T]:
+        ...
+
     @classmethod
     def check_data(cls, row: Dict[str, str]) -> Iterable[CheckMessage]:
         ...
+
+    @classmethod
+    def check_data_many(
+        cls,
+        rows: Iterable[Dict[str, str]],
+        *,
+        chunk_size: int = ...,
+        max_errors: Optional[int] = ...,
+        executor: Optional[Executor] = ...
+    ) -> Iterator[CheckMessage]:
+        ...
@@ -13,11 +13,16 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from collections import defaultdict
 from typing import Iterable, Type
 
 from cached_property import cached_property
 from django.core.exceptions import FieldDoesNotExist
 from django.db.models.fields import Field
+from django.db.models.manager import BaseManager
+
+from .indexes import HashIndex, SortedIndex
+from .utils import compile_row_converter
 
 
 class MemoryMetaBase(type):
@@ -44,8 +49,12 @@ class MemoryMeta(metaclass=MemoryMetaBase):
 
     pk: Field
     fields: Iterable[Field] = ()
+    indexes: Iterable[str] = ()
+    sorted_indexes: Iterable[str] = ()
+    slots: bool = False
 
     def __init__(self, cls, name):
+        self.model = cls
         self.object_name = cls.__name__
         self.model_name = name
 
@@ -64,6 +73,63 @@ class MemoryMeta(metaclass=MemoryMetaBase):
                 pass
         return res
 
+    @cached_property
+    def indexed_fields(self):
+        """
+        Return the attnames of the fields with a hash index.
+
+        The primary key and the unique fields are always indexed, more fields can be added
+        with the Meta.indexes field names list.
+        """
+        fields = [field for field in self.fields if field.unique]
+        fields += [self.get_field(field_name) for field_name in self.indexes]
+        if self.pk is not None:
+            fields.append(self.pk)
+        return frozenset(field.get_attname() for field in fields)
+
+    @cached_property
+    def sorted_indexed_fields(self):
+        """Return the attnames of the fields with a sorted index (see. Meta.sorted_indexes)."""
+        return frozenset(
+            self.get_field(field_name).get_attname() for field_name in self.sorted_indexes
+        )
+
+    @cached_property
+    def index_classes(self):
+        """Return the index classes of each indexed field attname."""
+        index_classes = defaultdict(list)
+        for attname in self.indexed_fields:
+            index_classes[attname].append(HashIndex)
+        for attname in self.sorted_indexed_fields:
+            index_classes[attname].append(SortedIndex)
+        return dict(index_classes)
+
+    @cached_property
+    def row_converter(self):
+        """Return the converter of the rows data to the model init keyword arguments."""
+        return compile_row_converter(self.fields)
+
+    @cached_property
+    def default_manager(self):
+        """Return the first manager of the model class attributes, None without manager."""
+        for klass in self.model.__mro__:
+            for attr in vars(klass).values():
+                if isinstance(attr, BaseManager):
+                    return attr
+        return None
+
+    def get_statistics(self, field_name):
+        """
+        Return the statistics of the field values in the data of the default manager.
+
+        See. FieldStatistics: the count, the nulls count, the distinct count, the minimum, the
+        maximum and the most common values. Return None when they can't be collected.
+        """
+        field = self.get_field(field_name)
+        if self.default_manager is None:
+            return None
+        return self.default_manager.get_snapshot().get_statistics(field.name)
+
     def get_field(self, field_name):
         """Return a field instance given the name of a forward or reverse field."""
         try:
@@ -13,11 +13,14 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from typing import Dict, Iterable
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Type
 
 from django.db.models.fields import Field
 
+from memory_db.indexes import MemoryIndex
+from memory_db.manager import MemoryBaseManager
 from memory_db.models import MemoryModel
+from memory_db.statistics import FieldStatistics
 
 # isort don't treat this file properly.
 
@@ -27,6 +30,10 @@ class MemoryMeta:
 
     pk: Field = ...
     fields: Iterable[Field] = ...
+    indexes: Iterable[str] = ...
+    sorted_indexes: Iterable[str] = ...
+    slots: bool = ...
+    model: Type[MemoryModel] = ...
     object_name: str = ...
     model_name: str = ...
 
@@ -36,5 +43,28 @@ class MemoryMeta:
     def fields_map(self) -> Dict[str, Field]:
         ...
 
+    @property
+    def indexed_fields(self) -> FrozenSet[str]:
+        ...
+
+    @property
+    def sorted_indexed_fields(self) -> FrozenSet[str]:
+        ...
+
+    @property
+    def index_classes(self) -> Dict[str, List[Type[MemoryIndex]]]:
+        ...
+
+    @property
+    def row_converter(self) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        ...
+
+    @property
+    def default_manager(self) -> Optional[MemoryBaseManager]:
+        ...
+
+    def get_statistics(self, field_name: str) -> Optional[FieldStatistics]:
+        ...
+
     def get_field(self, field_name: str) -> Field:
         ...
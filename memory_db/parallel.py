@@ -0,0 +1,79 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Filters evaluated by partitions in a process pool.
+
+The workers are forked after the snapshot and the lookups are registered in the _scans
+global: they inherit them and only the partitions bounds and the matching positions are
+sent between the processes.
+"""
+import itertools
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .lookups import Condition
+    from .snapshot import MemorySnapshot
+
+_scans: Dict[int, Tuple['MemorySnapshot', Sequence[int], List['Condition'], bool]] = {}
+_scan_ids = itertools.count()
+
+
+def _scan_partition(scan_id: int, start: int, stop: int) -> List[int]:
+    """Return the positions of the partition matching the lookups, run in the workers."""
+    snapshot, positions, lookups, negated = _scans[scan_id]
+    return list(snapshot.filter(positions[start:stop], lookups, negated))
+
+
+def parallel_filter(
+    snapshot: 'MemorySnapshot',
+    positions: Iterable[int],
+    lookups: List['Condition'],
+    negated: bool,
+    workers: Optional[int] = None,
+    partition_size: int = 10000
+) -> Iterable[int]:
+    """
+    Filter the positions by partitions of partition_size in a pool of forked workers.
+
+    The positions of each partition are merged in order. Less than two partitions, a
+    platform without fork or Python 3.6 (no mp_context) are filtered in the current process.
+    """
+    if not isinstance(positions, (list, range)):
+        positions = list(positions)
+    if (
+        len(positions) <= partition_size or workers == 1 or sys.version_info < (3, 7)
+        or 'fork' not in multiprocessing.get_all_start_methods()
+    ):
+        return snapshot.filter(positions, lookups, negated)
+    if snapshot.get_rank(positions) is not None:
+        # Collect the statistics ordering the lookups once, not in each worker
+        for lookup in lookups:
+            snapshot.selectivity(lookup)
+    scan_id = next(_scan_ids)
+    _scans[scan_id] = (snapshot, positions, lookups, negated)
+    try:
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(_scan_partition, scan_id, start, start + partition_size)
+                for start in range(0, len(positions), partition_size)
+            ]
+            return [position for future in futures for position in future.result()]
+    finally:
+        del _scans[scan_id]
@@ -13,14 +13,21 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
+import copy
+import functools
 import itertools
-import operator
-from typing import Any, Callable, Dict, Generator, Generic, Iterable, Iterator, List, Optional, \
-    Tuple, Type, TYPE_CHECKING, TypeVar
+from typing import Any, AsyncIterator, Callable, Collection, Dict, Generic, Iterable, List, \
+    Optional, Sequence, Set, Tuple, Type, TYPE_CHECKING, TypeVar
 
-from django.core.exceptions import FieldDoesNotExist, MultipleObjectsReturned
+from django.core.exceptions import MultipleObjectsReturned
+from django.db import IntegrityError, NotSupportedError
+from django.db.models import F, Q, Value
 
-from memory_db.functions import MEMORY_FUNCTIONS
+from memory_db.aggregates import MemoryAggregate
+from memory_db.lookups import compile_q, Condition, MemoryLookup, resolve_path
+from memory_db.parallel import parallel_filter
+from memory_db.snapshot import MemorySnapshot
 
 if TYPE_CHECKING:
     from .models import MemoryModel
@@ -33,7 +40,23 @@ class MemoryQuery:
 
     def __init__(self):
         self.order_by: List[str] = []
-        self.filters: List[Tuple[bool, Dict[str, Any]]] = []
+        self.filters: List[Tuple[bool, Q]] = []
+        self.annotations: List[str] = []
+        self.distinct = False
+        self.distinct_fields: Tuple[str, ...] = ()
+
+    def clone(self) -> 'MemoryQuery':
+        """Return a copy of the query."""
+        clone = self.__class__()
+        clone.order_by = self.order_by[:]
+        clone.filters = self.filters[:]
+        clone.annotations = self.annotations[:]
+        clone.distinct = self.distinct
+        clone.distinct_fields = self.distinct_fields
+        return clone
+
+
+Operation = Callable[[MemorySnapshot, Sequence[int]], Iterable[int]]
 
 
 class MemoryQuerySet(Generic[_Tco]):
@@ -42,38 +65,46 @@ class MemoryQuerySet(Generic[_Tco]):
 
     Retrieve the data from the model self.model.objects.get_all() method.
     This method should return a list of object containing the objects to filter.
-    Also, it [c|sh]ould be cached (see. functools.lru_cache)
+    The managers cache it in a snapshot (see. MemoryBaseManager.get_snapshot)
+
+    Each filter, order_by... return a new queryset applying its operation on the
+    positions of the objects of its parent queryset. When the parent is already evaluated,
+    the operation is applied on the parent result.
+
+    The async methods (async for, afirst...) give back the control to the event loop each
+    async_chunk_size scanned objects.
     """
 
     query_class: Type[MemoryQuery] = MemoryQuery
+    async_chunk_size = 1000
 
-    def __init__(self, model=None, get_all=None):
+    def __init__(self, model=None, get_all=None, aget_all=None, write=None):
         """
         Initialize the model to retrieve the data to.
 
-        The _iterator is the current state the queryset. It might be a list, a
-        filtered, an ordered or a islice
-
         get_all: the method to call to get_all data
+        aget_all: the coroutine function to await to get_all data in the async methods
+        write: the method to call to change the data (see. MemoryBaseManager.write)
         """
         self.model = model
         self.object_name = model.__name__
         self.get_all = get_all
+        self.aget_all = aget_all
+        self.write = write
         self.query = self.query_class()
-        self._iterator: Optional[Iterator] = None
-        self._fields: List[str] = []
+        self._fields: Sequence[str] = []
         self._iterable_method = self._model_iterable
-        self._result_cache = None
+        self._result_cache: Optional[List[Any]] = None
+        self._positions_cache: Optional[Sequence[int]] = None
+        self._snapshot: Optional[MemorySnapshot] = None
+        self._parent: Optional[MemoryQuerySet] = None
+        self._operation: Optional[Operation] = None
+        self._parallel: Optional[Dict[str, Any]] = None
 
     __init__.queryset_only = False
 
     def __iter__(self):
-        """
-        Loop over the current iterator.
-
-        Note: Once started the iterator is changed you may want to make a deepcopy
-        of the queryset
-        """
+        """Loop over the result."""
         self._fetch_all()
         return iter(self._result_cache)
 
@@ -83,7 +114,7 @@ class MemoryQuerySet(Generic[_Tco]):
         """
         Return the len of the current filtered list.
 
-        Note: This method create a list from the current iterator state.
+        Note: This method evaluate the queryset.
         """
         self._fetch_all()
         return len(self._result_cache)
@@ -91,8 +122,103 @@ class MemoryQuerySet(Generic[_Tco]):
     __len__.queryset_only = False
 
     def count(self):
-        """Return the count of element in the filtered list."""
-        return len(self)
+        """
+        Return the count of element in the filtered list.
+
+        The objects are counted without evaluating the queryset.
+        """
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        positions = self._positions()
+        if isinstance(positions, (list, range)):
+            return len(positions)
+        return sum(1 for _ in positions)
+
+    def aggregate(self, *args, **kwargs) -> Dict[str, Any]:
+        """
+        Return a dict of the aggregates values of the objects, by alias.
+
+        The Count, Sum, Avg, Min, Max, StdDev and Variance aggregates of the fields, with
+        their distinct, filter and default arguments, are computed in a single pass over the
+        objects (see. MemorySnapshot.aggregate).
+        """
+        kwargs.update(_default_aliases(args))
+        aggregates = {}
+        for alias, expression in kwargs.items():
+            if not getattr(expression, 'contains_aggregate', False):
+                raise TypeError(f'{alias} is not an aggregate expression')
+            aggregates[alias] = MemoryAggregate(self.model, expression)
+        return self._get_snapshot().aggregate(self._positions(), aggregates)
+
+    def annotate(self, *args, **kwargs):
+        """
+        Add the values of expressions to the objects, as attributes named by their aliases.
+
+        The expressions are F() of the fields, Value() and the aggregates of aggregate().
+        After values() or values_list(), the objects are grouped by the selected values and the
+        F() values, the aggregates are computed by group in a single pass over the objects
+        (see. MemorySnapshot.group), and the aliases are added to the selected values.
+        Otherwise, the aggregates are computed on each object.
+
+        The annotated objects are copies, the next filters and orderings can use the aliases.
+        The annotated QuerySet is read only.
+        """
+        annotations = dict(_default_aliases(args), **kwargs)
+        if self.model._meta.slots:
+            raise NotSupportedError(f'{self.object_name} objects with slots can not be annotated')
+        aggregates = {}
+        columns = {}
+        constants = {}
+        for alias, expression in annotations.items():
+            if alias in self.model._meta.fields_map:
+                raise ValueError(f"The annotation '{alias}' conflicts with a field on the model.")
+            if getattr(expression, 'contains_aggregate', False):
+                aggregates[alias] = MemoryAggregate(self.model, expression)
+            elif isinstance(expression, F):
+                columns[alias] = resolve_path(self.model, expression.name)[0]
+            elif isinstance(expression, Value):
+                constants[alias] = expression.value
+            else:
+                raise NotSupportedError(f'{alias} expression {expression!r} is not supported')
+        paths = None
+        if aggregates and self._fields:
+            paths = [self._path(field) for field in self._fields]
+            paths.extend(path for path in columns.values() if path not in paths)
+        clone = self._clone()
+        clone._parent = None
+        clone._operation = None
+        clone.get_all = functools.partial(self._annotated, paths, aggregates, columns, constants)
+        clone.aget_all = None
+        clone.write = None
+        clone.query.annotations.extend(annotations)
+        if self._fields:
+            clone._fields = tuple(self._fields) + tuple(annotations)
+        return clone
+
+    def _annotated(
+        self,
+        paths: Optional[List[str]],
+        aggregates: Dict[str, MemoryAggregate],
+        columns: Dict[str, str],
+        constants: Dict[str, Any],
+    ) -> MemorySnapshot:
+        """Return a snapshot of the annotated copies of the objects, or of a group object."""
+        snapshot = self._get_snapshot()
+        positions = self._positions()
+        if aggregates:
+            groups = snapshot.group(positions, paths, aggregates)
+        else:
+            groups = [(position, {}) for position in positions]
+        getters = [(alias, snapshot.value_getter(path)) for alias, path in columns.items()]
+        rows = []
+        for position, values in groups:
+            obj = copy.copy(snapshot[position])
+            for alias, getter in getters:
+                setattr(obj, alias, getter(position))
+            for alias, value in itertools.chain(constants.items(), values.items()):
+                setattr(obj, alias, value)
+            rows.append(obj)
+        return MemorySnapshot(self.model, rows)
 
     def __getitem__(self, key):
         """
@@ -103,15 +229,16 @@ class MemoryQuerySet(Generic[_Tco]):
         self[int]: retrieve the nth element of the iterator
         self[str]: equal to self.filter(pk=str)[0]
         """
-        self._fetch_all()
         if isinstance(key, slice):
-            start = key.start if key.start >= 0 else max(0, len(self._result_cache) + key.start)
-            stop = key.stop if key.start >= 0 else max(0, len(self._result_cache) + key.stop)
-            step = key.step
-            self._iterator = itertools.islice(self._result_cache, start, stop, step)
-            self._result_cache = None
-            return self
+            start = key.start or 0
+            stop = key.stop if start >= 0 else None
+            return self._top(stop)._chain(functools.partial(_slice_operation, key))
         if isinstance(key, int):
+            if key >= 0 and self._result_cache is None:
+                for result in itertools.islice(self._results(), key, None):
+                    return result
+                raise self.model.DoesNotExist(self.query)
+            self._fetch_all()
             try:
                 return self._result_cache[key]
             except IndexError:
@@ -129,44 +256,228 @@ class MemoryQuerySet(Generic[_Tco]):
 
     def __reversed__(self):
         """Reverse the result."""
-        self._fetch_all()
-        self.query.order_by.append((True, None))
-        self._iterator = reversed(self._result_cache)
-        self._result_cache = None
-        return self
+        clone = self._chain(_reversed_operation)
+        clone.query.order_by.append((True, None))
+        return clone
 
     __reversed__.queryset_only = False
 
+    def _clone(self):
+        """Return a copy of the queryset, without its result."""
+        clone = self.__class__(
+            model=self.model, get_all=self.get_all, aget_all=self.aget_all, write=self.write
+        )
+        clone.query = self.query.clone()
+        clone._fields = self._fields
+        clone._iterable_method = getattr(clone, self._iterable_method.__name__)
+        clone._parent = self._parent
+        clone._operation = self._operation
+        clone._parallel = self._parallel
+        return clone
+
+    def _chain(self, operation: Optional[Operation]):
+        """Return a new queryset applying the operation on the positions of this one."""
+        clone = self._clone()
+        clone._parent = self
+        clone._operation = operation
+        return clone
+
+    def _top(self, stop: Optional[int]):
+        """
+        Return the queryset to slice up to stop.
+
+        An order_by() not evaluated yet is replaced by an ordering keeping only the first stop
+        objects (see. MemorySnapshot.order).
+        """
+        operation = self._operation
+        if (
+            stop is None or stop < 0 or self._result_cache is not None
+            or not isinstance(operation, functools.partial)
+            or operation.func is not _order_by_operation
+        ):
+            return self
+        clone = self._clone()
+        clone._operation = functools.partial(_order_by_operation, *operation.args, limit=stop)
+        return clone
+
+    def _get_snapshot(self) -> MemorySnapshot:
+        """Return the data of the queryset, the same for a queryset and all its children."""
+        if self._parent is not None:
+            return self._parent._get_snapshot()
+        if self._snapshot is None:
+            snapshot = self.get_all()
+            if not isinstance(snapshot, MemorySnapshot):
+                snapshot = MemorySnapshot(self.model, snapshot)
+            self._snapshot = snapshot
+        return self._snapshot
+
+    async def _aget_snapshot(self) -> MemorySnapshot:
+        """Return the data of the queryset as _get_snapshot, awaiting aget_all to load it."""
+        if self._parent is not None:
+            return await self._parent._aget_snapshot()
+        if self._snapshot is None and self.aget_all is not None:
+            snapshot = await self.aget_all()
+            if not isinstance(snapshot, MemorySnapshot):
+                snapshot = MemorySnapshot(self.model, snapshot)
+            self._snapshot = snapshot
+        return self._get_snapshot()
+
+    def _positions(self) -> Iterable[int]:
+        """Return the positions of the objects of the queryset in the snapshot."""
+        if self._positions_cache is not None:
+            return self._positions_cache
+        if self._parent is None:
+            return self._get_snapshot().all_positions()
+        positions = self._parent._positions()
+        if self._operation is None:
+            return positions
+        return self._operation(self._get_snapshot(), positions)
+
+    async def _apositions(self) -> AsyncIterator[List[int]]:
+        """
+        Loop over the positions of the objects by chunks, yielding to the event loop.
+
+        The filters are evaluated on chunks of async_chunk_size positions. The operations
+        after the first order_by, slice... are applied on all the filtered positions.
+        """
+        snapshot = await self._aget_snapshot()
+        operations: List[Operation] = []
+        queryset = self
+        while queryset._parent is not None and queryset._positions_cache is None:
+            if queryset._operation is not None:
+                operations.insert(0, queryset._operation)
+            queryset = queryset._parent
+        positions = queryset._positions()
+        scans = list(itertools.takewhile(_is_scan, operations))
+        operations = operations[len(scans):]
+        if scans and snapshot.is_all(positions):
+            lookups, negated = scans[0].args  # type: ignore
+            candidates = None if negated else snapshot.candidates(lookups)
+            if candidates is not None:
+                positions = candidates
+                if _is_indexed(lookups):
+                    del scans[0]
+        if scans:
+            size = self.async_chunk_size
+            iterator = iter(positions)
+            filtered = []
+            for chunk in iter(lambda: list(itertools.islice(iterator, size)), []):
+                for scan in scans:
+                    chunk = list(scan(snapshot, chunk))
+                if operations:
+                    filtered += chunk
+                else:
+                    yield chunk
+                await asyncio.sleep(0)
+            if not operations:
+                return
+            positions = filtered
+        for operation in operations:
+            positions = operation(snapshot, positions)
+        positions = list(positions)
+        for start in range(0, len(positions), self.async_chunk_size):
+            yield positions[start:start + self.async_chunk_size]
+            await asyncio.sleep(0)
+
+    async def __aiter__(self):
+        """Loop over the result without blocking the event loop on large scans."""
+        if self._result_cache is not None:
+            for index, result in enumerate(self._result_cache, 1):
+                yield result
+                if index % self.async_chunk_size == 0:
+                    await asyncio.sleep(0)
+            return
+        snapshot = await self._aget_snapshot()
+        async for positions in self._apositions():
+            chunk = self._clone()
+            chunk._parent = None
+            chunk._snapshot = snapshot
+            chunk._positions_cache = positions
+            for result in chunk._iterable_method():
+                yield result
+
     def _model_iterable(self):
         for values in self.iterator():
             yield values
 
+    def _value_getters(self) -> List[Callable[[int], Any]]:
+        """Create the getters of the fields values (`__` separated attributes path)."""
+        snapshot = self._get_snapshot()
+        return [snapshot.value_getter(self._path(field)) for field in self._fields]
+
+    def _path(self, field: str) -> str:
+        """Return the attribute path of a field name, or of an annotation alias."""
+        if field in self.query.annotations:
+            return field
+        return resolve_path(self.model, field)[0]
+
     def _values_iterable(self):
-        for values in self.iterator():
-            values = dict((field, self._get_value(values, field)[0]) for field in self._fields)
+        fields_getters = list(zip(self._fields, self._value_getters()))
+        for position in self._positions():
+            values = dict((field, getter(position)) for field, getter in fields_getters)
             yield values
 
     def _values_list_iterable(self):
-        for values in self.iterator():
-            values = tuple(self._get_value(values, field)[0] for field in self._fields)
+        getters = self._value_getters()
+        for position in self._positions():
+            values = tuple(getter(position) for getter in getters)
             yield values
 
     def _flat_values_list_iterable(self):
-        for values in self.iterator():
-            value = self._get_value(values, self._fields[0])[0]
+        getter = self._value_getters()[0]
+        for position in self._positions():
+            value = getter(position)
             yield value
 
+    def _results(self):
+        """Loop over the result, without evaluating the queryset."""
+        if self._result_cache is not None:
+            return iter(self._result_cache)
+        return self._iterable_method()
+
     def exists(self) -> bool:
         """Return True if the iterable contains at least one object."""
-        try:
-            next(iter(self))
+        if self._result_cache is not None:
+            return bool(self._result_cache)
+        for _ in self._positions():
             return True
-        except StopIteration:
-            return False
+        return False
 
     def first(self):
         """Return the first match or None."""
-        return next(iter(self), None)
+        return next(self._results(), None)
+
+    async def aexists(self) -> bool:
+        """Return True if the iterable contains at least one object, as exists."""
+        if self._result_cache is not None:
+            return bool(self._result_cache)
+        positions = self._apositions()
+        try:
+            async for chunk in positions:
+                if chunk:
+                    return True
+        finally:
+            await positions.aclose()
+        return False
+
+    async def acount(self) -> int:
+        """Return the count of element in the filtered list, as count."""
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        count = 0
+        async for chunk in self._apositions():
+            count += len(chunk)
+        return count
+
+    async def afirst(self):
+        """Return the first match or None, as first."""
+        results = self.__aiter__()
+        try:
+            async for result in results:
+                return result
+        finally:
+            await results.aclose()
+        return None
 
     def last(self):
         """Return the first match or None."""
@@ -179,9 +490,10 @@ class MemoryQuerySet(Generic[_Tco]):
 
         au lieu d’instances de modèles.
         """
-        self._fields: Iterable[str] = fields
-        self._iterable_method: Callable[[], Generator[Any]] = self._values_iterable
-        return self
+        clone = self._chain(None)
+        clone._fields = fields
+        clone._iterable_method = clone._values_iterable
+        return clone._distinct_values()
 
     def values_list(self, *fields, flat=False):
         """
@@ -192,13 +504,24 @@ class MemoryQuerySet(Generic[_Tco]):
         champs dans la position respective de leur apparition dans l’appel à values_list() —
         premier champ comme premier élément
         """
-        self._fields = fields
-        self._iterable_method = self._flat_values_list_iterable \
-            if flat else self._values_list_iterable
+        clone = self._chain(None)
+        clone._fields = fields
+        clone._iterable_method = clone._flat_values_list_iterable \
+            if flat else clone._values_list_iterable
+        return clone._distinct_values()
+
+    def _distinct_values(self):
+        """Deduplicate the selected values of a distinct() QuerySet without fields."""
+        if self.query.distinct and not self.query.distinct_fields:
+            self._operation = functools.partial(_distinct_operation, self._distinct_paths())
         return self
 
     def _fetch_all(self):
         if self._result_cache is None:
+            positions = self._positions()
+            if not isinstance(positions, (list, range)):
+                positions = list(positions)
+            self._positions_cache = positions
             self._result_cache = list(self._iterable_method())
 
     def iterator(self):
@@ -207,9 +530,7 @@ class MemoryQuerySet(Generic[_Tco]):
 
         rtype: Iterable[Model]:
         """
-        if self._iterator is None:
-            self.all()
-        return self._iterator
+        return map(self._get_snapshot().__getitem__, self._positions())
 
     @property
     def ordered(self) -> bool:
@@ -217,77 +538,308 @@ class MemoryQuerySet(Generic[_Tco]):
         return bool(self.query.order_by)
 
     def order_by(self, *orders):
-        """Order the iterator."""
-        for order in reversed(orders):
+        """
+        Order the iterator.
+
+        The orders are field names or `__` separated attributes path, prefixed by `-` to
+        reverse the order.
+        """
+        keys = []
+        for order in orders:
             reverse = False
             if order[0] == '-':
                 reverse = True
                 order = order[1:]
-            if order == 'pk':
-                order = self.model._meta.pk.name
-            self._iterator = sorted(
-                self.iterator(), key=operator.attrgetter(order), reverse=reverse
-            )
-            self.query.order_by.append(order)
-        return self
-
-    def _get_value(self, obj: 'MemoryModel', filter_key: str):
-        """Retrieve the filter value in the object."""
-        filter_keys = filter_key.split('__')
-        function = MEMORY_FUNCTIONS.default
-        for key in filter_keys:
-            if key == 'pk':
-                key = self.model._meta.pk.name
-            if not hasattr(obj, key):
-                if not MEMORY_FUNCTIONS.registered(key):
-                    raise FieldDoesNotExist("%s has no field named '%s'" % (self.object_name, key))
-                function = MEMORY_FUNCTIONS.get(key)
-            else:
-                obj = getattr(obj, key)
-        return obj, function
-
-    def get(self, **filters):
+            if order in self.query.annotations:
+                keys.append((order, reverse))
+                continue
+            attributes = order.split('__')
+            if attributes[0] == 'pk':
+                attributes[0] = self.model._meta.pk.name
+            keys.append(('.'.join(attributes), reverse))
+        clone = self._chain(functools.partial(_order_by_operation, keys))
+        clone.query.order_by.extend(order for order, _ in keys)
+        return clone
+
+    def get(self, *args, **filters):
         """Retrieve one element."""
-        results = self.filter(**filters)
-        if len(results) > 1:
+        results = self.filter(*args, **filters)
+        found = list(itertools.islice(results._results(), 2))
+        if len(found) > 1:
             raise MultipleObjectsReturned
-        return results[0]
+        if not found:
+            raise self.model.DoesNotExist(results.query)
+        return found[0]
+
+    async def aget(self, *args, **filters):
+        """Retrieve one element, as get."""
+        results = self.filter(*args, **filters)
+        found = []
+        iterator = results.__aiter__()
+        try:
+            async for result in iterator:
+                found.append(result)
+                if len(found) > 1:
+                    raise MultipleObjectsReturned
+        finally:
+            await iterator.aclose()
+        if not found:
+            raise self.model.DoesNotExist(results.query)
+        return found[0]
+
+    def filter(self, *args, **filters):  # noqa: A003
+        """
+        Filter elements in the iterator.
 
-    def filter(self, **filters):  # noqa: A003
+        The Q objects arguments and the keyword arguments must all match.
+        """
+        return self._filter(False, Q(*args, *filters.items()))
+
+    def exclude(self, *args, **filters):
         """Filter elements in the iterator."""
+        return self._filter(True, Q(*args, *filters.items()))
 
-        def _filter(obj):
-            for filter_key, filter_value in filters.items():
-                if filter_key == 'pk':
-                    filter_key = self.model._meta.pk.name
-                value, function = self._get_value(obj, filter_key)
-                if not function(value, filter_value):
-                    return False
-            return True
+    def parallel(self, workers: Optional[int] = None, partition_size: int = 10000):
+        """
+        Evaluate the next filters in a pool of workers processes.
 
-        self._iterator = filter(_filter, self.iterator())
-        self.query.filters.append((False, filters))
-        return self
+        The objects are split in partitions of partition_size, filtered by the forked workers
+        (os.cpu_count() by default). Use it for the CPU bound scans of the large tables.
+        """
+        clone = self._chain(None)
+        clone._parallel = dict(workers=workers, partition_size=partition_size)
+        return clone
+
+    def _filter(self, negated: bool, filters: Q):
+        if filters:
+            lookups = compile_q(self.model, filters)
+            parallel = {} if self._parallel is None else dict(parallel=self._parallel)
+            clone = self._chain(functools.partial(_filter_operation, lookups, negated, **parallel))
+        else:
+            clone = self._chain(None)
+        clone.query.filters.append((negated, filters))
+        return clone
+
+    def distinct(self, *fields):
+        """
+        Keep the first object of each distinct values of the fields.
 
-    def exclude(self, **filters):
-        """Filter elements in the iterator."""
+        Without fields, the selected values of values() and values_list(), even called after
+        distinct(), or the Meta.fields values and the annotations of the objects are compared.
+        The objects are deduplicated in a single streaming pass (see. MemorySnapshot.distinct).
+        """
+        paths = [self._path(field) for field in fields] if fields else self._distinct_paths()
+        clone = self._chain(functools.partial(_distinct_operation, paths))
+        clone.query.distinct = True
+        clone.query.distinct_fields = fields
+        return clone
+
+    def _distinct_paths(self) -> List[str]:
+        """Return the attribute paths of the values compared by distinct() without fields."""
+        if self._fields:
+            return [self._path(field) for field in self._fields]
+        return [field.get_attname() for field in self.model._meta.fields] + self.query.annotations
 
-        self.query.filters.append((True, filters))
+    def all(self):  # noqa: A003
+        """Return a copy of the queryset."""
+        return self._chain(None)
 
-        def _exclude(obj):
-            for filter_key, filter_value in filters.items():
-                if filter_key == 'pk':
-                    filter_key = self.model._meta.pk.name
-                value, function = self._get_value(obj, filter_key)
-                if function(value, filter_value):
-                    return False
-            return True
+    def create(self, **kwargs):
+        """Create an object and add it to the manager data."""
+        obj = self.model(**kwargs)
+        self.bulk_create([obj])
+        return obj
 
-        self._iterator = filter(_exclude, self.iterator())
-        return self
+    def bulk_create(self, objs: Iterable[Any]) -> List[Any]:
+        """
+        Add the objects to the manager data, the built indexes are updated.
 
-    def all(self):  # noqa: A003
-        """Reset the iterator to the initial state."""
-        self._iterator = self.get_all()
-        self.query = self.query_class()
-        return self
+        Raise IntegrityError, without adding any object, when a primary key is already used.
+        """
+        objs = list(objs)
+
+        def change(snapshot: MemorySnapshot, version: int) -> MemorySnapshot:
+            _check_primary_keys(snapshot, objs)
+            return snapshot.changed(version, created=objs)
+
+        self._write(change)
+        return objs
+
+    def update(self, **kwargs) -> int:
+        """
+        Set the fields values of the objects, return their count.
+
+        The objects are copied before being changed: the objects of the querysets already
+        evaluated are not.
+        """
+        values = [(self.model._meta.get_field(name).get_attname(), value)
+                  for name, value in kwargs.items()]
+        updated: Dict[int, Any] = {}
+
+        def change(snapshot: MemorySnapshot, version: int) -> MemorySnapshot:
+            updated.clear()
+            for position in self._rebased(snapshot)._positions():
+                obj = copy.copy(snapshot[position])
+                for attname, value in values:
+                    setattr(obj, attname, value)
+                updated[position] = obj
+            return snapshot.changed(version, updated=updated)
+
+        self._write(change)
+        return len(updated)
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """Delete the objects, return their count and the count by model."""
+        deleted: List[int] = []
+
+        def change(snapshot: MemorySnapshot, version: int) -> MemorySnapshot:
+            deleted[:] = self._rebased(snapshot)._positions()
+            return snapshot.changed(version, deleted=deleted)
+
+        self._write(change)
+        return len(deleted), {self.object_name: len(deleted)}
+
+    delete.queryset_only = True  # type: ignore
+
+    def _write(self, change: Callable[[MemorySnapshot, int], MemorySnapshot]):
+        if self.write is None:
+            raise NotSupportedError(f'{self.object_name} data is read only')
+        # Evaluated again on the changed data, as a django queryset
+        rebased = self._rebased(self.write(change))
+        self._snapshot, self._parent = rebased._snapshot, rebased._parent
+        self._result_cache = None
+        self._positions_cache = None
+
+    def _rebased(self, snapshot: MemorySnapshot) -> 'MemoryQuerySet':
+        """Return a copy of the queryset evaluated on the snapshot."""
+        clone = self._clone()
+        if self._parent is None:
+            clone._snapshot = snapshot
+        else:
+            clone._parent = self._parent._rebased(snapshot)
+        return clone
+
+
+def _default_aliases(args: Iterable[Any]) -> Dict[str, Any]:
+    """Return the aggregates arguments by their default alias."""
+    aliased = {}
+    for arg in args:
+        try:
+            aliased[arg.default_alias] = arg
+        except (AttributeError, TypeError):
+            raise TypeError('Complex aggregates require an alias')
+    return aliased
+
+
+def _check_primary_keys(snapshot: MemorySnapshot, objs: List[Any]):
+    """Raise IntegrityError if a primary key of the objects is in the snapshot or repeated."""
+    pk = snapshot.model._meta.pk
+    if pk is None:
+        return
+    attname = pk.get_attname()
+    index = snapshot.get_index(attname)
+    used: Collection[Any]
+    if index is None:  # not indexed, or unhashable values
+        getter = snapshot.value_getter(attname)
+        used = [getter(position) for position in snapshot.all_positions()]
+    else:
+        used = index.positions  # type: ignore
+    created: Set[Any] = set()
+    for obj in objs:
+        value = getattr(obj, attname)
+        if value is None:
+            continue
+        if value in used or value in created:
+            raise IntegrityError(
+                f'{snapshot.model.__name__} with {pk.name} {value!r} already exists'
+            )
+        created.add(value)
+
+
+def _filter_operation(
+    lookups: List[Condition],
+    negated: bool,
+    snapshot: MemorySnapshot,
+    positions: Sequence[int],
+    parallel: Optional[Dict[str, Any]] = None
+) -> Iterable[int]:
+    """
+    Keep the positions of the objects matching the lookups (or not when negated).
+
+    With parallel options, the positions are filtered by partitions (see. parallel_filter).
+    """
+    if not negated and snapshot.is_all(positions):
+        candidates = snapshot.candidates(lookups)
+        if candidates is not None:
+            if _is_indexed(lookups):
+                return candidates
+            positions = candidates
+    if parallel is not None:
+        return parallel_filter(snapshot, positions, lookups, negated, **parallel)
+    return snapshot.filter(positions, lookups, negated)
+
+
+def _is_indexed(lookups: List[Condition]) -> bool:
+    """Return True if the candidates of the lookups are the matching positions."""
+    return len(lookups) == 1 and isinstance(lookups[0], MemoryLookup)
+
+
+def _is_scan(operation: Operation) -> bool:
+    """Return True if the operation is a filter evaluated in the current process."""
+    return (
+        isinstance(operation, functools.partial) and operation.func is _filter_operation
+        and 'parallel' not in operation.keywords
+    )
+
+
+def _order_by_operation(
+    keys: List[Tuple[str, bool]],
+    snapshot: MemorySnapshot,
+    positions: Sequence[int],
+    limit: Optional[int] = None
+) -> Iterable[int]:
+    """
+    Order the positions by the value of the objects (attname, reverse) keys.
+
+    With a limit, only the first positions have to be returned.
+    """
+    if len(keys) == 1 and snapshot.is_all(positions):
+        ordered = snapshot.ordered(*keys[0])
+        if ordered is not None:
+            return ordered
+    return snapshot.order(positions, keys, limit)
+
+
+def _distinct_operation(paths: List[str], snapshot: MemorySnapshot, positions: Sequence[int]) \
+        -> Iterable[int]:
+    """Keep the first position of each distinct values of the attribute paths."""
+    return snapshot.distinct(positions, paths)
+
+
+def _reversed_operation(snapshot: MemorySnapshot, positions: Sequence[int]) -> Iterable[int]:
+    """Reverse the positions."""
+    if not isinstance(positions, (list, range)):
+        positions = list(positions)
+    return reversed(positions)
+
+
+def _slice_operation(key: slice, snapshot: MemorySnapshot, positions: Sequence[int]) \
+        -> Iterable[int]:
+    """
+    Slice the positions.
+
+    Negative bounds are counted from the end, a null or zero stop with a negative start mean
+    up to the end.
+    """
+    start, stop, step = key.start or 0, key.stop, key.step
+    if start < 0 or (stop is not None and stop < 0):
+        if not isinstance(positions, (list, range)):
+            positions = list(positions)
+        length = len(positions)
+        if start < 0:
+            start = max(0, length + start)
+            stop = length if stop is None else (length + stop if stop <= 0 else stop)
+        elif stop < 0:
+            stop = length + stop
+        stop = max(0, stop)
+    return itertools.islice(positions, start, stop, step)
@@ -14,10 +14,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import sys
-from typing import Any, Callable, Collection, Dict, Generic, Iterable, Iterator, List, Optional, \
-    overload, Reversible, Sized, Tuple, Type, TypeVar, Union
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, Dict, Generic, Iterable, \
+    Iterator, List, Optional, overload, Reversible, Sequence, Sized, Tuple, Type, TypeVar, Union
 
+from django.db.models import Q
+
+from memory_db.lookups import Condition
 from memory_db.models import MemoryModel
+from memory_db.snapshot import MemorySnapshot
 
 if sys.version_info >= (3, 11):
     from typing import Self
@@ -28,11 +32,19 @@ _T = TypeVar("_T", bound=MemoryModel, covariant=True)
 _Row = TypeVar("_Row", covariant=True)
 
 GetAllFunction = Callable[[], Iterable[_T]]
+AGetAllFunction = Callable[[], Awaitable[Iterable[_T]]]
+WriteFunction = Callable[[Callable[[MemorySnapshot, int], MemorySnapshot]], MemorySnapshot]
 
 
 class MemoryQuery:
     order_by: List[str] = ...
-    filters: List[Tuple[Dict[str, Any], bool]] = ...
+    filters: List[Tuple[bool, Q]] = ...
+    annotations: List[str] = ...
+    distinct: bool = ...
+    distinct_fields: Tuple[str, ...] = ...
+
+    def clone(self) -> 'MemoryQuery':
+        ...
 
 
 class _BaseMemoryQuerySet(Generic[_T], Sized):
@@ -41,21 +53,37 @@ class _BaseMemoryQuerySet(Generic[_T], Sized):
 
     Retrieve the data from the model self.model.objects.get_all() method.
     This method should return a list of object containing the objects to filter.
-    Also, it [c|sh]ould be cached (see. functools.lru_cache)
+    The managers cache it in a snapshot (see. MemoryBaseManager.get_snapshot)
+
+    Each filter, order_by... return a new queryset applying its operation on the
+    positions of the objects of its parent queryset. When the parent is already evaluated,
+    the operation is applied on the parent result.
     """
 
     model: Optional[Type[MemoryModel]] = ...
     object_name: str = ...
     get_all: Optional[GetAllFunction] = ...
+    aget_all: Optional[AGetAllFunction] = ...
+    write: Optional[WriteFunction] = ...
     query: MemoryQuery = ...
     query_class: Type[MemoryQuery] = ...
+    async_chunk_size: int = ...
 
-    def __init__(self, model: Type[MemoryModel] = ..., get_all: GetAllFunction = ...):
+    def __init__(
+        self,
+        model: Type[MemoryModel] = ...,
+        get_all: GetAllFunction = ...,
+        aget_all: Optional[AGetAllFunction] = ...,
+        write: Optional[WriteFunction] = ...
+    ):
         ...
 
     def __iter__(self) -> Iterator[_T]:
         ...
 
+    def __aiter__(self) -> AsyncIterator[_T]:
+        ...
+
     def __len__(self) -> int:
         ...
 
@@ -68,6 +96,24 @@ class _BaseMemoryQuerySet(Generic[_T], Sized):
     def first(self) -> _T:
         ...
 
+    def count(self) -> int:
+        ...
+
+    def aggregate(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        ...
+
+    def annotate(self: Self, *args: Any, **kwargs: Any) -> Self:
+        ...
+
+    async def aexists(self) -> bool:
+        ...
+
+    async def acount(self) -> int:
+        ...
+
+    async def afirst(self) -> Optional[_T]:
+        ...
+
     def values(self, *fields) -> 'ValuesMemoryQuerySet'[_T, Dict[str, Any]]:
         ...
 
@@ -90,18 +136,39 @@ class _BaseMemoryQuerySet(Generic[_T], Sized):
     def order_by(self: Self, *orders: Tuple[str, ...]) -> Self:
         ...
 
-    def get(self: Self, **filters: Dict[str, Any]) -> _T:
+    def get(self: Self, *args: Q, **filters: Any) -> _T:
         ...
 
-    def filter(self: Self, **filters: Dict[str, Any]) -> Self:
+    async def aget(self: Self, *args: Q, **filters: Any) -> _T:
         ...
 
-    def exclude(self: Self, **filters: Dict[str, Any]) -> Self:
+    def filter(self: Self, *args: Q, **filters: Any) -> Self:
+        ...
+
+    def exclude(self: Self, *args: Q, **filters: Any) -> Self:
+        ...
+
+    def distinct(self: Self, *fields: str) -> Self:
         ...
 
     def all(self: Self) -> Self:
         ...
 
+    def parallel(self: Self, workers: Optional[int] = ..., partition_size: int = ...) -> Self:
+        ...
+
+    def create(self, **kwargs: Any) -> _T:
+        ...
+
+    def bulk_create(self, objs: Iterable[Any]) -> List[_T]:
+        ...
+
+    def update(self, **kwargs: Any) -> int:
+        ...
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        ...
+
 
 class MemoryQuerySet(_BaseMemoryQuerySet[_T], Collection[_T], Reversible[_T], Sized):
     ...
@@ -115,6 +182,9 @@ class ValuesMemoryQuerySet(_BaseMemoryQuerySet[_T], Collection[_Row], Sized):
     def __iter__(self) -> Iterator[_Row]:  # type: ignore
         ...
 
+    def __aiter__(self) -> AsyncIterator[_Row]:  # type: ignore
+        ...
+
     @overload  # type: ignore
     def __getitem__(self: Self, i: int) -> _Row:
         ...
@@ -126,7 +196,10 @@ class ValuesMemoryQuerySet(_BaseMemoryQuerySet[_T], Collection[_Row], Sized):
     def iterator(self, chunk_size: int = ...) -> Iterator[_Row]:  # type: ignore
         ...
 
-    def get(self, **filters: Any) -> _Row:  # type: ignore
+    def get(self, *args: Q, **filters: Any) -> _Row:  # type: ignore
+        ...
+
+    async def aget(self, *args: Q, **filters: Any) -> _Row:  # type: ignore
         ...
 
     def earliest(self, *fields: Any, field_name: Optional[Any] = ...) -> _Row:  # type: ignore
@@ -138,5 +211,14 @@ class ValuesMemoryQuerySet(_BaseMemoryQuerySet[_T], Collection[_Row], Sized):
     def first(self) -> Optional[_Row]:  # type: ignore
         ...
 
+    async def afirst(self) -> Optional[_Row]:  # type: ignore
+        ...
+
     def last(self) -> Optional[_Row]:  # type: ignore
         ...
+
+
+def _filter_operation(
+    lookups: List[Condition], negated: bool, snapshot: MemorySnapshot, positions: Sequence[int]
+) -> Iterable[int]:
+    ...
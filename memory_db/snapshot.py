@@ -0,0 +1,581 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import copy
+import functools
+import heapq
+import itertools
+import operator
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, \
+    Optional, Sequence, Sized, Tuple, Type, TYPE_CHECKING
+
+from memory_db.aggregates import MISSING
+from memory_db.indexes import HashIndex, MemoryIndex, SortedIndex
+from memory_db.lookups import compile_predicate, field_getter, MemoryCondition
+from memory_db.statistics import DEFAULT_SELECTIVITY, FieldStatistics
+
+if TYPE_CHECKING:
+    from .aggregates import Accumulator, MemoryAggregate
+    from .lookups import Condition
+
+
+class SnapshotDiff(NamedTuple):
+    """Counts of the objects created, updated and deleted by a reload (see. reloaded)."""
+
+    created: int
+    updated: int
+    deleted: int
+
+
+class MemorySnapshot:
+    """
+    Loaded data of a manager.
+
+    Sequence of the objects returned by the manager get_all method with the indexes of the
+    model Meta.indexes and Meta.sorted_indexes fields. Indexes are built on their first use.
+
+    The objects list is a copy of the get_all rows: the snapshot is not modified when the
+    rows are, and can be read by many threads.
+
+    The positions of the deleted objects (see. changed) are kept in the objects list and
+    skipped by all_positions.
+
+    The filters on at least rank_threshold positions test first the lookups rejecting the
+    most objects for their cost, estimated with the statistics of the fields values (see.
+    rank). The statistics of a field are collected on their first use.
+    """
+
+    deleted: FrozenSet[int] = frozenset()
+    rank_threshold = 1000
+    _all_positions: Optional[List[int]] = None
+    _row_keys: Optional[Dict[Any, Tuple[int, int, Any]]] = None
+
+    def __init__(self, model, rows: Iterable[Any], version: int = 0):
+        self.model = model
+        self.version = version
+        self.source = rows
+        self.rows = list(rows)
+        self.source_length = len(self.rows)
+        self.indexes: Dict[Tuple[str, Type[MemoryIndex]], Optional[MemoryIndex]] = {}
+        self.statistics: Dict[str, Optional[FieldStatistics]] = {}
+
+    def __iter__(self):
+        """Loop over the objects."""
+        if self.deleted:
+            return map(self.rows.__getitem__, self.all_positions())
+        return iter(self.rows)
+
+    def __len__(self):
+        """Return the count of objects."""
+        return len(self.rows) - len(self.deleted)
+
+    def __getitem__(self, position):
+        """Return the object at the position."""
+        return self.rows[position]
+
+    def is_source(self, rows: Iterable[Any]) -> bool:
+        """Return True if the snapshot was built from these rows."""
+        if rows is not self.source:
+            return False
+        # Lists mutated in place by get_all
+        return not isinstance(rows, Sized) or len(rows) == self.source_length
+
+    def all_positions(self) -> Sequence[int]:
+        """Return the positions of all the objects, without the deleted ones."""
+        if not self.deleted:
+            return range(len(self))
+        if self._all_positions is None:
+            deleted = self.deleted
+            self._all_positions = [
+                position for position in range(len(self.rows)) if position not in deleted
+            ]
+        return self._all_positions
+
+    def is_all(self, positions: Iterable[int]) -> bool:
+        """Return True if the positions are the positions of all the objects."""
+        all_positions = self.all_positions()
+        if isinstance(all_positions, range):
+            return isinstance(positions, range) and positions == all_positions
+        return positions is all_positions
+
+    def values(self, attname: str) -> Iterable[Any]:
+        """Loop over the field value of each object, at each position (even deleted)."""
+        return map(operator.attrgetter(attname), self.rows)
+
+    def value_getter(self, path: str) -> Callable[[int], Any]:
+        """Create a getter of the attribute path value of the object at a position."""
+        getter = field_getter(self.model, path)
+        rows = self.rows
+
+        def get(position: int):
+            """Get the attribute path value of the object at the position."""
+            return getter(rows[position])
+
+        return get
+
+    def filter(  # noqa: A003
+        self, positions: Iterable[int], lookups: List['Condition'], negated: bool = False
+    ) -> Iterable[int]:
+        """Loop over the positions of the objects matching all the lookups (or not)."""
+        predicate = compile_predicate(lookups, rank=self.get_rank(positions))
+        rows = self.rows
+        if negated:
+            return (position for position in positions if not predicate(rows[position]))
+        return (position for position in positions if predicate(rows[position]))
+
+    def position_predicate(self, lookups: List['Condition']) -> Callable[[int], bool]:
+        """Compile the lookups into a test of the object at a position."""
+        predicate = compile_predicate(lookups)
+        rows = self.rows
+
+        def test(position: int) -> bool:
+            """Test the lookups on the object at the position."""
+            return predicate(rows[position])
+
+        return test
+
+    def aggregate(self, positions: Iterable[int], aggregates: Dict[str, 'MemoryAggregate']) \
+            -> Dict[str, Any]:
+        """
+        Compute the aggregates of the objects at the positions.
+
+        The aggregates given by aggregate_shortcut are not computed, the others are computed
+        together in a single pass over the positions (see. group).
+        """
+        result = {}
+        pending = {}
+        for alias, aggregate in aggregates.items():
+            value = self.aggregate_shortcut(positions, aggregate)
+            if value is MISSING:
+                pending[alias] = aggregate
+            else:
+                result[alias] = aggregate.result(value)
+        if pending:
+            groups = self.group(positions, [], pending)
+            if groups:
+                result.update(groups[0][1])
+            else:
+                for alias, aggregate in pending.items():
+                    result[alias] = aggregate.result(aggregate.accumulator().result())
+        return {alias: result[alias] for alias in aggregates}
+
+    def group(
+        self,
+        positions: Iterable[int],
+        paths: Optional[List[str]],
+        aggregates: Dict[str, 'MemoryAggregate'],
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Compute the aggregates of the objects grouped by the values of the attribute paths.
+
+        The groups are found in a dict of their values, in a single pass over the positions:
+        each value is read once and added to the accumulators of its aggregates and group.
+        Return the position of the first object of each group, in the positions order, with
+        the aggregates of the group. Without paths, each object is a group.
+        """
+        numbers: Dict[Optional[str], int] = {}
+        getters = []
+        feeds = []
+        for aggregate in aggregates.values():
+            if aggregate.path not in numbers:
+                numbers[aggregate.path] = len(getters)
+                getters.append(
+                    _position if aggregate.path is None else self.value_getter(aggregate.path)
+                )
+            predicate = self.position_predicate(aggregate.lookups) if aggregate.lookups else None
+            feeds.append((numbers[aggregate.path], predicate))
+        if paths is None:
+            key = _position
+        else:
+            key = _sort_key([self.value_getter(path) for path in paths])
+        groups: Dict[Any, Tuple[int, List['Accumulator']]] = {}
+        for position in positions:
+            group_key = key(position)
+            try:
+                accumulators = groups[group_key][1]
+            except KeyError:
+                accumulators = [aggregate.accumulator() for aggregate in aggregates.values()]
+                groups[group_key] = (position, accumulators)
+            values = [getter(position) for getter in getters]
+            for (number, predicate), accumulator in zip(feeds, accumulators):
+                if predicate is None or predicate(position):
+                    accumulator.add(values[number])
+        items = list(aggregates.items())
+        return [(
+            position, {
+                alias: aggregate.result(accumulator.result())
+                for (alias, aggregate), accumulator in zip(items, accumulators)
+            }
+        ) for position, accumulators in groups.values()]
+
+    def aggregate_shortcut(self, positions: Iterable[int], aggregate: 'MemoryAggregate') -> Any:
+        """
+        Return the result of the aggregate computed without reading the values, or MISSING.
+
+        Count('*') is the count of the positions. On all the objects, the Count, Min and Max
+        of a field are read from its sorted index, and its distinct Count from its hash index.
+        """
+        if aggregate.lookups or not isinstance(positions, Sized):
+            return MISSING
+        if aggregate.path is None:
+            return len(positions)
+        if aggregate.name not in ('Count', 'Min', 'Max') or not self.is_all(positions):
+            return MISSING
+        if aggregate.name == 'Count' and aggregate.distinct:
+            hash_index = self.get_index(aggregate.path)
+            if hash_index is None:
+                return MISSING
+            return len(hash_index) - (None in hash_index.positions)  # type: ignore
+        index = self.get_index(aggregate.path, SortedIndex)
+        if index is None:
+            return MISSING
+        keys = index.keys  # type: ignore
+        if aggregate.name == 'Count':
+            return len(keys)
+        if not keys:
+            return None
+        return keys[0] if aggregate.name == 'Min' else keys[-1]
+
+    def get_rank(self, positions: Iterable[int]) -> Optional[Callable[['Condition'], float]]:
+        """Return the rank ordering the lookups filtering the positions (see. rank_threshold)."""
+        if isinstance(positions, Sized) and len(positions) < self.rank_threshold:
+            return None
+        return self.rank
+
+    def rank(self, lookup: 'Condition') -> float:
+        """
+        Return the cost of the lookup by rejected object, the lowest ranks are tested first.
+
+        The lookups of cost 0 (isnull) are always first: they can guard the others.
+        """
+        return lookup.cost / max(1 - self.selectivity(lookup), 0.001)
+
+    def selectivity(self, lookup: 'Condition') -> float:
+        """Return the estimated fraction of the objects matching the lookup or condition."""
+        if isinstance(lookup, MemoryCondition):
+            selectivities = [self.selectivity(child) for child in lookup.children]
+            if lookup.connector == lookup.OR:
+                rejected = functools.reduce(operator.mul, [1 - s for s in selectivities], 1)
+                result = 1 - rejected
+            else:
+                result = functools.reduce(operator.mul, selectivities, 1)
+            return 1 - result if lookup.negated else result
+        statistics = self.get_statistics(lookup.path)
+        if statistics is None:
+            return DEFAULT_SELECTIVITY
+        return statistics.selectivity(lookup.function_name, lookup.filter_value)
+
+    def get_statistics(self, path: str) -> Optional[FieldStatistics]:
+        """Return the statistics of the field values, or None if the path is not a field."""
+        try:
+            return self.statistics[path]
+        except KeyError:
+            pass
+        field = self.model._meta.fields_map.get(path)
+        statistics = None if field is None else FieldStatistics(self.values(field.get_attname()))
+        self.statistics[path] = statistics
+        return statistics
+
+    def get_index(self, attname: str, index_class: Type[MemoryIndex] = HashIndex) \
+            -> Optional[MemoryIndex]:
+        """Return the index of the field, or None if the field is not indexed."""
+        try:
+            return self.indexes[attname, index_class]
+        except KeyError:
+            pass
+        if index_class not in self.model._meta.index_classes.get(attname, ()):
+            return None
+        try:
+            index = index_class(self.values(attname))
+            if self.deleted:
+                getter = operator.attrgetter(attname)
+                index = index.changed([(position, getter(self.rows[position]))
+                                       for position in sorted(self.deleted)], [])
+        except TypeError:  # unhashable or not comparable values
+            index = None
+        self.indexes[attname, index_class] = index
+        return index
+
+    def get_indexes(self, attname: str) -> Iterator[MemoryIndex]:
+        """Loop over the indexes of the field."""
+        for index_class in self.model._meta.index_classes.get(attname, ()):
+            index = self.get_index(attname, index_class)
+            if index is not None:
+                yield index
+
+    def candidates(self, lookups: Iterable['Condition']) -> Optional[List[int]]:
+        """
+        Return the positions of the objects which may match all the lookups.
+
+        Use the index giving the least positions, return None when no index can be used.
+        The candidates of an OR condition are the union of the candidates of its children,
+        when they all have candidates.
+        """
+        result = None
+        for lookup in lookups:
+            if isinstance(lookup, MemoryCondition):
+                positions = self._condition_candidates(lookup)
+                if positions is not None and (result is None or len(positions) < len(result)):
+                    result = positions
+                continue
+            for index in self.get_indexes(lookup.path):
+                positions = index.lookup(lookup.function_name, lookup.filter_value)
+                if positions is not None and (result is None or len(positions) < len(result)):
+                    result = positions
+        return result
+
+    def _condition_candidates(self, condition: MemoryCondition) -> Optional[List[int]]:
+        if condition.negated:
+            return None
+        if condition.connector == condition.AND:
+            return self.candidates(condition.children)
+        branches = []
+        for child in condition.children:
+            positions = self.candidates([child])
+            if positions is None:
+                return None
+            branches.append(positions)
+        return sorted(set(itertools.chain.from_iterable(branches)))
+
+    def changed(
+        self,
+        version: int,
+        created: Iterable[Any] = (),
+        updated: Optional[Dict[int, Any]] = None,
+        deleted: Iterable[int] = ()
+    ) -> 'MemorySnapshot':
+        """
+        Return a new snapshot with the changes: created objects, objects by updated position.
+
+        The objects list is copied and the indexes already built are changed (see.
+        MemoryIndex.changed), the statistics of the updated fields are collected again. The
+        objects keep their positions, the deleted ones are only skipped until more than a
+        quarter of them are deleted: then a compact snapshot is created, its indexes will be
+        built again.
+        """
+        updated = updated or {}
+        deleted = frozenset(deleted) - self.deleted
+        snapshot = copy.copy(self)
+        snapshot.version = version
+        rows = snapshot.rows = self.rows[:]
+        start = len(rows)
+        rows.extend(created)
+        for position, obj in updated.items():
+            rows[position] = obj
+        snapshot.deleted = self.deleted | deleted
+        snapshot._all_positions = None
+        snapshot._row_keys = None
+        # Copies of the dicts: the threads reading this snapshot can build its indexes and
+        # statistics meanwhile
+        statistics_items = list(self.statistics.items())
+        index_items = list(self.indexes.items())
+        # Estimations: still used after small changes, collected again for the updated fields
+        snapshot.statistics = {
+            path: statistics
+            for path, statistics in statistics_items
+            if statistics is None or not _updated(path, self.rows, updated)
+        }
+        if len(snapshot.deleted) * 4 > len(rows):
+            compact = self.__class__(self.model, snapshot, version)
+            compact.source, compact.source_length = self.source, self.source_length
+            return compact
+        snapshot.indexes = {}
+        for key, index in index_items:
+            if index is None:
+                continue
+            getter = operator.attrgetter(key[0])
+            removed = [(position, getter(self.rows[position]))
+                       for position in itertools.chain(updated, deleted)]
+            added = [(position, getter(rows[position]))
+                     for position in itertools.chain(updated, range(start, len(rows)))]
+            try:
+                snapshot.indexes[key] = index.changed(removed, added)
+            except TypeError:  # built again on its first use
+                pass
+        return snapshot
+
+    def row_keys(self) -> Optional[Dict[Any, Tuple[int, int, Any]]]:
+        """
+        Return the position, the content hash and the content of the objects by primary key.
+
+        Return None when the model has no Meta.pk or when a primary key is duplicated.
+        """
+        if self._row_keys is None:
+            self._row_keys = _row_keys(self.model, self.rows, self.all_positions())
+        return self._row_keys
+
+    def reloaded(self, rows: Iterable[Any], version: int) \
+            -> Optional[Tuple['MemorySnapshot', SnapshotDiff]]:
+        """
+        Return a snapshot of the rows built from this one, with the counts of the changes.
+
+        The rows are compared with the objects by primary key and content (the Meta.fields
+        values, their hash is compared first): only the created, updated and deleted objects
+        are changed in the indexes (see. changed). The objects keep their positions, the
+        created ones are added at the end. Return None when the rows can't be compared (see.
+        row_keys).
+        """
+        previous = self.row_keys()
+        rows = rows if isinstance(rows, list) else list(rows)
+        keys = _row_keys(self.model, rows, range(len(rows)))
+        if previous is None or keys is None:
+            return None
+        created = []
+        updated = {}
+        positions = {}
+        start = len(self.rows)
+        for pk, (row_position, content_hash, content) in keys.items():
+            try:
+                position, previous_hash, previous_content = previous[pk]
+            except KeyError:
+                position = start + len(created)
+                created.append(rows[row_position])
+            else:
+                if content_hash != previous_hash or content != previous_content:
+                    updated[position] = rows[row_position]
+            positions[pk] = (position, content_hash, content)
+        deleted = [position for pk, (position, _, _) in previous.items() if pk not in keys]
+        diff = SnapshotDiff(len(created), len(updated), len(deleted))
+        snapshot = self.changed(version, created, updated, deleted)
+        snapshot.source, snapshot.source_length = rows, len(rows)
+        if len(snapshot.rows) == start + len(created):  # not compacted
+            snapshot._row_keys = positions
+        return snapshot, diff
+
+    def order(
+        self,
+        positions: Iterable[int],
+        keys: List[Tuple[str, bool]],
+        limit: Optional[int] = None
+    ) -> Iterable[int]:
+        """
+        Order the positions by the (attribute path, reverse) keys values.
+
+        Null values are greater than the other values: last in ascending order, first in
+        descending order. With a limit, only the first positions are returned. They are selected
+        with a heap on the composite key of all the keys when they have the same direction.
+        """
+        if not isinstance(positions, (list, range)):
+            positions = list(positions)
+        if limit is not None and len({reverse for _, reverse in keys}) == 1:
+            select = heapq.nlargest if keys[0][1] else heapq.nsmallest
+            getters = [self.value_getter(path) for path, _ in keys]
+            try:
+                return select(limit, positions, key=_sort_key(getters))
+            except TypeError:  # null values
+                return select(limit, positions, key=_sort_key(list(map(_null_last, getters))))
+        # Stable sorts by each key are faster than a single sort by tuples, as the values of a
+        # key are of the same type.
+        for path, reverse in reversed(keys):
+            getter = self.value_getter(path)
+            try:
+                positions = sorted(positions, key=getter, reverse=reverse)
+            except TypeError:  # null values
+                positions = sorted(positions, key=_null_last(getter), reverse=reverse)
+        if limit is not None:
+            return positions[:limit]
+        return positions
+
+    def distinct(self, positions: Iterable[int], paths: List[str]) -> Iterable[int]:
+        """
+        Loop over the position of the first object of each distinct values of the paths.
+
+        The values already seen are kept in a set (in a list for the unhashable ones): the
+        positions are read only up to the last one used. On all the objects, the first
+        positions of the values of an indexed field are read from its index.
+        """
+        if len(paths) == 1 and self.is_all(positions):
+            index = self.get_index(paths[0])
+            if index is not None:
+                return sorted(bucket[0] for bucket in index.positions.values())  # type: ignore
+        return self._distinct(positions, _sort_key([self.value_getter(path) for path in paths]))
+
+    @staticmethod
+    def _distinct(positions: Iterable[int], key: Callable[[int], Any]) -> Iterator[int]:
+        seen = set()
+        unhashable = []
+        for position in positions:
+            values = key(position)
+            try:
+                if values in seen:
+                    continue
+                seen.add(values)
+            except TypeError:
+                if values in unhashable:
+                    continue
+                unhashable.append(values)
+            yield position
+
+    def ordered(self, attname: str, reverse: bool = False) -> Optional[Iterable[int]]:
+        """Return the positions ordered by the field value, or None without sorted index."""
+        index = self.get_index(attname, SortedIndex)
+        if index is None:
+            return None
+        return index.ordered(reverse)  # type: ignore
+
+
+def _row_keys(model, rows: Sequence[Any], positions: Sequence[int]) \
+        -> Optional[Dict[Any, Tuple[int, int, Any]]]:
+    """Return the position, content hash and content of the rows at the positions by pk."""
+    if model._meta.pk is None:
+        return None
+    get_pk = operator.attrgetter(model._meta.pk.get_attname())
+    get_values = operator.attrgetter(*[field.get_attname() for field in model._meta.fields])
+    keys = {}
+    for position in positions:
+        row = rows[position]
+        values = get_values(row)
+        try:
+            content = hash(values)
+        except TypeError:  # unhashable values
+            content = hash(repr(values))
+        keys[get_pk(row)] = (position, content, values)
+    if len(keys) < len(positions):  # duplicated primary keys
+        return None
+    return keys
+
+
+def _updated(attname: str, rows: Sequence[Any], updated: Dict[int, Any]) -> bool:
+    """Return True if a value of the field is changed by the updated objects, by position."""
+    getter = operator.attrgetter(attname)
+    return any(getter(rows[position]) != getter(obj) for position, obj in updated.items())
+
+
+def _position(position: int) -> int:
+    """Return the position, the value of Count('*')."""
+    return position
+
+
+def _sort_key(getters: List[Callable[[int], Any]]) -> Callable[[int], Any]:
+    """Combine the getters into a composite sort key."""
+    if len(getters) == 1:
+        return getters[0]
+
+    def get(position: int) -> Tuple[Any, ...]:
+        """Get the tuple of the values at the position."""
+        return tuple([getter(position) for getter in getters])
+
+    return get
+
+
+def _null_last(getter: Callable[[int], Any]) -> Callable[[int], Tuple[bool, Any]]:
+    """Wrap a value getter into a sort key ordering the null values after the others."""
+
+    def get(position: int) -> Tuple[bool, Any]:
+        """Get the sort key at the position."""
+        value = getter(position)
+        return (value is None, value)
+
+    return get
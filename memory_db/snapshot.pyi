@@ -0,0 +1,149 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from typing import Any, Callable, Dict, FrozenSet, Generic, Iterable, Iterator, List, \
+    NamedTuple, Optional, Sequence, Tuple, Type, TypeVar
+
+from memory_db.aggregates import MemoryAggregate
+from memory_db.indexes import MemoryIndex
+from memory_db.lookups import Condition
+from memory_db.models import MemoryModel
+from memory_db.statistics import FieldStatistics
+
+_T = TypeVar("_T", bound=MemoryModel, covariant=True)
+
+
+class SnapshotDiff(NamedTuple):
+    created: int
+    updated: int
+    deleted: int
+
+
+class MemorySnapshot(Generic[_T]):
+    model: Type[_T] = ...
+    version: int = ...
+    source: Iterable[_T] = ...
+    source_length: int = ...
+    rows: List[_T] = ...
+    indexes: Dict[Tuple[str, Type[MemoryIndex]], Optional[MemoryIndex]] = ...
+    deleted: FrozenSet[int] = ...
+    statistics: Dict[str, Optional[FieldStatistics]] = ...
+    rank_threshold: int = ...
+
+    def __init__(self, model: Type[_T], rows: Iterable[_T], version: int = ...):
+        ...
+
+    def __iter__(self) -> Iterator[_T]:
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+    def __getitem__(self, position: int) -> _T:
+        ...
+
+    def is_source(self, rows: Iterable[Any]) -> bool:
+        ...
+
+    def is_all(self, positions: Iterable[int]) -> bool:
+        ...
+
+    def all_positions(self) -> Sequence[int]:
+        ...
+
+    def changed(
+        self,
+        version: int,
+        created: Iterable[_T] = ...,
+        updated: Optional[Dict[int, _T]] = ...,
+        deleted: Iterable[int] = ...
+    ) -> 'MemorySnapshot[_T]':
+        ...
+
+    def values(self, attname: str) -> Iterable[Any]:
+        ...
+
+    def value_getter(self, path: str) -> Callable[[int], Any]:
+        ...
+
+    def filter(  # noqa: A003
+        self, positions: Iterable[int], lookups: List[Condition], negated: bool = ...
+    ) -> Iterable[int]:
+        ...
+
+    def position_predicate(self, lookups: List[Condition]) -> Callable[[int], bool]:
+        ...
+
+    def aggregate(self, positions: Iterable[int], aggregates: Dict[str, MemoryAggregate]) \
+            -> Dict[str, Any]:
+        ...
+
+    def group(
+        self,
+        positions: Iterable[int],
+        paths: Optional[List[str]],
+        aggregates: Dict[str, MemoryAggregate],
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        ...
+
+    def aggregate_shortcut(self, positions: Iterable[int], aggregate: MemoryAggregate) -> Any:
+        ...
+
+    def get_rank(self, positions: Iterable[int]) -> Optional[Callable[[Condition], float]]:
+        ...
+
+    def rank(self, lookup: Condition) -> float:
+        ...
+
+    def selectivity(self, lookup: Condition) -> float:
+        ...
+
+    def get_statistics(self, path: str) -> Optional[FieldStatistics]:
+        ...
+
+    def get_index(self, attname: str, index_class: Type[MemoryIndex] = ...) \
+            -> Optional[MemoryIndex]:
+        ...
+
+    def get_indexes(self, attname: str) -> Iterator[MemoryIndex]:
+        ...
+
+    def candidates(self, lookups: Iterable[Condition]) -> Optional[List[int]]:
+        ...
+
+    def row_keys(self) -> Optional[Dict[Any, Tuple[int, int, Any]]]:
+        ...
+
+    def reloaded(self, rows: Iterable[_T], version: int) \
+            -> Optional[Tuple['MemorySnapshot[_T]', SnapshotDiff]]:
+        ...
+
+    def order(
+        self,
+        positions: Iterable[int],
+        keys: List[Tuple[str, bool]],
+        limit: Optional[int] = ...
+    ) -> Iterable[int]:
+        ...
+
+    def distinct(self, positions: Iterable[int], paths: List[str]) -> Iterable[int]:
+        ...
+
+    def ordered(self, attname: str, reverse: bool = ...) -> Optional[Iterable[int]]:
+        ...
+
+
+def _updated(attname: str, rows: Sequence[Any], updated: Dict[int, Any]) -> bool:
+    ...
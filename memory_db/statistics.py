@@ -0,0 +1,130 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Statistics of the field values, used to estimate the selectivity of the lookups.
+
+The filters test first the lookups rejecting the most objects for their cost (see.
+MemorySnapshot.rank).
+"""
+from collections import Counter
+from typing import Any, Iterable, List, Optional, Tuple
+
+from memory_db.utils import cast_value
+
+DEFAULT_SELECTIVITY = 1 / 3
+TOP_SIZE = 10
+
+
+class FieldStatistics:
+    """
+    Count, nulls count, distinct count, minimum, maximum and most common values of a field.
+
+    The distinct count and the most common values are None and empty when the values are not
+    hashable, the minimum and the maximum are None when they are not comparable.
+    """
+
+    def __init__(self, values: Iterable[Any], top_size: int = TOP_SIZE):
+        values = list(values)
+        self.count = len(values)
+        not_null = [value for value in values if value is not None]
+        self.nulls = self.count - len(not_null)
+        self.distinct: Optional[int] = None
+        self.most_common: List[Tuple[Any, int]] = []
+        try:
+            counter = Counter(not_null)
+        except TypeError:  # unhashable values
+            pass
+        else:
+            self.distinct = len(counter)
+            self.most_common = counter.most_common(top_size)
+        self.min = self.max = None
+        try:
+            self.min, self.max = min(not_null), max(not_null)
+        except (TypeError, ValueError):  # not comparable or empty
+            pass
+        self.frequencies = dict(self.most_common)
+
+    def __repr__(self):
+        """Statistics representation."""
+        return (
+            f'<{self.__class__.__name__}: count={self.count}, nulls={self.nulls}, '
+            f'distinct={self.distinct}, min={self.min!r}, max={self.max!r}>'
+        )
+
+    def selectivity(self, function_name: str, filter_value: Any) -> float:
+        """Return the estimated fraction of the objects matching the lookup."""
+        if not self.count:
+            return 0
+        method = getattr(self, f'selectivity_{function_name}', None)
+        if method is None:
+            return DEFAULT_SELECTIVITY
+        try:
+            return max(0, min(1, method(filter_value)))
+        except (TypeError, ValueError, ZeroDivisionError):  # not comparable values
+            return DEFAULT_SELECTIVITY
+
+    def selectivity_exact(self, filter_value: Any) -> float:
+        """Estimate the exact lookup with the frequency of the value, or the average one."""
+        if filter_value is None:
+            return self.nulls / self.count
+        if self.distinct is None:
+            return DEFAULT_SELECTIVITY
+        if self.min is not None:
+            filter_value = cast_value(self.min, filter_value)
+        try:
+            frequency = self.frequencies.get(filter_value)
+        except TypeError:  # unhashable
+            frequency = None
+        if frequency is None:
+            others = self.distinct - len(self.most_common)
+            if not others:
+                return 0
+            top_count = sum(count for _, count in self.most_common)
+            frequency = (self.count - self.nulls - top_count) / others
+        return frequency / self.count
+
+    selectivity_iexact = selectivity_exact
+
+    def selectivity_in(self, filter_value: Iterable[Any]) -> float:
+        """Sum the exact estimations of the values."""
+        return sum(self.selectivity_exact(value) for value in filter_value)
+
+    def selectivity_isnull(self, filter_value: bool) -> float:
+        """Estimate the isnull lookup with the nulls count."""
+        nulls = self.nulls / self.count
+        return nulls if filter_value else 1 - nulls
+
+    def selectivity_lt(self, filter_value: Any) -> float:
+        """Interpolate the value between the minimum and the maximum."""
+        if self.min is None:
+            return 0
+        filter_value = cast_value(self.min, filter_value)
+        if filter_value <= self.min:
+            return 0
+        if filter_value > self.max:
+            return 1 - self.nulls / self.count
+        fraction = (filter_value - self.min) / (self.max - self.min)
+        return fraction * (1 - self.nulls / self.count)
+
+    selectivity_lte = selectivity_lt
+
+    def selectivity_gt(self, filter_value: Any) -> float:
+        """Interpolate the value between the minimum and the maximum."""
+        if self.min is None:
+            return 0
+        return 1 - self.nulls / self.count - self.selectivity_lte(filter_value)
+
+    selectivity_gte = selectivity_gt
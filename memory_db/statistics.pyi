@@ -0,0 +1,59 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_SELECTIVITY: float
+TOP_SIZE: int
+
+
+class FieldStatistics:
+    count: int = ...
+    nulls: int = ...
+    distinct: Optional[int] = ...
+    most_common: List[Tuple[Any, int]] = ...
+    frequencies: Dict[Any, int] = ...
+    min: Any = ...
+    max: Any = ...
+
+    def __init__(self, values: Iterable[Any], top_size: int = ...):
+        ...
+
+    def selectivity(self, function_name: str, filter_value: Any) -> float:
+        ...
+
+    def selectivity_exact(self, filter_value: Any) -> float:
+        ...
+
+    def selectivity_iexact(self, filter_value: Any) -> float:
+        ...
+
+    def selectivity_in(self, filter_value: Iterable[Any]) -> float:
+        ...
+
+    def selectivity_isnull(self, filter_value: bool) -> float:
+        ...
+
+    def selectivity_lt(self, filter_value: Any) -> float:
+        ...
+
+    def selectivity_lte(self, filter_value: Any) -> float:
+        ...
+
+    def selectivity_gt(self, filter_value: Any) -> float:
+        ...
+
+    def selectivity_gte(self, filter_value: Any) -> float:
+        ...
@@ -14,6 +14,16 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from typing import Any, Callable, Dict, Iterable
+
+from django.core.exceptions import ValidationError
+from django.db.models.fields import Field
+
+MEMO_INTERNAL_TYPES = {
+    'DateField', 'DateTimeField', 'DecimalField', 'DurationField', 'TimeField', 'UUIDField'
+}
+MEMO_SIZE = 2**16
+
 
 def cast_value(value, filter_value):
     """Cast the filter value to be comparable to the value.
@@ -31,3 +41,75 @@ def cast_value(value, filter_value):
     elif isinstance(value, str) and not isinstance(filter_value, str):
         filter_value = str(filter_value)
     return filter_value
+
+
+def compile_row_converter(fields: Iterable[Field], memoize: bool = False) \
+        -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile a converter of a row data to the model init keyword arguments.
+
+    The column, the default value... of each field are resolved once. With memoize, the
+    conversions of the strings of the dates, decimals... fields are kept in a memo (up to
+    MEMO_SIZE values by field).
+
+    The converter raise ValidationError with the errors of all the fields of the row.
+    """
+    converters = []
+    for field in fields:
+        attname = field.get_attname()
+        column = field.db_column or attname
+        if callable(field.default):
+            default, get_default = _MISSING, field.get_default
+        else:
+            default, get_default = field.get_default(), None
+        to_python = field.to_python
+        if memoize and field.get_internal_type() in MEMO_INTERNAL_TYPES:
+            to_python = _memoize(to_python)
+        converters.append(
+            (field.name, attname, column, default, get_default, field.blank, to_python)
+        )
+
+    def convert(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert the row data."""
+        kwargs = {}
+        errors: Dict[str, ValidationError] = {}
+        for name, attname, column, default, get_default, blank, to_python in converters:
+            value = row.get(column, default)
+            if value is _MISSING:
+                value = get_default()
+            if blank and value == '':
+                value = default if get_default is None else get_default()
+            else:
+                try:
+                    value = to_python(value)
+                except ValidationError as exc:
+                    errors[name] = exc
+            kwargs[attname] = value
+        if errors:
+            raise ValidationError(errors)
+        return kwargs
+
+    return convert
+
+
+_MISSING = object()
+
+
+def _memoize(to_python: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Keep the conversions of the strings in a memo."""
+    memo: Dict[str, Any] = {}
+
+    def convert(value):
+        """Convert the value, or get the conversion of the same string."""
+        if type(value) is not str:
+            return to_python(value)
+        try:
+            return memo[value]
+        except KeyError:
+            pass
+        result = to_python(value)
+        if len(memo) < MEMO_SIZE:
+            memo[value] = result
+        return result
+
+    return convert
@@ -13,10 +13,20 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from typing import Any, TypeVar
+from typing import Any, Callable, Dict, Iterable, Set, TypeVar
+
+from django.db.models.fields import Field
 
 _R = TypeVar("_R", bound=Any)
 
+MEMO_INTERNAL_TYPES: Set[str]
+MEMO_SIZE: int
+
 
 def cast_value(value: Any, filter_value: _R) -> _R:
     ...
+
+
+def compile_row_converter(fields: Iterable[Field], memoize: bool = ...) \
+        -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    ...
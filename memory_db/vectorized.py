@@ -0,0 +1,292 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import array
+import datetime
+import operator
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from django.core.exceptions import ImproperlyConfigured
+
+from memory_db.aggregates import MISSING
+from memory_db.columnar import ARRAY_TYPECODES, MemoryColumnarSnapshot
+from memory_db.lookups import MemoryCondition
+from memory_db.utils import cast_value
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+if TYPE_CHECKING:
+    from .aggregates import MemoryAggregate
+    from .lookups import Condition
+
+DTYPES = {'q': 'int64', 'd': 'float64', 'b': 'bool'}
+NUMPY_AGGREGATES = {'Count', 'Sum', 'Avg', 'Min', 'Max'}
+OPERATORS = {
+    'exact': operator.eq,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'gt': operator.gt,
+    'gte': operator.ge,
+}
+
+
+class Vector:
+    """
+    Numpy array of a column.
+
+    `nulls` is the mask of the null values (None when no value is null), `sample` a value of
+    the python type of the column used to cast the filter values.
+    """
+
+    def __init__(self, values, nulls, sample: Any):
+        self.values = values
+        self.nulls = nulls
+        self.sample = sample
+
+    def accepts(self, value: Any) -> bool:
+        """Return True if the value can be compared to the array items as python would do."""
+        if isinstance(self.sample, datetime.date):
+            return type(value) is datetime.date
+        return type(value) in (int, float, bool)
+
+    def not_null(self, mask):
+        """Exclude the null values from the mask."""
+        if self.nulls is None:
+            return mask
+        return mask & ~self.nulls
+
+    def sort_key(self, positions, reverse: bool = False):
+        """Return the values at the positions as numbers sorted as the values."""
+        values = self.values[positions]
+        if values.dtype.kind == 'M':
+            values = values.view('int64')
+        elif values.dtype.kind == 'b':
+            values = values.astype('int8')
+        if not reverse:
+            return values
+        if values.dtype.kind == 'i' and len(values) and values.min() == numpy.iinfo('int64').min:
+            values = numpy.unique(values, return_inverse=True)[1]
+        return -values
+
+    @classmethod
+    def from_column(cls, internal_type: str, data: Any) -> Optional['Vector']:
+        """Convert the column data, return None when the values can't be converted."""
+        if isinstance(data, array.array):
+            values = numpy.frombuffer(data, dtype=DTYPES[data.typecode])
+            return cls(values, None, ARRAY_TYPECODES[internal_type][1]())
+        if internal_type in ARRAY_TYPECODES:
+            type_ = ARRAY_TYPECODES[internal_type][1]
+            if not all(value is None or type(value) is type_ for value in data):
+                return None
+            nulls = numpy.fromiter((value is None for value in data), dtype='bool', count=len(data))
+            try:
+                values = numpy.array([type_() if value is None else value for value in data],
+                                     dtype=DTYPES[ARRAY_TYPECODES[internal_type][0]])
+            except OverflowError:
+                return None
+            return cls(values, nulls, type_())
+        if internal_type == 'DateField':
+            if not all(value is None or type(value) is datetime.date for value in data):
+                return None
+            values = numpy.array(data, dtype='datetime64[D]')
+            return cls(values, numpy.isnat(values), datetime.date.min)
+        return None
+
+
+class MemoryNumpySnapshot(MemoryColumnarSnapshot):
+    """
+    Columnar snapshot evaluated with numpy.
+
+    The numbers, booleans and dates columns are converted to numpy arrays on their first use.
+    The `exact`, `in`, `lt`, `lte`, `gt`, `gte` and `isnull` lookups on these columns are
+    evaluated as boolean masks and order_by() use a stable argsort. The Count, Sum, Avg, Min
+    and Max aggregates of the numbers columns are computed on the arrays. Other lookups,
+    orderings and aggregates are evaluated by MemoryColumnarSnapshot.
+
+    Null values never match a comparison, where python would raise TypeError.
+    """
+
+    def __init__(self, model, rows: Iterable[Any], version: int = 0):
+        if numpy is None:
+            raise ImproperlyConfigured('MemoryNumpySnapshot requires numpy')
+        super().__init__(model, rows, version)
+        self.vectors: Dict[str, Optional[Vector]] = {}
+
+    def get_vector(self, path: str) -> Optional[Vector]:
+        """Return the numpy array of the field column, or None if it can't be converted."""
+        try:
+            return self.vectors[path]
+        except KeyError:
+            pass
+        vector = None
+        if path in self.columns:
+            internal_type = self.model._meta.get_field(path).get_internal_type()
+            vector = Vector.from_column(internal_type, self.columns[path].data)
+        self.vectors[path] = vector
+        return vector
+
+    def mask(self, lookup: 'Condition'):
+        """Return the boolean mask of the objects matching the lookup, or None."""
+        if isinstance(lookup, MemoryCondition):
+            return self._condition_mask(lookup)
+        vector = self.get_vector(lookup.path)
+        if vector is None:
+            return None
+        function_name = lookup.function_name
+        filter_value = lookup.filter_value
+        if function_name == 'isnull':
+            if type(filter_value) is not bool:
+                return None
+            if vector.nulls is None:
+                return numpy.full(len(vector.values), not filter_value)
+            return vector.nulls if filter_value else ~vector.nulls
+        if function_name == 'in':
+            if (
+                not isinstance(filter_value, (list, tuple, set, frozenset))
+                or not all(vector.accepts(value) for value in filter_value)
+            ):
+                return None
+            dtype = vector.values.dtype if vector.values.dtype.kind == 'M' else None
+            items = numpy.array(list(filter_value), dtype=dtype)
+            return vector.not_null(numpy.isin(vector.values, items))
+        if function_name not in OPERATORS:
+            return None
+        filter_value = cast_value(vector.sample, filter_value)
+        if filter_value is None and function_name == 'exact':
+            return vector.nulls if vector.nulls is not None else \
+                numpy.zeros(len(vector.values), dtype='bool')
+        if not vector.accepts(filter_value):
+            return None
+        if isinstance(filter_value, datetime.date):
+            filter_value = numpy.datetime64(filter_value, 'D')
+        try:
+            mask = OPERATORS[function_name](vector.values, filter_value)
+        except OverflowError:
+            return None
+        return vector.not_null(mask)
+
+    def _condition_mask(self, condition: MemoryCondition):
+        """Combine the masks of the children of the condition, or None."""
+        combine = operator.or_ if condition.connector == condition.OR else operator.and_
+        mask = None
+        for child in condition.children:
+            child_mask = self.mask(child)
+            if child_mask is None:
+                return None
+            mask = child_mask if mask is None else combine(mask, child_mask)
+        if mask is None:
+            return None
+        return ~mask if condition.negated else mask
+
+    def filter(  # noqa: A003
+        self, positions: Iterable[int], lookups: List['Condition'], negated: bool = False
+    ) -> Iterable[int]:
+        """
+        Loop over the positions of the objects matching all the lookups (or not).
+
+        The lookups evaluated as masks are combined, the others are tested on the remaining
+        positions.
+        """
+        mask = None
+        remaining = []
+        for lookup in lookups:
+            lookup_mask = self.mask(lookup)
+            if lookup_mask is None:
+                remaining.append(lookup)
+            else:
+                mask = lookup_mask if mask is None else mask & lookup_mask
+        if mask is None or (negated and remaining):
+            return super().filter(positions, lookups, negated)
+        if negated:
+            mask = ~mask
+        if self.is_all(positions):
+            result = numpy.flatnonzero(mask)
+        else:
+            result = numpy.fromiter(positions, dtype='intp')
+            result = result[mask[result]]
+        if remaining:
+            return super().filter(result.tolist(), remaining)
+        return result.tolist()
+
+    def aggregate(self, positions: Iterable[int], aggregates: Dict[str, 'MemoryAggregate']) \
+            -> Dict[str, Any]:
+        """Compute the aggregates, the positions are read in a list for the numpy ones."""
+        if not isinstance(positions, (list, range)):
+            positions = list(positions)
+        return super().aggregate(positions, aggregates)
+
+    def aggregate_shortcut(self, positions: Iterable[int], aggregate: 'MemoryAggregate') -> Any:
+        """
+        Compute the aggregates without filter nor distinct of the numbers arrays with numpy.
+
+        The sums of integers which may overflow 64 bits are computed by python.
+        """
+        result = super().aggregate_shortcut(positions, aggregate)
+        if (
+            result is not MISSING or aggregate.name not in NUMPY_AGGREGATES or aggregate.lookups
+            or aggregate.distinct or aggregate.path is None
+        ):
+            return result
+        vector = self.get_vector(aggregate.path)
+        if vector is None or vector.values.dtype.kind not in 'if':
+            return MISSING
+        values = vector.values
+        nulls = vector.nulls
+        if not self.is_all(positions):
+            selected = numpy.fromiter(positions, dtype='intp')
+            values = values[selected]
+            nulls = None if nulls is None else nulls[selected]
+        if nulls is not None:
+            values = values[~nulls]
+        if aggregate.name == 'Count':
+            return len(values)
+        if not len(values):
+            return None
+        if aggregate.name == 'Min':
+            return values.min().item()
+        if aggregate.name == 'Max':
+            return values.max().item()
+        if values.dtype.kind == 'i':
+            bound = max(-int(values.min()), int(values.max()))
+            if bound * len(values) > numpy.iinfo('int64').max:
+                return MISSING
+        total = values.sum().item()
+        return total if aggregate.name == 'Sum' else total / len(values)
+
+    def order(
+        self,
+        positions: Iterable[int],
+        keys: List[Tuple[str, bool]],
+        limit: Optional[int] = None
+    ) -> Iterable[int]:
+        """Order the positions with a stable lexsort when all the keys are not null arrays."""
+        vectors = [self.get_vector(path) for path, _ in keys]
+        if any(
+            vector is None or vector.nulls is not None and vector.nulls.any() for vector in vectors
+        ):
+            return super().order(positions, keys, limit)
+        if self.is_all(positions):
+            positions = numpy.arange(len(self))
+        else:
+            positions = numpy.fromiter(positions, dtype='intp')
+        sort_keys = [
+            vector.sort_key(positions, reverse)  # type: ignore
+            for vector, (_, reverse) in zip(vectors, keys)
+        ]
+        # lexsort sort by the last key first
+        return positions[numpy.lexsort(sort_keys[::-1])][:limit].tolist()
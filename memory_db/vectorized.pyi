@@ -0,0 +1,82 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, TypeVar
+
+from memory_db.aggregates import MemoryAggregate
+from memory_db.columnar import MemoryColumnarSnapshot
+from memory_db.lookups import Condition
+from memory_db.models import MemoryModel
+
+_T = TypeVar("_T", bound=MemoryModel, covariant=True)
+
+DTYPES: Dict[str, str]
+NUMPY_AGGREGATES: Set[str]
+OPERATORS: Dict[str, Callable[[Any, Any], Any]]
+
+
+class Vector:
+    values: Any = ...
+    nulls: Any = ...
+    sample: Any = ...
+
+    def __init__(self, values: Any, nulls: Any, sample: Any):
+        ...
+
+    def accepts(self, value: Any) -> bool:
+        ...
+
+    def not_null(self, mask: Any) -> Any:
+        ...
+
+    def sort_key(self, positions: Any, reverse: bool = ...) -> Any:
+        ...
+
+    @classmethod
+    def from_column(cls, internal_type: str, data: Any) -> Optional['Vector']:
+        ...
+
+
+class MemoryNumpySnapshot(MemoryColumnarSnapshot[_T]):
+    vectors: Dict[str, Optional[Vector]] = ...
+
+    def __init__(self, model: Type[_T], rows: Iterable[_T], version: int = ...):
+        ...
+
+    def get_vector(self, path: str) -> Optional[Vector]:
+        ...
+
+    def mask(self, lookup: Condition) -> Any:
+        ...
+
+    def filter(  # noqa: A003
+        self, positions: Iterable[int], lookups: List[Condition], negated: bool = ...
+    ) -> Iterable[int]:
+        ...
+
+    def aggregate(self, positions: Iterable[int], aggregates: Dict[str, MemoryAggregate]) \
+            -> Dict[str, Any]:
+        ...
+
+    def aggregate_shortcut(self, positions: Iterable[int], aggregate: MemoryAggregate) -> Any:
+        ...
+
+    def order(
+        self,
+        positions: Iterable[int],
+        keys: List[Tuple[str, bool]],
+        limit: Optional[int] = ...
+    ) -> Iterable[int]:
+        ...
@@ -62,5 +62,9 @@ setup(
     install_requires=[
         'Django',
         'cached_property>1,<2',
-    ]
+    ],
+    extras_require={
+        'numpy': ['numpy'],
+        'yaml': ['PyYAML'],
+    },
 )
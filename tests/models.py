@@ -87,3 +87,5 @@ class TestMemoryModel(MemoryModel):
             pk,
             CharField(name='value'),
         ]
+        indexes = ['value']
+        sorted_indexes = ['id', 'value']
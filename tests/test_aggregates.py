@@ -0,0 +1,387 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import statistics
+from decimal import Decimal
+from typing import Iterable, List
+from unittest import mock, TestCase
+
+from django.db import NotSupportedError
+from django.db.models import Aggregate, Avg, CharField, Count, F, Field, FloatField, \
+    IntegerField, Max, Min, Q, StdDev, Sum, Value, Variance
+
+from memory_db import MemoryManager, MemoryMeta, MemoryModel
+from memory_db.aggregates import Accumulator, AvgAccumulator, CountAccumulator, MaxAccumulator, \
+    MemoryAggregate, MinAccumulator, StdDevAccumulator, SumAccumulator, VarianceAccumulator
+from memory_db.columnar import MemoryColumnarSnapshot
+from memory_db.snapshot import MemorySnapshot
+
+
+class AggregateManager(MemoryManager):
+    """Manager of the aggregated model."""
+
+    def get_all(self) -> List['AggregateModel']:
+        """Create test models."""
+        return [
+            AggregateModel(pk=1, name='One', score=4, price=1.5),
+            AggregateModel(pk=2, name='Two', score=None, price=2.5),
+            AggregateModel(pk=3, name='One', score=1, price=0.5),
+            AggregateModel(pk=4, name='Three', score=4, price=2.5),
+            AggregateModel(pk=5, name=None, score=7, price=1.5),
+        ]
+
+
+class ColumnarAggregateManager(AggregateManager):
+    """Same data in columns."""
+
+    snapshot_class = MemoryColumnarSnapshot
+
+
+class AggregateModel(MemoryModel):
+    """Model aggregated by the tests."""
+
+    objects = AggregateManager()
+    columnar = ColumnarAggregateManager()
+
+    class Meta(MemoryMeta):
+        """Test model parameters."""
+
+        pk: Field = IntegerField(primary_key=True, name='id')
+        fields: Iterable[Field] = [
+            pk,
+            CharField(name='name', null=True),
+            IntegerField(name='score', null=True),
+            FloatField(name='price'),
+        ]
+        indexes = ['name']
+        sorted_indexes = ['score']
+
+
+class TestAccumulators(TestCase):
+    """Test the accumulators of the aggregates values."""
+
+    def accumulate(self, accumulator, values):
+        """Add the values to the accumulator, return its result."""
+        for value in values:
+            accumulator.add(value)
+        return accumulator.result()
+
+    def test_accumulators(self):
+        """Test the results of the accumulators, the null values are ignored."""
+        values = [3, None, 1, 3, 5]
+        tests = [
+            (CountAccumulator(), 4),
+            (CountAccumulator(distinct=True), 3),
+            (SumAccumulator(), 12),
+            (SumAccumulator(distinct=True), 9),
+            (AvgAccumulator(), 3),
+            (MinAccumulator(), 1),
+            (MaxAccumulator(), 5),
+            (VarianceAccumulator(), statistics.pvariance([3, 1, 3, 5])),
+            (VarianceAccumulator(sample=True), statistics.variance([3, 1, 3, 5])),
+            (StdDevAccumulator(), statistics.pstdev([3, 1, 3, 5])),
+        ]
+        for accumulator, expected_result in tests:
+            with self.subTest(accumulator=accumulator.__class__.__name__):
+                self.assertAlmostEqual(self.accumulate(accumulator, values), expected_result)
+
+    def test_decimal(self):
+        """Test the variance and the standard deviation of decimal values."""
+        values = [Decimal('3.5'), Decimal('1.25'), Decimal('3'), Decimal('5')]
+        variance = self.accumulate(VarianceAccumulator(), values)
+        self.assertIsInstance(variance, Decimal)
+        self.assertAlmostEqual(variance, statistics.pvariance(values))
+        self.assertAlmostEqual(
+            self.accumulate(VarianceAccumulator(sample=True), values), statistics.variance(values)
+        )
+        self.assertAlmostEqual(
+            self.accumulate(StdDevAccumulator(), values), float(statistics.pstdev(values))
+        )
+
+    def test_no_values(self):
+        """Test the results without values: 0 for Count, None for the others."""
+        self.assertEqual(self.accumulate(CountAccumulator(), [None]), 0)
+        for accumulator_class in (SumAccumulator, AvgAccumulator, MinAccumulator, MaxAccumulator):
+            with self.subTest(accumulator=accumulator_class.__name__):
+                self.assertIsNone(self.accumulate(accumulator_class(), [None]))
+        self.assertIsNone(self.accumulate(VarianceAccumulator(sample=True), [1]))
+
+    def test_abstract(self):
+        """Test the accumulators must implement accumulate and result."""
+        with self.assertRaises(NotImplementedError):
+            Accumulator().add(1)
+        with self.assertRaises(NotImplementedError):
+            Accumulator().result()
+
+
+class TestMemoryAggregate(TestCase):
+    """Test the compilation of the django aggregates."""
+
+    def test_compile(self):
+        """Test the path, the arguments and the accumulator of the aggregates."""
+        result = MemoryAggregate(AggregateModel, Count('pk', distinct=True, filter=Q(score=4)))
+
+        self.assertEqual((result.name, result.path, result.distinct), ('Count', 'id', True))
+        self.assertEqual([lookup.path for lookup in result.lookups], ['score'])
+        self.assertIsNone(MemoryAggregate(AggregateModel, Count('*')).path)
+        self.assertTrue(MemoryAggregate(AggregateModel, StdDev('score', sample=True)).sample)
+        self.assertIsInstance(
+            MemoryAggregate(AggregateModel, Variance('score')).accumulator(), VarianceAccumulator
+        )
+
+    def test_not_supported(self):
+        """Test the expressions of other values than a field are not supported."""
+
+        class Median(Aggregate):
+            """Aggregate without accumulator."""
+
+            function = 'MEDIAN'
+            name = 'Median'
+
+        tests = [
+            (Sum(F('score') * 2), 'Sum of .* is not supported'),
+            (Median('score'), 'Median aggregate is not supported'),
+        ]
+        for aggregate, expected_message in tests:
+            with self.subTest(aggregate=aggregate):
+                with self.assertRaisesRegex(NotSupportedError, expected_message):
+                    MemoryAggregate(AggregateModel, aggregate)
+
+    def test_repr(self):
+        """Test the aggregate representation."""
+        self.assertEqual(
+            repr(MemoryAggregate(AggregateModel, Count('*'))), '<MemoryAggregate: Count(*)>'
+        )
+        self.assertEqual(
+            repr(MemoryAggregate(AggregateModel, Max('score'))), '<MemoryAggregate: Max(score)>'
+        )
+
+
+class TestAggregate(TestCase):
+    """Test MemoryQuerySet.aggregate."""
+
+    def test_aggregate(self):
+        """Test the aggregates of the objects."""
+        for manager in (AggregateModel.objects, AggregateModel.columnar):
+            with self.subTest(snapshot=manager.snapshot_class.__name__):
+                result = manager.exclude(pk=1).aggregate(
+                    Count('score'),
+                    Sum('price'),
+                    avg=Avg('score'),
+                    count=Count('*'),
+                    high=Count('pk', filter=Q(score__in=[4, 7])),
+                    names=Count('name', distinct=True),
+                    deviation=StdDev('price'),
+                )
+
+                self.assertEqual(
+                    list(result),
+                    ['avg', 'count', 'high', 'names', 'deviation', 'score__count', 'price__sum']
+                )
+                self.assertEqual(result['score__count'], 3)
+                self.assertEqual(result['price__sum'], 7.0)
+                self.assertEqual(result['avg'], 4)
+                self.assertEqual(result['count'], 4)
+                self.assertEqual(result['high'], 2)
+                self.assertEqual(result['names'], 3)
+                self.assertAlmostEqual(result['deviation'], statistics.pstdev([2.5, 0.5, 2.5, 1.5]))
+
+    def test_empty(self):
+        """Test the aggregates of no objects."""
+        result = AggregateModel.objects.filter(
+            pk=0
+        ).aggregate(count=Count('pk'), total=Sum('score'), low=Min('score'))
+
+        self.assertEqual(result, {'count': 0, 'total': None, 'low': None})
+
+    def test_single_pass(self):
+        """Test the values are read once for all the aggregates."""
+        queryset = AggregateModel.objects.filter(price__gt=1)
+        with mock.patch.object(
+            MemorySnapshot, 'value_getter', autospec=True, side_effect=MemorySnapshot.value_getter
+        ) as value_getter:
+            result = queryset.aggregate(
+                total=Sum('score'), high=Max('score'), low=Min('score'), average=Avg('price')
+            )
+
+        self.assertEqual(result, {'total': 15, 'high': 7, 'low': 4, 'average': 2.0})
+        self.assertEqual(
+            sorted(call[0][1] for call in value_getter.call_args_list), ['price', 'score']
+        )
+
+    def test_index(self):
+        """Test the aggregates read from the indexes of all the objects."""
+        with mock.patch.object(MemorySnapshot, 'value_getter') as value_getter:
+            result = AggregateModel.objects.aggregate(
+                count=Count('*'),
+                scores=Count('score'),
+                low=Min('score'),
+                high=Max('score'),
+                names=Count('name', distinct=True),
+            )
+
+        self.assertEqual(result, {'count': 5, 'scores': 4, 'low': 1, 'high': 7, 'names': 3})
+        value_getter.assert_not_called()
+        snapshot = MemorySnapshot(AggregateModel, [AggregateModel(pk=1, price=1.0)])
+        aggregates = {
+            'low': MemoryAggregate(AggregateModel, Min('score')),
+            'high': MemoryAggregate(AggregateModel, Max('score')),
+        }
+        self.assertEqual(snapshot.aggregate(range(1), aggregates), {'low': None, 'high': None})
+
+    def test_default(self):
+        """Test the default value of the aggregates without values."""
+        if not hasattr(Sum('score'), 'default'):
+            self.skipTest('Aggregate default requires django 4.0')
+        result = AggregateModel.objects.filter(pk=2).aggregate(total=Sum('score', default=0))
+
+        self.assertEqual(result, {'total': 0})
+
+    def test_errors(self):
+        """Test the invalid aggregates."""
+        with self.assertRaisesRegex(TypeError, 'Complex aggregates require an alias'):
+            AggregateModel.objects.aggregate(Sum(F('score') + 1))
+        with self.assertRaisesRegex(TypeError, 'score is not an aggregate expression'):
+            AggregateModel.objects.aggregate(score=F('score'))
+
+
+class TestAnnotate(TestCase):
+    """Test MemoryQuerySet.annotate."""
+
+    def test_group(self):
+        """Test the aggregates of the values groups, in the order of their first object."""
+        for manager in (AggregateModel.objects, AggregateModel.columnar):
+            with self.subTest(snapshot=manager.snapshot_class.__name__):
+                result = manager.values('name').annotate(
+                    total=Sum('price'), count=Count('*'), scored=Count('score')
+                )
+
+                self.assertEqual(
+                    list(result), [
+                        {
+                            'name': 'One',
+                            'total': 2.0,
+                            'count': 2,
+                            'scored': 2
+                        },
+                        {
+                            'name': 'Two',
+                            'total': 2.5,
+                            'count': 1,
+                            'scored': 0
+                        },
+                        {
+                            'name': 'Three',
+                            'total': 2.5,
+                            'count': 1,
+                            'scored': 1
+                        },
+                        {
+                            'name': None,
+                            'total': 1.5,
+                            'count': 1,
+                            'scored': 1
+                        },
+                    ]
+                )
+
+    def test_group_queryset(self):
+        """Test the groups can be filtered, ordered, sliced and aggregated."""
+        groups = AggregateModel.objects.filter(
+            pk__gt=1
+        ).values_list('name').annotate(Max('score'), total=Sum('price'))
+
+        self.assertEqual(groups.count(), 4)
+        self.assertEqual(
+            list(groups.order_by('-score__max')), [('Two', None, 2.5), (None, 7, 1.5),
+                                                   ('Three', 4, 2.5), ('One', 1, 0.5)]
+        )
+        self.assertEqual(list(groups.filter(total__gt=2).order_by('name')[:1]), [('Three', 4, 2.5)])
+        self.assertEqual(groups.aggregate(average=Avg('total')), {'average': 1.75})
+
+    def test_single_pass(self):
+        """Test the groups are hashed without ordering the objects."""
+        with mock.patch.object(MemorySnapshot, 'order') as order:
+            result = AggregateModel.objects.values('score').annotate(count=Count('pk'))
+
+            self.assertEqual(
+                list(result), [{
+                    'score': 4,
+                    'count': 2
+                }, {
+                    'score': None,
+                    'count': 1
+                }, {
+                    'score': 1,
+                    'count': 1
+                }, {
+                    'score': 7,
+                    'count': 1
+                }]
+            )
+        order.assert_not_called()
+
+    def test_objects(self):
+        """Test the annotations of each object."""
+        queryset = AggregateModel.objects.annotate(
+            cost=F('price'), kind=Value('item'), scored=Count('score')
+        )
+
+        self.assertEqual([(obj.pk, obj.cost, obj.kind, obj.scored) for obj in queryset],
+                         [(1, 1.5, 'item', 1), (2, 2.5, 'item', 0), (3, 0.5, 'item', 1),
+                          (4, 2.5, 'item', 1), (5, 1.5, 'item', 1)])
+        self.assertEqual(
+            list(queryset.filter(cost__lt=2).order_by('-cost').values_list('pk', 'scored')),
+            [(1, 1), (5, 1), (3, 1)]
+        )
+        self.assertFalse(hasattr(AggregateModel.objects.get(pk=1), 'cost'))
+
+    def test_values_without_aggregate(self):
+        """Test the F() and Value() annotations of the selected values are not grouped."""
+        result = AggregateModel.objects.filter(
+            pk__lte=3
+        ).values('name').annotate(cost=F('price'), kind=Value('item'))
+
+        self.assertEqual(
+            list(result.values_list('name', 'cost', 'kind')),
+            [('One', 1.5, 'item'), ('Two', 2.5, 'item'), ('One', 0.5, 'item')],
+        )
+
+    def test_errors(self):
+        """Test the invalid annotations."""
+        with self.assertRaisesRegex(ValueError, "'price' conflicts with a field"):
+            AggregateModel.objects.annotate(price=F('score'))
+        with self.assertRaises(NotSupportedError):
+            AggregateModel.objects.annotate(double=F('price') * 2)
+        with self.assertRaises(NotSupportedError):
+            AggregateModel.objects.values('name').annotate(total=Sum('price')).update(name='')
+
+    def test_slots(self):
+        """Test the objects with slots can't be annotated."""
+
+        class SlotsModel(MemoryModel):
+            """Model storing its fields in slots."""
+
+            objects = AggregateManager()
+
+            class Meta(MemoryMeta):
+                """Test model parameters."""
+
+                pk: Field = IntegerField(primary_key=True, name='id')
+                fields = [pk]
+                slots = True
+
+        with self.assertRaisesRegex(NotSupportedError, 'SlotsModel objects with slots'):
+            SlotsModel.objects.annotate(kind=Value('item'))
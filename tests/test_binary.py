@@ -0,0 +1,225 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
+import operator
+import os
+import subprocess  # nosec
+import sys
+import tempfile
+from typing import Iterable, List
+from unittest import mock, TestCase
+
+from django.db.models import BooleanField, CharField, DateField, Field, FloatField, IntegerField
+
+from memory_db import MemoryManager, MemoryMeta, MemoryModel
+from memory_db.binary import dump_snapshot, fields_fingerprint, HEADER_LENGTH, MAGIC, \
+    MemoryMappedSnapshot
+from memory_db.indexes import SortedIndex
+from tests.utils import run
+
+
+class BinaryManager(MemoryManager):
+    """Manager dumping its data in a binary file."""
+
+    loads = 0
+    version_key = 1
+
+    def get_source_key(self) -> int:
+        """Return the version of the test data."""
+        return self.version_key
+
+    def get_all(self) -> Iterable['BinaryModel']:
+        """Create test models."""
+        self.loads += 1
+        return [
+            BinaryModel(pk=1, name='One', price=1.5, active=True, date=datetime.date(2020, 1, 1)),
+            BinaryModel(pk=2, name='Two', price=2.5, active=False, count=2),
+            BinaryModel(pk=3, name=None, price=0.5, active=True, count=3),
+            BinaryModel(pk=4, name='One', price=2.5, active=False, count=2**64),
+        ]
+
+
+class BinaryModel(MemoryModel):
+    """Test model."""
+
+    objects = BinaryManager()
+
+    class Meta(MemoryMeta):
+        """Test model options."""
+
+        pk: Field = IntegerField(primary_key=True, name='id')
+        fields: Iterable[Field] = [
+            pk,
+            CharField(name='name', null=True),
+            FloatField(name='price'),
+            BooleanField(name='active'),
+            IntegerField(name='count', null=True),
+            DateField(name='date', null=True),
+        ]
+        sorted_indexes = ['price']
+
+
+class DefaultsModel(MemoryModel):
+    """Model with callable defaults, their repr hold their address."""
+
+    class Meta(MemoryMeta):
+        """Test model options."""
+
+        pk: Field = IntegerField(primary_key=True, name='id')
+        fields: Iterable[Field] = [
+            pk,
+            DateField(name='date', default=datetime.date.today),
+            IntegerField(name='count', default=lambda: 0),
+            CharField(name='name', default='One'),
+        ]
+
+
+def rows(objects: Iterable[BinaryModel]) -> List[tuple]:
+    """Return the fields values of the objects."""
+    return list(map(operator.attrgetter('pk', 'name', 'price', 'active', 'count', 'date'), objects))
+
+
+class TestMemoryMappedSnapshot(TestCase):
+    """Test the binary snapshot files."""
+
+    def setUp(self):
+        """Dump the snapshot files in a temporary directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'snapshot')
+        manager = BinaryModel.objects
+        for name, value in [('snapshot_path', self.path), ('loads', 0), ('version_key', 1)]:
+            patch = mock.patch.object(manager, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+        manager.invalidate()
+        self.addCleanup(manager.invalidate)
+
+    def test_dump(self):
+        """Test the values and the indexes are read back from the file."""
+        rows_ = BinaryModel.objects.get_all()
+        snapshot = BinaryModel.objects.snapshot_class(BinaryModel, rows_)
+
+        dump_snapshot(snapshot, self.path, 'key')
+        result = MemoryMappedSnapshot.open(BinaryModel, self.path, 'key')
+
+        self.assertEqual(rows(result), rows(rows_))
+        self.assertEqual(type(result.columns['id'].data), memoryview)
+        self.assertEqual(type(result.columns['name'].data), memoryview)
+        self.assertIs(list(result.values('active'))[0], True)
+        self.assertIn(('price', SortedIndex), result.indexes)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['snapshot'])
+
+    def test_dump_deleted(self):
+        """Test the deleted objects are not written."""
+        snapshot = BinaryModel.objects.snapshot_class(BinaryModel, BinaryModel.objects.get_all())
+        snapshot = snapshot.changed(1, deleted=[1])
+
+        dump_snapshot(snapshot, self.path)
+        result = MemoryMappedSnapshot(BinaryModel, self.path)
+
+        self.assertEqual([obj.pk for obj in result], [1, 3, 4])
+        self.assertEqual(result.indexes['price', SortedIndex].lookup('gt', 1), [0, 2])
+
+    def test_dump_error(self):
+        """Test the temporary file is removed when the dump fails."""
+        snapshot = BinaryModel.objects.snapshot_class(BinaryModel, [])
+
+        with mock.patch('os.replace', side_effect=OSError):
+            with self.assertRaises(OSError):
+                dump_snapshot(snapshot, self.path)
+
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [])
+
+    def test_open_single_descriptor(self):
+        """Test the header and the map are read from the same open file."""
+        snapshot = BinaryModel.objects.snapshot_class(BinaryModel, BinaryModel.objects.get_all())
+        dump_snapshot(snapshot, self.path, 'key')
+
+        with mock.patch('memory_db.binary.open', create=True, wraps=open) as open_:
+            result = MemoryMappedSnapshot.open(BinaryModel, self.path, 'key')
+
+        self.assertEqual(len(result), 4)
+        open_.assert_called_once_with(self.path, 'rb')
+
+    def test_fingerprint(self):
+        """Test the fingerprint of the fields is the same in another process."""
+        code = (
+            'from memory_db.binary import fields_fingerprint\n'
+            'from tests.test_binary import DefaultsModel\n'
+            'print(fields_fingerprint(DefaultsModel))'
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        result = subprocess.run([sys.executable, '-c', code],
+                                cwd=root,
+                                stdout=subprocess.PIPE,
+                                check=True,
+                                universal_newlines=True)
+
+        self.assertEqual(result.stdout.strip(), fields_fingerprint(DefaultsModel))
+        self.assertNotEqual(fields_fingerprint(DefaultsModel), fields_fingerprint(BinaryModel))
+
+    def test_open_invalid(self):
+        """Test None is returned when the file can't be used."""
+        snapshot = BinaryModel.objects.snapshot_class(BinaryModel, [])
+        dump_snapshot(snapshot, self.path, 'key')
+
+        self.assertIsNone(MemoryMappedSnapshot.open(BinaryModel, self.path, 'other key'))
+        self.assertIsNone(MemoryMappedSnapshot.open(BinaryModel, self.path + '.missing'))
+        with mock.patch('memory_db.binary.fields_fingerprint', return_value='other'):
+            self.assertIsNone(MemoryMappedSnapshot.open(BinaryModel, self.path, 'key'))
+
+        with open(self.path, 'wb') as stream:
+            stream.write(b'not a snapshot')
+
+        self.assertIsNone(MemoryMappedSnapshot.open(BinaryModel, self.path, 'key'))
+        with self.assertRaises(ValueError):
+            MemoryMappedSnapshot(BinaryModel, self.path)
+
+        with open(self.path, 'wb') as stream:
+            stream.write(MAGIC + HEADER_LENGTH.pack(8) + b'corrupt!')
+
+        self.assertIsNone(MemoryMappedSnapshot.open(BinaryModel, self.path, 'key'))
+
+    def test_manager(self):
+        """Test the manager read the file until the source key change."""
+        manager = BinaryModel.objects
+
+        self.assertEqual([obj.pk for obj in manager.filter(price__gt=1)], [1, 2, 4])
+        self.assertEqual(manager.loads, 1)
+
+        manager.invalidate()
+
+        self.assertEqual(manager.filter(name='One').count(), 2)
+        self.assertEqual(manager.loads, 1)
+        self.assertIsInstance(manager.get_snapshot(), MemoryMappedSnapshot)
+
+        manager.version_key = 2
+        manager.refresh()
+
+        self.assertEqual(manager.loads, 2)
+        self.assertEqual(manager.source_key, 2)
+
+    def test_manager_async(self):
+        """Test the async methods read the file in the executor."""
+        manager = BinaryModel.objects
+        manager.get_snapshot()
+        manager.invalidate()
+
+        self.assertEqual(run(manager.filter(name='One').acount()), 2)
+        self.assertEqual(manager.loads, 1)
+        self.assertIsInstance(manager.get_snapshot(), MemoryMappedSnapshot)
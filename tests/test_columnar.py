@@ -0,0 +1,171 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import array
+import datetime
+from typing import Iterable
+from unittest import TestCase
+
+from django.db import NotSupportedError
+
+from django.db.models import BooleanField, CharField, DateField, Field, FloatField, IntegerField
+
+from memory_db import MemoryManager, MemoryMeta, MemoryModel
+from memory_db.columnar import Column, MemoryColumnarSnapshot
+
+
+class ColumnarManager(MemoryManager):
+    """Manager storing its data by column."""
+
+    snapshot_class = MemoryColumnarSnapshot
+
+    def get_all(self) -> Iterable['ColumnarModel']:
+        """Create test models."""
+        return [
+            ColumnarModel(pk=1, name='One', price=1.5, active=True, date=datetime.date(2020, 1, 1)),
+            ColumnarModel(pk=2, name='Two', price=2.5, active=False, count=2),
+            ColumnarModel(pk=3, name='Three', price=0.5, active=True, count=3),
+        ]
+
+
+class ColumnarModel(MemoryModel):
+    """Test model."""
+
+    objects = ColumnarManager()
+
+    class Meta(MemoryMeta):
+        """Test model options."""
+
+        pk: Field = IntegerField(primary_key=True, name='id')
+        fields: Iterable[Field] = [
+            pk,
+            CharField(name='name'),
+            FloatField(name='price'),
+            BooleanField(name='active'),
+            IntegerField(name='count', null=True),
+            DateField(name='date', null=True),
+        ]
+        sorted_indexes = ['price']
+
+
+class TestColumn(TestCase):
+    """Test Column."""
+
+    def test_from_values(self):
+        """Test Column.from_values use the most compact storage."""
+        tests = [
+            (IntegerField(), [1, 2], array.array('q', [1, 2])),
+            (IntegerField(), [1, None], [1, None]),
+            (IntegerField(), [1, 2**64], [1, 2**64]),
+            (FloatField(), [1.5], array.array('d', [1.5])),
+            (BooleanField(), [True, False], array.array('b', [1, 0])),
+            (CharField(), ['One', None], ['One', None]),
+            (DateField(), [datetime.date(2020, 1, 1)], [datetime.date(2020, 1, 1)]),
+        ]
+        for field, values, expected_result in tests:
+            with self.subTest(field=field, values=values):
+                self.assertEqual(Column.from_values(field, values).data, expected_result)
+
+    def test_convert(self):
+        """Test boolean columns return booleans."""
+        column = Column.from_values(BooleanField(), [True, False])
+
+        self.assertEqual(list(column), [True, False])
+        self.assertIs(column.getter()(0), True)
+        self.assertEqual(len(column), 2)
+
+
+class TestMemoryColumnarSnapshot(TestCase):
+    """Test MemoryColumnarSnapshot."""
+
+    def test_snapshot(self):
+        """Test the snapshot keep the columns and not the objects."""
+        snapshot = ColumnarModel.objects.get_snapshot()
+
+        self.assertIsInstance(snapshot, MemoryColumnarSnapshot)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.columns['id'].data, array.array('q', [1, 2, 3]))
+        self.assertFalse(snapshot.is_source(ColumnarModel.objects.get_all()))
+        self.assertEqual([obj.name for obj in snapshot], ['One', 'Two', 'Three'])
+
+    def test_materialize(self):
+        """Test the objects are created from the columns."""
+        result = ColumnarModel.objects.get(pk=1)
+
+        self.assertIsInstance(result, ColumnarModel)
+        self.assertEqual(result.name, 'One')
+        self.assertIs(result.active, True)
+        self.assertEqual(result.date, datetime.date(2020, 1, 1))
+
+    def test_values(self):
+        """Test values are read from the columns."""
+        self.assertEqual(
+            list(ColumnarModel.objects.values_list('pk', 'name', 'active')),
+            [(1, 'One', True), (2, 'Two', False), (3, 'Three', True)],
+        )
+        self.assertEqual(
+            list(ColumnarModel.objects.values('count')),
+            [{
+                'count': None
+            }, {
+                'count': 2
+            }, {
+                'count': 3
+            }],
+        )
+
+    def test_value_getter(self):
+        """Test the paths which are not columns are read from the created objects."""
+        snapshot = ColumnarModel.objects.get_snapshot()
+
+        self.assertEqual(snapshot.value_getter('date.year')(0), 2020)
+        self.assertEqual(snapshot.value_getter('_meta.object_name')(1), 'ColumnarModel')
+        self.assertEqual(snapshot.value_getter('')(2).name, 'Three')
+
+    def test_filter(self):
+        """Test filters are evaluated on the columns."""
+        tests = [
+            (dict(active=True), [1, 3]),
+            (dict(active='false'), [2]),
+            (dict(price__gt=1), [1, 2]),
+            (dict(name__icontains='t', count__isnull=False), [2, 3]),
+            (dict(date__isnull=False, date__year=2020), [1]),
+        ]
+        for filters, expected_result in tests:
+            with self.subTest(filters=filters):
+                result = ColumnarModel.objects.filter(**filters).values_list('pk', flat=True)
+                self.assertEqual(list(result), expected_result)
+        result = ColumnarModel.objects.exclude(active=True,
+                                               price__lt=1).values_list('pk', flat=True)
+        self.assertEqual(list(result), [1, 2])
+
+    def test_order_by(self):
+        """Test order_by on the columns."""
+        result = ColumnarModel.objects.order_by('-price').values_list('pk', flat=True)
+
+        self.assertEqual(list(result), [2, 1, 3])
+
+        result = ColumnarModel.objects.order_by('name').values_list('pk', flat=True)
+
+        self.assertEqual(list(result), [1, 3, 2])
+
+    def test_read_only(self):
+        """Test the columnar snapshots can't be changed."""
+        with self.assertRaises(NotSupportedError):
+            ColumnarModel.objects.filter(pk=1).update(name='First')
+
+        self.assertEqual(ColumnarModel.objects.get(pk=1).name, 'One')
+        snapshot = ColumnarModel.objects.get_snapshot()
+        self.assertIsNone(snapshot.reloaded(ColumnarModel.objects.get_all(), 2))
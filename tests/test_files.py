@@ -0,0 +1,115 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import tempfile
+from typing import Iterable
+from unittest import mock, TestCase
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import CharField, Field, IntegerField
+
+from memory_db import MemoryMeta, MemoryModel
+from memory_db.files import CSVFileManager, JSONLinesFileManager, MemoryFileManager, \
+    YAMLFileManager
+from tests.utils import setup_django
+
+
+class FileModel(MemoryModel):
+    """Test model."""
+
+    csv: 'CSVFileManager[FileModel]' = CSVFileManager()
+    jsonl: 'JSONLinesFileManager[FileModel]' = JSONLinesFileManager()
+    yaml: 'YAMLFileManager[FileModel]' = YAMLFileManager()
+
+    class Meta(MemoryMeta):
+        """Test model options."""
+
+        pk: Field = IntegerField(primary_key=True, name='id')
+        fields: Iterable[Field] = [pk, CharField(name='name')]
+
+
+class TestFileManagers(TestCase):
+    """Test the file managers."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, manager: MemoryFileManager, content: str):
+        """Write the manager file."""
+        manager.path = os.path.join(self.directory.name, 'data')
+        with open(manager.path, 'w', encoding='utf8') as stream:
+            stream.write(content)
+        manager.invalidate()
+
+    @setup_django
+    def test_read(self):
+        """Test each manager parse its file format."""
+        tests = [
+            (FileModel.csv, 'id,name\n1,One\n2,"Two, 2"\n'),
+            (FileModel.jsonl, '{"id": 1, "name": "One"}\n\n{"id": "2", "name": "Two, 2"}\n'),
+            (FileModel.yaml, '- id: 1\n  name: One\n---\nid: 2\nname: Two, 2\n'),
+        ]
+        for manager, content in tests:
+            with self.subTest(manager=manager.__class__.__name__):
+                self.write(manager, content)
+
+                result = list(manager.values_list('pk', 'name'))
+
+                self.assertEqual(result, [(1, 'One'), (2, 'Two, 2')])
+                self.assertGreater(manager.load_duration, 0)
+
+    @setup_django
+    def test_reload(self):
+        """Test the file is read again only when it changed."""
+        manager = FileModel.jsonl
+        self.write(manager, '{"id": 1, "name": "One"}\n')
+        snapshot = manager.get_snapshot()
+
+        self.assertIs(manager.get_snapshot(), snapshot)
+
+        with open(manager.path, 'a', encoding='utf8') as stream:
+            stream.write('{"id": 2, "name": "Two"}\n')
+
+        self.assertEqual(manager.count(), 2)
+        self.assertIsNot(manager.get_snapshot(), snapshot)
+
+        os.remove(manager.path)
+
+        self.assertEqual(manager.count(), 2)
+
+    @setup_django
+    def test_check_data(self):
+        """Test the rows of the file are checked."""
+        self.write(FileModel.csv, 'id,name\n1,One\ntwo,Two\n3\n')
+
+        result = FileModel.csv.check_data(max_errors=1)
+
+        self.assertEqual([error.obj for error in result], ['row 2, column id'])
+
+    def test_path(self):
+        """Test a path is required."""
+        with mock.patch.object(FileModel.csv, 'path', None):
+            with self.assertRaisesRegex(ImproperlyConfigured, 'CSVFileManager is missing a path'):
+                FileModel.csv.refresh()
+
+    def test_without_yaml(self):
+        """Test an error is raised when PyYAML is not installed."""
+        self.write(FileModel.yaml, '')
+        with mock.patch('memory_db.files.yaml', None):
+            with self.assertRaises(ImproperlyConfigured):
+                FileModel.yaml.refresh()
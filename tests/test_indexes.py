@@ -0,0 +1,142 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from unittest import TestCase
+
+from memory_db.indexes import HashIndex, MemoryIndex, SortedIndex
+
+
+class TestMemoryIndex(TestCase):
+    """Test the MemoryIndex base class."""
+
+    def test_changed(self):
+        """Test the indexes must implement changed."""
+        with self.assertRaises(NotImplementedError):
+            MemoryIndex([1]).changed([], [(1, 2)])
+
+
+class TestHashIndex(TestCase):
+    """Test HashIndex."""
+
+    def setUp(self):
+        """Index test values."""
+        self.index = HashIndex([1, 'One', 2, None, 1, 'one'])
+
+    def test_exact(self):
+        """Test exact lookup probes."""
+        tests = [
+            (1, [0, 4]),
+            ('1', [0, 4]),
+            ('One', [1]),
+            (3, []),
+            (None, [3]),
+            ([1], None),
+        ]
+        for filter_value, expected_result in tests:
+            with self.subTest(filter_value=filter_value):
+                self.assertEqual(self.index.lookup('exact', filter_value), expected_result)
+
+    def test_iexact(self):
+        """Test iexact lookup probes."""
+        self.assertEqual(self.index.lookup('iexact', 'ONE'), [1, 5])
+        self.assertEqual(self.index.lookup('iexact', 'two'), [])
+        self.assertIsNone(self.index.lookup('iexact', None))
+
+    def test_in(self):
+        """Test in lookup probes."""
+        self.assertEqual(self.index.lookup('in', [2, 1]), [0, 2, 4])
+        self.assertEqual(self.index.lookup('in', ()), [])
+        self.assertIsNone(self.index.lookup('in', 'One'))
+
+    def test_not_indexed_lookup(self):
+        """Test other lookups can't use the index."""
+        self.assertIsNone(self.index.lookup('contains', 'O'))
+        self.assertEqual(len(self.index), 5)
+
+    def test_unhashable(self):
+        """Test unhashable values can't be indexed."""
+        with self.assertRaises(TypeError):
+            HashIndex([[1]])
+
+    def test_changed(self):
+        """Test HashIndex.changed return a new index with the changed positions."""
+        result = self.index.changed([(0, 1), (3, None)], [(0, 'one'), (6, 2)])
+
+        self.assertEqual(result.positions, {1: [4], 'One': [1], 2: [2, 6], 'one': [0, 5]})
+        self.assertEqual(result.lookup('iexact', 'ONE'), [0, 1, 5])
+        self.assertEqual(self.index.lookup('exact', None), [3])
+        self.assertEqual(self.index.lookup('iexact', 'ONE'), [1, 5])
+        with self.assertRaises(TypeError):
+            self.index.changed([], [(6, [1])])
+
+
+class TestSortedIndex(TestCase):
+    """Test SortedIndex."""
+
+    def setUp(self):
+        """Index test values."""
+        self.index = SortedIndex([3, 1, 2, 1, 3.0])
+
+    def test_range(self):
+        """Test range lookups bisection."""
+        tests = [
+            ('lt', 2, [1, 3]),
+            ('lte', 2, [1, 2, 3]),
+            ('gt', '2', [0, 4]),
+            ('gte', 2.0, [0, 2, 4]),
+            ('gte', 4, []),
+            ('lt', 'text', None),
+            ('exact', 1, None),
+        ]
+        for function_name, filter_value, expected_result in tests:
+            with self.subTest(function_name=function_name, filter_value=filter_value):
+                self.assertEqual(self.index.lookup(function_name, filter_value), expected_result)
+        self.assertEqual(SortedIndex([]).lookup('lt', 1), [])
+
+    def test_ordered(self):
+        """Test ordered positions are the same as sorted()."""
+        values = [3, 1, 2, 1, 3.0]
+        for reverse in (False, True):
+            with self.subTest(reverse=reverse):
+                expected_result = sorted(
+                    range(len(values)), key=values.__getitem__, reverse=reverse
+                )
+                self.assertEqual(list(self.index.ordered(reverse)), expected_result)
+        self.assertEqual(len(self.index), 5)
+
+    def test_nulls(self):
+        """Test null values are not ordered."""
+        index = SortedIndex([1, None])
+
+        self.assertEqual(index.lookup('gte', 0), [0])
+        self.assertIsNone(index.ordered())
+
+    def test_not_comparable(self):
+        """Test not comparable values can't be indexed."""
+        with self.assertRaises(TypeError):
+            SortedIndex([1, 'One'])
+
+    def test_changed(self):
+        """Test SortedIndex.changed give the index of the changed values."""
+        result = self.index.changed([(2, 2)], [(2, 1), (5, None), (6, 3)])
+        expected_result = SortedIndex([3, 1, 1, 1, 3.0, None, 3])
+
+        self.assertEqual(result.keys, expected_result.keys)
+        self.assertEqual(result.positions, expected_result.positions)
+        self.assertEqual(result.nulls, [5])
+        self.assertEqual(self.index.positions, [1, 3, 2, 0, 4])
+        self.assertEqual(result.changed([(5, None)], []).nulls, [])
+        with self.assertRaises(TypeError):
+            self.index.changed([], [(5, 'One')])
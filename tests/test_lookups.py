@@ -0,0 +1,165 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from unittest import mock, TestCase
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+from memory_db.functions import MEMORY_FUNCTIONS
+from memory_db.lookups import compile_filters, compile_q, field_getter, MemoryCondition, \
+    MemoryLookup, resolve_path
+from tests.models import TestMemoryModel
+
+
+class TestResolvePath(TestCase):
+    """Test resolve_path."""
+
+    def test(self):
+        """Test resolve_path split the attributes and the function."""
+        tests = [
+            ('value', ('value', 'exact')),
+            ('pk', ('id', 'exact')),
+            ('pk__in', ('id', 'in')),
+            ('value__startswith', ('value', 'startswith')),
+            ('others__value__isnull', ('others.value', 'isnull')),
+        ]
+        for key, expected_result in tests:
+            with self.subTest(key=key):
+                self.assertEqual(resolve_path(TestMemoryModel, key), expected_result)
+
+
+class TestFieldGetter(TestCase):
+    """Test field_getter."""
+
+    def test(self):
+        """Test the getters of the attributes paths."""
+        obj = TestMemoryModel(pk=1, value='One')
+
+        self.assertEqual(field_getter(TestMemoryModel, 'value')(obj), 'One')
+        self.assertIs(field_getter(TestMemoryModel, '')(obj), obj)
+
+
+class TestMemoryLookup(TestCase):
+    """Test MemoryLookup."""
+
+    def test_predicate(self):
+        """Test the compiled predicate."""
+        obj = TestMemoryModel(pk=1, value='One')
+        tests = [
+            ('pk', 1, True),
+            ('pk', '1', True),
+            ('pk', 2, False),
+            ('value__iexact', 'ONE', True),
+            ('value__icontains', 'n', True),
+            ('value__startswith', 'O', True),
+            ('value__iendswith', 'NE', True),
+            ('value__in', ['One', 'Two'], True),
+            ('value__isnull', True, False),
+            ('pk__iexact', '1', False),
+        ]
+        for key, filter_value, expected_result in tests:
+            with self.subTest(key=key, filter_value=filter_value):
+                lookup = MemoryLookup(TestMemoryModel, key, filter_value)
+                self.assertIs(lookup.predicate(obj), expected_result)
+
+    def test_function_fallback(self):
+        """Test the non prepared functions have the same result."""
+        obj = TestMemoryModel(pk=1, value='One')
+        for name in ('exact', 'iexact', 'in', 'isnull', 'lt'):
+            with self.subTest(name=name):
+                filter_value = ['One'] if name == 'in' else 'One'
+                self.assertEqual(
+                    MEMORY_FUNCTIONS.get(name)(obj.value, filter_value),
+                    MEMORY_FUNCTIONS.prepare(name, filter_value)(obj.value),
+                )
+        self.assertIs(MEMORY_FUNCTIONS.get('iexact')(1, '1'), False)
+
+    def test_invalid_field(self):
+        """Test invalid fields raise on evaluation."""
+        lookup = MemoryLookup(TestMemoryModel, 'invalid', 1)
+
+        with self.assertRaises(FieldDoesNotExist):
+            lookup.predicate(TestMemoryModel(pk=1))
+
+    def test_repr(self):
+        """Test MemoryLookup representation."""
+        self.assertEqual(
+            repr(MemoryLookup(TestMemoryModel, 'pk__in', [1])), '<MemoryLookup: pk__in=[1]>'
+        )
+
+
+class TestCompileFilters(TestCase):
+    """Test compile_filters."""
+
+    def test(self):
+        """Test all the lookups have to match."""
+        obj = TestMemoryModel(pk=1, value='One')
+
+        self.assertTrue(compile_filters(TestMemoryModel, {'pk': 1, 'value': 'One'})(obj))
+        self.assertFalse(compile_filters(TestMemoryModel, {'pk': 1, 'value': 'Two'})(obj))
+        self.assertTrue(compile_filters(TestMemoryModel, {})(obj))
+
+
+class TestMemoryCondition(TestCase):
+    """Test MemoryCondition."""
+
+    def test_predicate(self):
+        """Test the compiled Q objects."""
+        obj = TestMemoryModel(pk=1, value='One')
+        tests = [
+            (Q(pk=2) | Q(value='One'), True),
+            (Q(pk=2) | Q(value='Two'), False),
+            (~Q(pk=1), False),
+            (~Q(pk=1, value='Two'), True),
+            (~(Q(pk=2) | Q(value__icontains='x')), True),
+            (Q(pk=1) & (Q(value='Two') | ~Q(pk__gt=1)), True),
+        ]
+        for q, expected_result in tests:
+            with self.subTest(q=q):
+                self.assertIs(MemoryCondition(TestMemoryModel, q).predicate(obj), expected_result)
+
+    def test_short_circuit(self):
+        """Test the cheapest children are tested first and stop the evaluation."""
+        condition = MemoryCondition(TestMemoryModel, Q(value__icontains='o') | Q(pk=1))
+        expensive = mock.Mock(return_value=True)
+        predicate = condition.compile(
+            lambda lookup: expensive if lookup.function_name == 'icontains' else lookup.predicate
+        )
+
+        self.assertEqual([child.key for child in condition.children], ['pk', 'value__icontains'])
+        self.assertTrue(predicate(TestMemoryModel(pk=1, value='One')))
+        expensive.assert_not_called()
+        self.assertTrue(predicate(TestMemoryModel(pk=2, value='Two')))
+        expensive.assert_called_once()
+
+    def test_single_lookup_child(self):
+        """Test a child Q of a single lookup is compiled as the lookup."""
+        condition = MemoryCondition(TestMemoryModel, Q(Q(pk=2), ~Q(value='Two'), _connector=Q.OR))
+
+        self.assertEqual([type(child) for child in condition.children],
+                         [MemoryLookup, MemoryCondition])
+        self.assertTrue(condition.predicate(TestMemoryModel(pk=1, value='One')))
+
+    def test_compile_q(self):
+        """Test the Q objects combined with AND are compiled as keyword arguments."""
+        result = compile_q(TestMemoryModel, Q(pk=1) & Q(Q(value='One') | Q(pk=2), pk__lt=3))
+
+        self.assertEqual([type(lookup) for lookup in result],
+                         [MemoryLookup, MemoryCondition, MemoryLookup])
+        self.assertEqual(
+            repr(result[1]),
+            "<MemoryCondition: (<MemoryLookup: value='One'> OR <MemoryLookup: pk=2>)>",
+        )
@@ -13,12 +13,17 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import threading
+import time
 from typing import Iterable, List
-from unittest import TestCase
+from unittest import mock, TestCase
 
 from django.db.models import Field
 
 from memory_db import MemoryManager, MemoryMeta, MemoryModel, MemoryRelatedManager
+from memory_db.snapshot import SnapshotDiff
+from tests.models import TestMemoryModel
+from tests.utils import run
 
 
 class MemoryManagerTestRelated(MemoryManager):
@@ -34,6 +39,60 @@ class MemoryManagerTestRelated(MemoryManager):
         return [_1st, _2nd, _3rd, _4th]
 
 
+class MemoryManagerTestCache(MemoryManager):
+    """Manager counting the get_all calls."""
+
+    def __init__(self):
+        """Init the counter."""
+        super().__init__()
+        self.calls = 0
+        self.stale = False
+
+    def get_all(self) -> Iterable['MemoryModelTestCache']:
+        """Create new test models."""
+        self.calls += 1
+        return [MemoryModelTestCache(), MemoryModelTestCache()]
+
+    def is_stale(self, snapshot) -> bool:
+        """Return the test stale state."""
+        return self.stale
+
+
+class MemoryManagerTestDiff(MemoryManager):
+    """Manager returning copies of its rows."""
+
+    diff_reload = True
+
+    def __init__(self):
+        """Init the rows."""
+        super().__init__()
+        self.rows = [TestMemoryModel(pk=pk, value=f'Value {pk}') for pk in range(5)]
+
+    def get_all(self) -> Iterable[TestMemoryModel]:
+        """Return a copy of the rows."""
+        return list(self.rows)
+
+
+class MemoryManagerTestAsync(MemoryManagerTestCache):
+    """Manager loading its data asynchronously."""
+
+    async def aget_all(self) -> Iterable['MemoryModelTestCache']:
+        """Create new test models, without calling get_all."""
+        return [MemoryModelTestCache()]
+
+
+class MemoryModelTestCache(MemoryModel):
+    """Test Model."""
+
+    objects = MemoryManagerTestCache()
+
+    class Meta(MemoryMeta):
+        """Test Model options."""
+
+        pk = None
+        fields: List[Field] = []
+
+
 class MemoryModelTestRelated(MemoryModel):
     """Test Model."""
 
@@ -53,6 +112,162 @@ class MemoryModelTestRelated(MemoryModel):
         self.others = MemoryRelatedManager(MemoryModelTestRelated)
 
 
+class TestMemoryManager(TestCase):
+    """Test MemoryManager."""
+
+    def test_get_snapshot(self):
+        """Test MemoryManager.get_snapshot keep the snapshot of the same get_all list."""
+        model = MemoryModelTestRelated()
+        model.others.add(MemoryModelTestRelated())
+
+        snapshot = model.others.get_snapshot()
+
+        self.assertIs(model.others.get_snapshot(), snapshot)
+
+        model.others.add(MemoryModelTestRelated())
+
+        self.assertIsNot(model.others.get_snapshot(), snapshot)
+        self.assertEqual(len(model.others.get_snapshot()), 2)
+
+    def test_cache(self):
+        """Test MemoryManager cache the get_all data."""
+        manager = MemoryManagerTestCache()
+        manager.model = MemoryModelTestCache
+
+        self.assertEqual(manager.count(), 2)
+        self.assertEqual(manager.count(), 2)
+        self.assertEqual(manager.calls, 1)
+        self.assertEqual(manager.version, 1)
+
+    def test_cache_timeout(self):
+        """Test MemoryManager reload the get_all data after cache_timeout."""
+        manager = MemoryManagerTestCache()
+        manager.model = MemoryModelTestCache
+        manager.cache_timeout = 60
+
+        snapshot = manager.get_snapshot()
+
+        self.assertIs(manager.get_snapshot(), snapshot)
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 60):
+            self.assertIsNot(manager.get_snapshot(), snapshot)
+        self.assertEqual(manager.calls, 2)
+        self.assertEqual(manager.version, 2)
+
+        manager = MemoryManagerTestCache()
+        manager.model = MemoryModelTestCache
+        manager.cache_timeout = 0
+        manager.get_snapshot()
+        manager.get_snapshot()
+
+        self.assertEqual(manager.calls, 2)
+
+    def test_invalidate(self):
+        """Test MemoryManager invalidate, refresh and is_stale methods."""
+        manager = MemoryManagerTestCache()
+        manager.model = MemoryModelTestCache
+
+        snapshot = manager.get_snapshot()
+        manager.invalidate()
+
+        self.assertIsNot(manager.get_snapshot(), snapshot)
+        self.assertEqual(manager.refresh().version, 3)
+
+        manager.stale = True
+        manager.get_snapshot()
+
+        self.assertEqual(manager.calls, 4)
+        self.assertEqual(manager.version, 4)
+
+    def test_diff_reload(self):
+        """Test the reloads apply the differences with the snapshot."""
+        manager = MemoryManagerTestDiff()
+        manager.model = TestMemoryModel
+        snapshot = manager.get_snapshot()
+        manager.rows[1:3] = [TestMemoryModel(pk=1, value='Changed')]
+        manager.rows.append(TestMemoryModel(pk=5, value='Value 5'))
+
+        result = manager.refresh()
+
+        self.assertIsNone(manager.last_diff)
+        self.assertIsNot(result.rows, snapshot.rows)
+
+        manager.rows[0] = TestMemoryModel(pk=0, value='Changed')
+        with mock.patch.object(manager, 'is_stale', return_value=True):
+            result = manager.get_snapshot()
+
+        self.assertEqual(manager.last_diff, SnapshotDiff(created=0, updated=1, deleted=0))
+        self.assertEqual(manager.version, 3)
+        self.assertEqual([obj.value for obj in result],
+                         ['Changed', 'Changed', 'Value 3', 'Value 4', 'Value 5'])
+        self.assertEqual(list(manager.filter(value='Changed').values_list('pk', flat=True)), [0, 1])
+
+        del manager.rows[3:]
+        manager.rows.append(TestMemoryModel(pk=6, value='Value 6'))
+        with mock.patch.object(manager, 'is_stale', return_value=True):
+            manager.filter(value='Changed').count()
+
+        self.assertEqual(manager.last_diff, SnapshotDiff(created=1, updated=0, deleted=2))
+        self.assertEqual(list(manager.values_list('pk', flat=True)), [0, 1, 3, 6])
+
+    def test_concurrent_loads(self):
+        """Test the threads waiting for a load use its snapshot instead of loading again."""
+        manager = MemoryManagerTestCache()
+        manager.model = MemoryModelTestCache
+        barrier = threading.Barrier(4)
+        get_all = manager.get_all
+        snapshots = []
+
+        def slow_get_all():
+            time.sleep(0.05)
+            return get_all()
+
+        def load():
+            barrier.wait()
+            snapshots.append(manager.get_snapshot())
+
+        with mock.patch.object(manager, 'get_all', side_effect=slow_get_all):
+            threads = [threading.Thread(target=load) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(manager.calls, 1)
+        self.assertEqual(len(set(map(id, snapshots))), 1)
+
+    def test_aget_snapshot(self):
+        """Test the async methods load the data with aget_all, in the executor by default."""
+        tests = [(MemoryManagerTestCache, 2, 1), (MemoryManagerTestAsync, 1, 0)]
+        for manager_class, expected_count, expected_calls in tests:
+            with self.subTest(manager_class=manager_class):
+                manager = manager_class()
+                manager.model = MemoryModelTestCache
+
+                self.assertEqual(run(manager.acount()), expected_count)
+                self.assertEqual(run(manager.acount()), expected_count)
+                self.assertEqual(manager.calls, expected_calls)
+                self.assertEqual(manager.version, 1)
+                self.assertIs(run(manager.aget_snapshot()), manager.get_snapshot())
+
+    def test_aget_snapshot_concurrent(self):
+        """Test a snapshot loaded by a thread while awaiting aget_all is kept."""
+        manager = MemoryManagerTestAsync()
+        manager.model = MemoryModelTestCache
+        aget_all = manager.aget_all
+
+        async def slow_aget_all():
+            rows = await aget_all()
+            threading.Thread(target=manager.get_snapshot).run()
+            return rows
+
+        with mock.patch.object(manager, 'aget_all', side_effect=slow_aget_all):
+            result = run(manager.aget_snapshot())
+
+        self.assertIs(result, manager.get_snapshot())
+        self.assertEqual(len(result), 2)
+        self.assertEqual(manager.version, 1)
+
+
 class TestMemoryRelatedManager(TestCase):
     """Test MemoryRelatedManager."""
 
@@ -66,6 +281,21 @@ class TestMemoryRelatedManager(TestCase):
         self.assertEqual(len(model.others), 1)
         self.assertEqual(model.others.get(), other)
 
+    def test_add_copy(self):
+        """Test MemoryRelatedManager add does not modify the snapshot of a started queryset."""
+        model = MemoryModelTestRelated()
+        model.others.add(MemoryModelTestRelated())
+        rows = model.others.get_all()
+        queryset = model.others.all()
+
+        self.assertEqual(queryset.count(), 1)
+
+        model.others.add(MemoryModelTestRelated())
+
+        self.assertEqual(queryset.count(), 1)
+        self.assertEqual(model.others.count(), 2)
+        self.assertEqual(len(rows), 1)
+
     def test_filter(self):
         """Test MemoryRelatedManager filter."""
         self.assertEqual(MemoryModelTestRelated.objects.filter(others__isnull=True).count(), 3)
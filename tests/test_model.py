@@ -13,7 +13,10 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from unittest import TestCase
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import skipIf, TestCase
 
 import django
 from django.core.checks.messages import Error
@@ -21,7 +24,7 @@ from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.db.models.fields import IntegerField, PositiveIntegerField
 
 from memory_db import MemoryMeta, MemoryModel
-from tests.models import TestEmptyManager
+from tests.models import TestEmptyManager, TestMemoryModel
 from tests.utils import setup_django
 
 if django.VERSION < (2, 3):
@@ -94,6 +97,29 @@ class TestModel(TestCase):
             ValidationError, expected_error_fmt % 'text', self.TestModel.from_db, {'value': 'text'}
         )
 
+    @setup_django
+    def test_from_db_many(self):
+        """Test MemoryModel.from_db_many method."""
+        rows = [{'id': 1, 'default': ''}, {'id': '2', 'value': '3'}]
+
+        result = [(obj.pk, obj.value, obj.default) for obj in self.TestModel.from_db_many(rows)]
+
+        self.assertEqual(result, [(1, None, 2), (2, 3, 2)])
+        with self.assertRaisesRegex(ValidationError, expected_error_fmt % 'text'):
+            list(self.TestModel.from_db_many([{'value': 'text'}]))
+
+    @setup_django
+    def test_from_db_many_errors(self):
+        """Test MemoryModel.from_db_many collect the errors of the invalid rows."""
+        errors = {}
+        rows = [{'id': 'one'}, {'id': 2}, {'id': 3, 'value': 'text'}]
+
+        result = list(self.TestModel.from_db_many(rows, errors=errors))
+
+        self.assertEqual([obj.pk for obj in result], [2])
+        self.assertEqual(list(errors), [0, 2])
+        self.assertEqual(list(errors[2].message_dict), ['value'])
+
     @setup_django
     def test_check_data(self):
         """Test MemoryModel.check_data method."""
@@ -158,6 +184,43 @@ class TestModel(TestCase):
                 ]
             )
 
+    @setup_django
+    def test_check_data_many(self):
+        """Test MemoryModel.check_data_many add the row numbers to the errors."""
+        rows = [{'id': str(number), 'value': '1', 'default': ''} for number in range(10)]
+        rows[2]['id'] = 'two'
+        rows[7] = {'id': '-7', 'default': 'x'}
+        expected_objects = [
+            'row 3, column id', 'row 8, column id', 'row 8, column value', 'row 8, column default'
+        ]
+        with ThreadPoolExecutor(2) as executor:
+            tests = [
+                (dict(), expected_objects),
+                (dict(chunk_size=3), expected_objects),
+                (dict(chunk_size=3, executor=executor), expected_objects),
+                (dict(max_errors=2), expected_objects[:2]),
+                (dict(chunk_size=1, max_errors=1, executor=executor), expected_objects[:1]),
+                (dict(max_errors=0), []),
+            ]
+            for options, expected_result in tests:
+                with self.subTest(options=options):
+                    result = self.TestModel.check_data_many(iter(rows), **options)
+
+                    self.assertEqual([error.obj for error in result], expected_result)
+
+    @skipIf(sys.version_info < (3, 7), 'mp_context requires Python 3.7')
+    @setup_django
+    def test_check_data_many_processes(self):
+        """Test MemoryModel.check_data_many in a process pool."""
+        rows = [{'id': '1', 'value': 'One'}, {'id': 'two', 'value': 'Two'}] * 5
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(2, mp_context=context) as executor:
+            result = list(TestMemoryModel.check_data_many(rows, chunk_size=2, executor=executor))
+
+        self.assertEqual([error.obj for error in result],
+                         [f'row {number}, column id' for number in range(2, 11, 2)])
+        self.assertEqual(result[0].hint, expected_error_fmt % 'two')
+
     def test_hashable(self):
         """Test Model.__hash__ method."""
         result1 = hash(self.TestModel(id=1))
@@ -172,3 +235,68 @@ class TestModel(TestCase):
         self.assertIn(
             result2, dict_, 'result1 and result2 are identicals, result2 should be find in the dict'
         )
+
+    def test_hash_fields(self):
+        """Test the hash ignore the attributes which are not fields."""
+        obj = self.TestModel(id=1)
+        obj.cache = []
+
+        self.assertEqual(hash(obj), hash(1))
+        self.assertEqual(hash(self.TestModel(value=2)), hash(self.TestModel(value=2)))
+        self.assertNotEqual(hash(self.TestModel(value=2)), hash(self.TestModel(value=3)))
+
+
+class TestSlotsModel(TestCase):
+    """Test case on the models with Meta.slots."""
+
+    class SlotsModel(MemoryModel):
+        """Model storing its fields in __slots__."""
+
+        __slots__ = ('extra', )
+
+        objects = TestEmptyManager()
+
+        class Meta(MemoryMeta):
+            """Test model configuration."""
+
+            pk: IntegerField = IntegerField(name='id', primary_key=True)
+            fields = [pk, IntegerField(name='value', null=True)]
+            slots = True
+
+    class ChildSlotsModel(SlotsModel):
+        """Model adding a field to a model with __slots__."""
+
+        objects = TestEmptyManager()
+
+        class Meta(MemoryMeta):
+            """Test model configuration."""
+
+            pk: IntegerField = IntegerField(name='id', primary_key=True)
+            fields = [pk, IntegerField(name='value', null=True), IntegerField(name='other')]
+            slots = True
+
+    def test_slots(self):
+        """Test the fields are stored in __slots__."""
+        result = self.SlotsModel(pk=1, value=2, unknown=3)
+
+        self.assertEqual(self.SlotsModel.__slots__, ('extra', 'id', 'value'))
+        self.assertFalse(hasattr(result, '__dict__'))
+        self.assertEqual((result.pk, result.id, result.value), (1, 1, 2))
+        self.assertFalse(hasattr(result, 'unknown'))
+        with self.assertRaises(AttributeError):
+            result.unknown = 3
+        result.extra = 3
+        self.assertIsNone(self.SlotsModel().value)
+
+    def test_inheritance(self):
+        """Test the base class slots are not defined again."""
+        result = self.ChildSlotsModel(id=1, value=2, other=3)
+
+        self.assertEqual(self.ChildSlotsModel.__slots__, ('other', ))
+        self.assertFalse(hasattr(result, '__dict__'))
+        self.assertEqual((result.pk, result.value, result.other), (1, 2, 3))
+
+    def test_hashable(self):
+        """Test Model.__hash__ method with __slots__."""
+        self.assertEqual(hash(self.SlotsModel(id=1)), hash(self.SlotsModel(id=1)))
+        self.assertNotEqual(hash(self.SlotsModel(id=1)), hash(self.SlotsModel(id=2)))
@@ -16,8 +16,12 @@
 from unittest import TestCase
 
 from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Field, IntegerField
 
-from tests.models import TestMemoryModel
+from memory_db import MemoryMeta, MemoryModel
+
+from memory_db.indexes import HashIndex, SortedIndex
+from tests.models import TestMemoryManager, TestMemoryModel
 
 
 class TestOptions(TestCase):
@@ -33,3 +37,53 @@ class TestOptions(TestCase):
         self.assertEqual(pk, id_)
 
         self.assertRaises(FieldDoesNotExist, TestMemoryModel._meta.get_field, 'invalid')
+
+    def test_indexed_fields(self):
+        """Test MemoryMeta indexed_fields property."""
+        self.assertEqual(TestMemoryModel._meta.indexed_fields, {'id', 'value'})
+
+    def test_index_classes(self):
+        """Test MemoryMeta index_classes property."""
+        self.assertEqual(TestMemoryModel._meta.sorted_indexed_fields, {'id', 'value'})
+        self.assertEqual(
+            TestMemoryModel._meta.index_classes, {
+                'id': [HashIndex, SortedIndex],
+                'value': [HashIndex, SortedIndex],
+            }
+        )
+
+    def test_get_statistics(self):
+        """Test MemoryMeta get_statistics method."""
+        result = TestMemoryModel._meta.get_statistics('pk')
+
+        self.assertEqual((result.count, result.distinct, result.min, result.max), (3, 3, 1, 3))
+        self.assertIs(TestMemoryModel._meta.get_statistics('id'), result)
+        self.assertRaises(FieldDoesNotExist, TestMemoryModel._meta.get_statistics, 'invalid')
+
+    def test_default_manager(self):
+        """Test the default manager is the first manager of the model class."""
+
+        class Unmanaged(MemoryModel):
+            """Model without manager."""
+
+            class Meta(MemoryMeta):
+                """Test model options."""
+
+                pk: Field = IntegerField(primary_key=True, name='id')
+                fields = [pk]
+
+        class Managed(Unmanaged):
+            """Model with a manager named other than objects."""
+
+            rows = TestMemoryManager()
+
+            class Meta(MemoryMeta):
+                """Test model options."""
+
+                pk: Field = IntegerField(primary_key=True, name='id')
+                fields = [pk]
+
+        self.assertIs(TestMemoryModel._meta.default_manager, TestMemoryModel.objects)
+        self.assertIsNone(Unmanaged._meta.default_manager)
+        self.assertIsNone(Unmanaged._meta.get_statistics('id'))
+        self.assertIs(Managed._meta.default_manager, Managed.rows)
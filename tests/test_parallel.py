@@ -0,0 +1,118 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+from unittest import mock, TestCase
+
+from django.db.models import CharField, Field, IntegerField
+
+from memory_db import MemoryManager, MemoryMeta, MemoryModel
+from memory_db import parallel
+from memory_db.lookups import MemoryLookup
+
+
+class ParallelManager(MemoryManager):
+    """Test manager."""
+
+    def get_all(self) -> Iterable['ParallelModel']:
+        """Create test models."""
+        return [ParallelModel(pk=pk, name=f'Name {pk % 7}') for pk in range(100)]
+
+
+class ParallelModel(MemoryModel):
+    """Test model."""
+
+    objects = ParallelManager()
+
+    class Meta(MemoryMeta):
+        """Test model options."""
+
+        pk: Field = IntegerField(primary_key=True, name='id')
+        fields: Iterable[Field] = [pk, CharField(name='name')]
+        indexes = ['name']
+
+
+def pks(queryset) -> List[int]:
+    """Return the primary keys of the queryset objects."""
+    return [obj.pk for obj in queryset]
+
+
+class TestParallel(TestCase):
+    """Test the filters evaluated in a process pool."""
+
+    def test_filter(self):
+        """Test the partitions results are merged in order."""
+        tests = [
+            dict(name__endswith='3'),
+            dict(name='Name 3', pk__gte=50),
+            dict(pk__gt=1000),
+        ]
+        queryset = ParallelModel.objects.parallel(workers=2, partition_size=7)
+        for filters in tests:
+            with self.subTest(filters=filters):
+                self.assertEqual(
+                    pks(queryset.filter(**filters)), pks(ParallelModel.objects.filter(**filters))
+                )
+                self.assertEqual(
+                    pks(queryset.order_by('-pk').exclude(**filters)),
+                    pks(ParallelModel.objects.order_by('-pk').exclude(**filters)),
+                )
+        self.assertEqual(parallel._scans, {})
+
+    def test_serial(self):
+        """Test small tables and platforms without fork are filtered in the process."""
+        tests = [
+            (dict(), ['fork'], (3, 7)),
+            (dict(partition_size=7, workers=1), ['fork'], (3, 7)),
+            (dict(partition_size=7), ['spawn'], (3, 7)),
+            (dict(partition_size=7), ['fork'], (3, 6)),
+        ]
+        for options, start_methods, version in tests:
+            with self.subTest(options=options, start_methods=start_methods, version=version):
+                with mock.patch('memory_db.parallel.ProcessPoolExecutor') as executor, \
+                        mock.patch('multiprocessing.get_all_start_methods',
+                                   return_value=start_methods), \
+                        mock.patch('sys.version_info', version):
+                    result = ParallelModel.objects.parallel(**options).filter(name__endswith='1')
+
+                    self.assertEqual(pks(result), list(range(1, 100, 7)))
+                    executor.assert_not_called()
+
+    def test_scan_partition(self):
+        """Test a worker filter the partition of the registered scan."""
+        snapshot = ParallelModel.objects.get_snapshot()
+        lookups = [MemoryLookup(ParallelModel, 'name', 'Name 1')]
+        with mock.patch.dict(parallel._scans, {-1: (snapshot, range(100), lookups, False)}):
+            result = parallel._scan_partition(-1, 7, 14)
+
+        self.assertEqual(result, [8])
+
+    def test_statistics(self):
+        """Test the statistics ordering the lookups are collected before the fork."""
+        snapshot = ParallelModel.objects.snapshot_class(ParallelModel, ParallelModel.objects.all())
+        lookups = [
+            MemoryLookup(ParallelModel, 'name__endswith', '1'),
+            MemoryLookup(ParallelModel, 'pk__lt', 50),
+        ]
+        with mock.patch.object(snapshot, 'rank_threshold', 0), \
+                mock.patch('memory_db.parallel.ProcessPoolExecutor',
+                           lambda workers, mp_context: ThreadPoolExecutor(workers)):
+            result = parallel.parallel_filter(
+                snapshot, iter(range(100)), lookups, False, partition_size=7
+            )
+
+        self.assertEqual(result, list(range(1, 50, 7)))
+        self.assertEqual(set(snapshot.statistics), {'name', 'id'})
@@ -13,12 +13,19 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
 from typing import Any, Dict, List, NamedTuple, Optional
-from unittest import skip, TestCase
+from unittest import mock, TestCase
 
 from django.core.exceptions import FieldDoesNotExist, MultipleObjectsReturned
+from django.db import IntegrityError, NotSupportedError
+from django.db.models import CharField, Field, IntegerField, Q
 
+from memory_db import MemoryManager, MemoryMeta, MemoryModel
+from memory_db.query import _filter_operation, MemoryQuerySet
+from memory_db.snapshot import MemorySnapshot
 from tests.models import TestMemoryModel
+from tests.utils import run
 
 
 class FilterTest(NamedTuple):
@@ -63,6 +70,16 @@ class TestFilter(TestCase):
             FilterTest([one], filter_={'value__contains': 'O'}),
             FilterTest([one, two], filter_={'value__icontains': 'O'}),
             FilterTest([one, two, three], filter_={'value__isnull': False}),
+            FilterTest([two, three], filter_={'value__startswith': 'T'}),
+            FilterTest([one], filter_={'value__endswith': 'e'}, exclude={'pk': 3}),
+            FilterTest([two, three], exclude={
+                'pk': 1,
+                'value': 'One'
+            }),
+            FilterTest([one, two, three], exclude={
+                'pk': 1,
+                'value': 'Two'
+            }),
         ]
         for test in tests:
             with self.subTest(filter=test.filter_, exclude=test.exclude):
@@ -77,7 +94,6 @@ class TestFilter(TestCase):
                     with self.assertRaises(test.error):
                         list(result)
 
-    @skip('feature: make copy of each queryset, to use them later')
     def test_chain_filters(self):
         """Test multiple filters."""
         result_all = TestMemoryModel.objects.all()
@@ -96,6 +112,89 @@ class TestFilter(TestCase):
         self.assertEqual(len(result_filter1), 2)
         self.assertEqual(len(result_filter2), 1)
 
+    def test_branch_filters(self):
+        """Test filters on the same queryset are independent."""
+        base = TestMemoryModel.objects.exclude(pk=2)
+
+        self.assertEqual(list(base.filter(value='One')), [one])
+        self.assertEqual(list(base.filter(value='Three')), [three])
+        self.assertEqual(list(base.order_by('-pk')), [three, one])
+        self.assertEqual(list(base), [one, three])
+
+    def test_q(self):
+        """Test filter, exclude and get with Q objects."""
+        objects = TestMemoryModel.objects
+        tests = [
+            (objects.filter(Q(pk=1) | Q(value='Three')), [one, three]),
+            (objects.filter(Q(pk=1) | Q(value='Three'), pk__gt=1), [three]),
+            (objects.filter(~Q(pk=2)), [one, three]),
+            (objects.exclude(Q(pk=1) | Q(value__startswith='Th')), [two]),
+            (objects.filter(Q(value__icontains='o') | Q(pk__gte=3), ~Q(pk=1)), [two, three]),
+            (objects.filter(Q(pk=1) & ~(Q(value='One') | Q(pk=2))), []),
+        ]
+        for queryset, expected_result in tests:
+            with self.subTest(query=queryset.query.filters):
+                self.assertEqual(list(queryset), expected_result)
+        self.assertEqual(objects.get(Q(pk=4) | Q(value='Two')), two)
+
+    def test_q_index(self):
+        """Test the OR of indexed lookups is answered by the indexes."""
+        with mock.patch('memory_db.snapshot.MemorySnapshot.filter', wraps=lambda *args: []) \
+                as filter_:
+            result = TestMemoryModel.objects.filter(Q(pk=1) | Q(value__in=['Three']))
+            self.assertEqual(list(result), [])
+
+        filter_.assert_called_once_with([0, 2], mock.ANY, False)
+
+    def test_evaluated_parent(self):
+        """Test the children of an evaluated queryset filter its result."""
+        base = TestMemoryModel.objects.filter(pk__lte=2)
+        list(base)
+
+        with mock.patch('memory_db.query._filter_operation', wraps=_filter_operation) as filter_:
+            result = list(base.filter(value='Two'))
+
+        self.assertEqual(result, [two])
+        self.assertIs(filter_.call_args[0][3], base._positions_cache)
+
+    def test_range_nulls(self):
+        """Test the null values never match a comparison, with or without index."""
+        rows = [
+            TestMemoryModel(pk=1, value='B'),
+            TestMemoryModel(pk=2, value=None),
+            TestMemoryModel(pk=3, value='A'),
+        ]
+        queryset = MemoryQuerySet(model=TestMemoryModel, get_all=lambda: rows)
+        tests = [
+            (queryset.filter(value__lt='B'), [3]),
+            (queryset.filter(value__lt='B', pk__gt=0), [3]),
+            (queryset.order_by('pk').filter(value__gte='A'), [1, 3]),
+            (queryset.exclude(value__lt='B'), [1, 2]),
+            (queryset.filter(Q(value__lte='A') | Q(pk=1)), [1, 3]),
+        ]
+        for result, expected_result in tests:
+            with self.subTest(query=result.query.filters):
+                self.assertEqual([obj.pk for obj in result], expected_result)
+
+    def test_iexact_non_strings(self):
+        """Test the non string values never match iexact, with or without index."""
+        rows = [
+            TestMemoryModel(pk=1, value=1),
+            TestMemoryModel(pk=2, value='One'),
+            TestMemoryModel(pk=3, value=None),
+        ]
+        queryset = MemoryQuerySet(model=TestMemoryModel, get_all=lambda: rows)
+        tests = [
+            (queryset.filter(value__iexact='ONE'), [2]),
+            (queryset.filter(value__iexact='ONE', pk__gt=0), [2]),
+            (queryset.filter(value__iexact='1', pk__gt=0), []),
+            (queryset.filter(value__icontains='N'), [2]),
+            (queryset.exclude(value__iexact='one'), [1, 3]),
+        ]
+        for result, expected_result in tests:
+            with self.subTest(query=result.query.filters):
+                self.assertEqual([obj.pk for obj in result], expected_result)
+
 
 class TestGetItem(TestCase):
     """Test getMemoryQuerySet __get_item__ method."""
@@ -109,7 +208,7 @@ class TestGetItem(TestCase):
             (-1, three),
             (-2, two),
             (-3, one),
-            ('0', one),
+            ('1', one),
         ]
         queryset = TestMemoryModel.objects.all()
         for item, expected_result in tests:
@@ -126,6 +225,13 @@ class TestGetItem(TestCase):
                 with self.assertRaises(TestMemoryModel.DoesNotExist):
                     queryset[item]
 
+    def test_get_one_not_evaluated(self):
+        """Test get_item with a positive index does not evaluate the queryset."""
+        queryset = TestMemoryModel.objects.exclude(pk=1)
+
+        self.assertEqual(queryset[1], three)
+        self.assertIsNone(queryset._result_cache)
+
     def test_get_slice(self):
         """Test get_item with slice."""
         tests = [
@@ -135,12 +241,51 @@ class TestGetItem(TestCase):
             (slice(-1, 0), [three]),
             (slice(-2, 0), [two, three]),
             (slice(-3, -1), [one, two]),
+            (slice(None, 2), [one, two]),
+            (slice(1, None), [two, three]),
+            (slice(0, -1), [one, two]),
+            (slice(None, None, 2), [one, three]),
+            (slice(-3, 3), [one, two, three]),
+            (slice(-2, 2), [two]),
         ]
         for slice_, expected_result in tests:
             with self.subTest(get_item=slice_):
                 result = TestMemoryModel.objects.all()[slice_]
                 self.assertEqual(result, expected_result)
 
+    def test_get_filtered_slice(self):
+        """Test negative slices of the positions filtered by a scan."""
+        queryset = TestMemoryModel.objects.filter(value__contains='e')
+
+        self.assertEqual(queryset[-1:], [three])
+        self.assertEqual(queryset[:-1], [one])
+
+    def test_get_ordered_slice(self):
+        """Test get_item with slice of an ordered queryset."""
+        queryset = TestMemoryModel.objects.exclude(pk=0)
+        tests = [
+            (['-value'], slice(0, 2), [two, three]),
+            (['value'], slice(1, 3), [three, two]),
+            (['value', 'pk'], slice(None, 1), [one]),
+            (['-value', 'pk'], slice(0, 2), [two, three]),
+            (['value'], slice(0, 3, 2), [one, two]),
+            (['value'], slice(-2, None), [three, two]),
+            (['-pk'], slice(0, 10), [three, two, one]),
+        ]
+        for orders, slice_, expected_result in tests:
+            with self.subTest(orders=orders, get_item=slice_):
+                result = queryset.order_by(*orders)[slice_]
+                self.assertEqual(result, expected_result)
+
+    def test_top(self):
+        """Test slicing an ordered queryset only select the first objects."""
+        with mock.patch('memory_db.snapshot.heapq.nlargest', return_value=[1]) as nlargest:
+            result = TestMemoryModel.objects.exclude(pk=0).order_by('-value')[:1]
+
+            self.assertEqual(result, [two])
+
+        self.assertEqual(nlargest.call_args[0][0], 1)
+
     def test_get_slice_out_of_range(self):
         """Test get_item with slice out of the range."""
         tests = [
@@ -185,6 +330,7 @@ class TestOrder(TestCase):
         self.assertEqual(TestMemoryModel.objects.order_by('value'), [one, three, two])
         self.assertEqual(TestMemoryModel.objects.order_by('-value'), [two, three, one])
         self.assertEqual(TestMemoryModel.objects.order_by('pk', '-value'), [one, two, three])
+        self.assertEqual(TestMemoryModel.objects.order_by('-pk__real'), [three, two, one])
 
     def test_ordered(self):
         """Test MemoryQuerySet.ordered property."""
@@ -247,6 +393,18 @@ class TestGetters(TestCase):
 
         self.assertEqual(result1, two)
         self.assertEqual(result2, three)
+        with self.assertRaises(TestMemoryModel.DoesNotExist):
+            TestMemoryModel.objects.get(pk=4)
+
+    def test_all(self):
+        """Test MemoryQuerySet.all return a copy of the queryset."""
+        queryset = TestMemoryModel.objects.filter(pk__gt=1)
+
+        result = queryset.all()
+
+        self.assertIsNot(result, queryset)
+        self.assertEqual(result, [two, three])
+        self.assertIsNone(queryset._result_cache)
 
     def test_first(self):
         """Test MemoryQuerySet.first method."""
@@ -258,6 +416,137 @@ class TestGetters(TestCase):
         self.assertEqual(result2, two)
         self.assertEqual(result3, three)
 
+    def test_count(self):
+        """Test MemoryQuerySet.count method."""
+        self.assertEqual(TestMemoryModel.objects.count(), 3)
+        self.assertEqual(TestMemoryModel.objects.filter(value='Two').count(), 1)
+        self.assertEqual(TestMemoryModel.objects.exclude(pk=2).count(), 2)
+        self.assertEqual(TestMemoryModel.objects.filter(pk__gt=1)[1:].count(), 1)
+        self.assertEqual(TestMemoryModel.none.count(), 0)
+
+    def test_count_evaluated(self):
+        """Test count of an evaluated queryset give the result length."""
+        queryset = TestMemoryModel.objects.filter(pk__gt=1)
+        list(queryset)
+
+        with mock.patch.object(queryset, '_positions') as positions:
+            self.assertEqual(queryset.count(), 2)
+
+        positions.assert_not_called()
+
+    def test_count_index(self):
+        """Test count answered by an index give the index positions count."""
+        with mock.patch('memory_db.snapshot.MemorySnapshot.filter') as filter_:
+            self.assertEqual(TestMemoryModel.objects.filter(value='Two').count(), 1)
+            self.assertEqual(TestMemoryModel.objects.filter(pk__gte=2).count(), 2)
+
+        filter_.assert_not_called()
+
+    def test_not_evaluated(self):
+        """Test getters stop at the first objects and do not evaluate the queryset."""
+        visited = []
+
+        def operation(*args):
+            for position in _filter_operation(*args):
+                visited.append(position)
+                yield position
+
+        with mock.patch('memory_db.query._filter_operation', side_effect=operation):
+            queryset = TestMemoryModel.objects.exclude(value='Two')
+
+        tests = [
+            ('exists', {}, True, [0]),
+            ('first', {}, one, [0]),
+            ('get', dict(pk__lte=2), one, [0, 2]),
+            ('count', {}, 2, [0, 2]),
+        ]
+        for method, kwargs, expected_result, expected_visited in tests:
+            with self.subTest(method=method):
+                visited.clear()
+                self.assertEqual(getattr(queryset, method)(**kwargs), expected_result)
+                self.assertEqual(visited, expected_visited)
+                self.assertIsNone(queryset._result_cache)
+
+    def test_async(self):
+        """Test the async methods give the same results as the sync ones."""
+        objects = TestMemoryModel.objects
+
+        async def results(queryset):
+            return [result async for result in queryset]
+
+        tests = [
+            objects.all(),
+            objects.filter(pk__gt=1),
+            objects.filter(value='Two', pk=2),
+            objects.exclude(value__startswith='T').values('value'),
+            objects.filter(pk__lt=3).order_by('-value').filter(pk__gt=1
+                                                               ).values_list('pk', flat=True),
+            objects.order_by('-pk')[1:],
+            objects.filter(value__startswith='T').order_by('-pk')[:1],
+            objects.parallel().filter(pk=1),
+            TestMemoryModel.none.all(),
+        ]
+        for queryset in tests:
+            with self.subTest(query=queryset.query.filters):
+                self.assertEqual(run(results(queryset.all())), list(queryset.all()))
+                self.assertEqual(run(queryset.all().acount()), queryset.all().count())
+                self.assertEqual(run(queryset.all().aexists()), queryset.all().exists())
+                self.assertEqual(run(queryset.all().afirst()), queryset.all().first())
+                self.assertEqual(run(results(queryset)), list(queryset))
+                self.assertEqual(run(results(queryset)), list(queryset))
+                self.assertEqual(run(queryset.acount()), len(queryset))
+                self.assertEqual(run(queryset.aexists()), queryset.exists())
+                self.assertEqual(run(queryset.afirst()), queryset.first())
+
+    def test_async_list(self):
+        """Test the list awaited from aget_all is the data of the queryset."""
+
+        async def aget_all():
+            return [one, two]
+
+        queryset = MemoryQuerySet(model=TestMemoryModel, get_all=list, aget_all=aget_all)
+
+        self.assertEqual(run(queryset.filter(pk__gt=1).acount()), 1)
+        self.assertIsInstance(queryset._snapshot, MemorySnapshot)
+
+    def test_aget(self):
+        """Test MemoryQuerySet.aget method."""
+        self.assertEqual(run(TestMemoryModel.objects.aget(pk=2)), two)
+        with self.assertRaises(MultipleObjectsReturned):
+            run(TestMemoryModel.objects.aget())
+        with self.assertRaises(TestMemoryModel.DoesNotExist):
+            run(TestMemoryModel.objects.aget(pk=4))
+
+    def test_async_yield(self):
+        """Test the scans give back the control to the event loop each async_chunk_size."""
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def count():
+            ticker = asyncio.ensure_future(tick())
+            result = await TestMemoryModel.objects.exclude(value='Four').acount()
+            ticker.cancel()
+            return result
+
+        async def evaluated():
+            queryset = TestMemoryModel.objects.all()
+            list(queryset)
+            ticker = asyncio.ensure_future(tick())
+            result = [obj async for obj in queryset]
+            ticker.cancel()
+            return result
+
+        with mock.patch.object(MemoryQuerySet, 'async_chunk_size', 1):
+            self.assertEqual(run(count()), 3)
+            self.assertGreaterEqual(len(ticks), 3)
+            ticks.clear()
+            self.assertEqual(run(evaluated()), [one, two, three])
+            self.assertGreaterEqual(len(ticks), 2)
+
     def test_last(self):
         """Test MemoryQuerySet.last method."""
         result1 = TestMemoryModel.objects.last()
@@ -267,3 +556,197 @@ class TestGetters(TestCase):
         self.assertEqual(result1, three)
         self.assertEqual(result2, two)
         self.assertEqual(result3, one)
+
+
+class WriteManager(MemoryManager):
+    """Manager of the written model."""
+
+    def get_all(self) -> List['WriteModel']:
+        """Create test models."""
+        return [WriteModel(pk=pk, value=f'Value {pk % 3}') for pk in range(10)]
+
+
+class WriteModel(MemoryModel):
+    """Model changed by the tests."""
+
+    objects = WriteManager()
+
+    class Meta(MemoryMeta):
+        """Test model parameters."""
+
+        pk: Field = IntegerField(primary_key=True, name='id')
+        fields = [pk, CharField(name='value')]
+        indexes = ['value']
+        sorted_indexes = ['id']
+
+
+def values(queryset) -> List[tuple]:
+    """Return the primary key and value of the objects."""
+    return list(queryset.values_list('pk', 'value'))
+
+
+class TestWrites(TestCase):
+    """Test the MemoryQuerySet create, update and delete methods."""
+
+    def setUp(self):
+        """Load the test data again."""
+        WriteModel.objects.invalidate()
+        self.addCleanup(WriteModel.objects.invalidate)
+
+    def test_create(self):
+        """Test create and bulk_create add the objects to the indexes."""
+        WriteModel.objects.filter(value='Value 1').count()
+
+        result = WriteModel.objects.create(pk=10, value='Value 1')
+        WriteModel.objects.bulk_create(WriteModel(pk=pk, value='New') for pk in (11, 12))
+
+        self.assertEqual(result.pk, 10)
+        self.assertEqual(WriteModel.objects.count(), 13)
+        self.assertEqual(WriteModel.objects.get(pk=10), result)
+        self.assertEqual(
+            values(WriteModel.objects.filter(value='Value 1', pk__gt=5)), [(7, 'Value 1'),
+                                                                           (10, 'Value 1')]
+        )
+        self.assertEqual(
+            values(WriteModel.objects.filter(value='New').order_by('-pk')), [(12, 'New'),
+                                                                             (11, 'New')]
+        )
+
+    def test_create_duplicate(self):
+        """Test the objects are not added when a primary key is already used."""
+        tests = [
+            [WriteModel(pk=3, value='New')],
+            [WriteModel(pk=10, value='New'),
+             WriteModel(pk=10, value='New')],
+        ]
+        for objs in tests:
+            with self.subTest(pks=[obj.pk for obj in objs]):
+                with self.assertRaises(IntegrityError):
+                    WriteModel.objects.bulk_create(objs)
+
+                self.assertEqual(WriteModel.objects.count(), 10)
+        with self.assertRaises(IntegrityError), \
+                mock.patch.object(MemorySnapshot, 'get_index', return_value=None):
+            WriteModel.objects.create(pk=9, value='New')
+        WriteModel.objects.filter(pk=9).delete()
+        WriteModel.objects.create(pk=9, value='New')
+        self.assertEqual(values(WriteModel.objects.filter(pk__gte=9)), [(9, 'New')])
+        WriteModel.objects.bulk_create([WriteModel(value='None'), WriteModel(value='None')])
+        objs = [WriteModel(pk=9, value='New')]
+        with mock.patch.object(WriteModel._meta, 'pk', None):
+            WriteModel.objects.bulk_create(objs)
+        self.assertEqual(WriteModel.objects.count(), 13)
+
+    def test_update(self):
+        """Test update change copies of the objects of the queryset."""
+        before = WriteModel.objects.get(pk=3)
+        started = WriteModel.objects.filter(value='Value 0')
+        started.count()
+        queryset = WriteModel.objects.filter(pk__in=[3, 4])
+
+        result = queryset.update(value='Updated')
+
+        self.assertEqual(result, 2)
+        self.assertEqual(values(queryset), [(3, 'Updated'), (4, 'Updated')])
+        self.assertEqual(
+            values(WriteModel.objects.filter(value='Updated')), [(3, 'Updated'), (4, 'Updated')]
+        )
+        self.assertEqual(WriteModel.objects.filter(value='Value 0').count(), 3)
+        self.assertEqual(started.count(), 4)
+        self.assertEqual(before.value, 'Value 0')
+        self.assertEqual(WriteModel.objects.filter(pk=5).update(id=20), 1)
+        self.assertEqual(
+            list(WriteModel.objects.filter(pk__gte=9).values_list('pk', flat=True)), [20, 9]
+        )
+        with self.assertRaises(FieldDoesNotExist):
+            queryset.update(invalid=1)
+
+    def test_delete(self):
+        """Test delete skip the positions of the deleted objects."""
+        snapshot = WriteModel.objects.get_snapshot()
+
+        result = WriteModel.objects.filter(pk=4).delete()
+
+        self.assertEqual(result, (1, {'WriteModel': 1}))
+        self.assertEqual(WriteModel.objects.count(), 9)
+        self.assertFalse(WriteModel.objects.filter(value='Value 1', pk__lt=6).exclude(pk=1))
+        self.assertEqual(WriteModel.objects.order_by('-pk')[4].pk, 5)
+        self.assertEqual(WriteModel.objects.version, snapshot.version + 1)
+        self.assertEqual(len(snapshot), 10)
+        self.assertEqual(WriteModel.objects.all().delete(), (9, {'WriteModel': 9}))
+        self.assertFalse(WriteModel.objects.exists())
+
+    def test_read_only(self):
+        """Test querysets without manager can't be changed."""
+        queryset = MemoryQuerySet(model=WriteModel, get_all=WriteModel.objects.get_all)
+
+        with self.assertRaises(NotSupportedError):
+            queryset.create(pk=10)
+
+
+class TestDistinct(TestCase):
+    """Test MemoryQuerySet.distinct."""
+
+    def setUp(self):
+        """Load the test data again."""
+        WriteModel.objects.invalidate()
+        self.addCleanup(WriteModel.objects.invalidate)
+
+    def test_distinct_fields(self):
+        """Test the first object of each value is kept."""
+        self.assertEqual(
+            values(WriteModel.objects.distinct('value')), [(0, 'Value 0'), (1, 'Value 1'),
+                                                           (2, 'Value 2')]
+        )
+        self.assertEqual(
+            values(WriteModel.objects.filter(pk__gt=3).distinct('value', 'pk')[:2]),
+            [(4, 'Value 1'), (5, 'Value 2')]
+        )
+        self.assertEqual(WriteModel.objects.exclude(pk=0).distinct('value').count(), 3)
+
+    def test_distinct_values(self):
+        """Test the selected values are deduplicated."""
+        expected_result = ['Value 0', 'Value 1', 'Value 2']
+
+        self.assertEqual(
+            list(WriteModel.objects.values_list('value', flat=True).distinct()), expected_result
+        )
+        self.assertEqual([row['value'] for row in WriteModel.objects.distinct().values('value')],
+                         expected_result)
+        self.assertEqual(WriteModel.objects.distinct().count(), 10)
+
+    def test_distinct_unhashable(self):
+        """Test the unhashable values are compared with the ones already seen."""
+        rows = [WriteModel(pk=pk, value=[pk % 2]) for pk in range(4)]
+        rows.append(WriteModel(pk=4, value='Value 4'))
+        queryset = MemoryQuerySet(model=WriteModel, get_all=lambda: rows)
+
+        self.assertEqual(values(queryset.distinct('value')), [(0, [0]), (1, [1]), (4, 'Value 4')])
+        self.assertEqual(
+            list(queryset.values_list('value', flat=True).distinct()), [[0], [1], 'Value 4']
+        )
+
+    def test_distinct_objects(self):
+        """Test the objects with the same fields values are deduplicated."""
+        rows = WriteModel.objects.get_all()
+        rows += [WriteModel(pk=4, value='Value 1'), WriteModel(pk=4, value='Other')]
+        queryset = MemoryQuerySet(model=WriteModel, get_all=lambda: rows)
+
+        self.assertEqual(queryset.count(), 12)
+        self.assertEqual(queryset.distinct().count(), 11)
+        self.assertEqual(len({hash(obj) for obj in queryset}), 10)
+
+    def test_streaming(self):
+        """Test the values are read up to the end of the slice only."""
+        read = []
+        value_getter = MemorySnapshot.value_getter
+
+        def counted_getter(snapshot, path):
+            getter = value_getter(snapshot, path)
+            return lambda position: read.append(position) or getter(position)
+
+        queryset = WriteModel.objects.order_by('-pk').distinct('value')[:2]
+        with mock.patch.object(MemorySnapshot, 'value_getter', counted_getter):
+            self.assertEqual(list(queryset._positions()), [9, 8])
+
+        self.assertEqual(read, [9, 8])
@@ -0,0 +1,325 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
+import threading
+from unittest import mock, TestCase
+
+from django.db.models import Q
+
+from memory_db.indexes import HashIndex, SortedIndex
+from memory_db.lookups import compile_lookups, compile_predicate, compile_q, MemoryCondition
+from memory_db.snapshot import _updated, MemorySnapshot, SnapshotDiff
+from memory_db.statistics import DEFAULT_SELECTIVITY
+from tests.models import TestMemoryModel
+
+
+class TestMemorySnapshot(TestCase):
+    """Test MemorySnapshot."""
+
+    def setUp(self):
+        """Create a snapshot of the test model data."""
+        self.rows = TestMemoryModel.objects.get_all()
+        self.snapshot = MemorySnapshot(TestMemoryModel, self.rows)
+
+    def test_sequence(self):
+        """Test MemorySnapshot is a sequence of the rows."""
+        self.assertEqual(len(self.snapshot), 3)
+        self.assertEqual(list(self.snapshot), self.rows)
+        self.assertIs(self.snapshot[1], self.rows[1])
+
+    def test_is_source(self):
+        """Test MemorySnapshot.is_source method."""
+        self.assertTrue(self.snapshot.is_source(self.rows))
+        self.assertFalse(self.snapshot.is_source(list(self.rows)))
+
+        self.rows.append(TestMemoryModel(pk=4))
+
+        self.assertFalse(self.snapshot.is_source(self.rows))
+        self.assertEqual(len(self.snapshot), 3)
+
+    def test_get_index(self):
+        """Test MemorySnapshot.get_index build the indexes once."""
+        index = self.snapshot.get_index('id')
+
+        self.assertIsNotNone(index)
+        self.assertIs(self.snapshot.get_index('id'), index)
+        self.assertIsNone(self.snapshot.get_index('invalid'))
+
+    def test_candidates(self):
+        """Test MemorySnapshot.candidates method."""
+        tests = [
+            (dict(pk=1), [0]),
+            (dict(pk__in=[1, 3], value='Three'), [2]),
+            (dict(value__iexact='two', pk__lt=3), [1]),
+            (dict(pk__gte=2, value__in=['Two']), [1]),
+            (dict(pk__gte=2), [1, 2]),
+            (dict(value__contains='T'), None),
+        ]
+        for filters, expected_result in tests:
+            with self.subTest(filters=filters):
+                lookups = compile_lookups(TestMemoryModel, filters)
+                self.assertEqual(self.snapshot.candidates(lookups), expected_result)
+        tests_q = [
+            (Q(pk=3) | Q(value='One'), [0, 2]),
+            (Q(pk=3) | Q(value='One', pk__gt=0), [0, 2]),
+            (Q(pk=3) | Q(value__contains='O'), None),
+            (~Q(pk=3), None),
+            (Q(pk__gt=1) & (Q(value='One') | Q(pk=1)), [0]),
+        ]
+        for q, expected_result in tests_q:
+            with self.subTest(q=q):
+                lookups = compile_q(TestMemoryModel, q)
+                self.assertEqual(self.snapshot.candidates(lookups), expected_result)
+
+    def test_statistics(self):
+        """Test MemorySnapshot.get_statistics collect the statistics once."""
+        result = self.snapshot.get_statistics('value')
+
+        self.assertEqual((result.count, result.min, result.max), (3, 'One', 'Two'))
+        self.assertIs(self.snapshot.get_statistics('value'), result)
+        self.assertIsNone(self.snapshot.get_statistics('value.upper'))
+        self.assertIs(self.snapshot.changed(2).get_statistics('value'), result)
+        id_statistics = self.snapshot.get_statistics('id')
+        changed = self.snapshot.changed(2, updated={0: TestMemoryModel(pk=1, value='First')})
+        self.assertIsNot(changed.get_statistics('value'), result)
+        self.assertEqual(changed.get_statistics('value').min, 'First')
+        self.assertIs(changed.get_statistics('id'), id_statistics)
+
+    def test_selectivity(self):
+        """Test the estimation of the conditions and of the paths without statistics."""
+        tests = [
+            (Q(pk=1, value='One'), 1 / 9),
+            (Q(pk=1) | Q(value='One'), 5 / 9),
+            (~Q(pk=1, value='One'), 8 / 9),
+        ]
+        for q, expected_result in tests:
+            with self.subTest(q=q):
+                condition = MemoryCondition(TestMemoryModel, q)
+
+                self.assertAlmostEqual(self.snapshot.selectivity(condition), expected_result)
+        self.assertEqual(
+            self.snapshot.selectivity(mock.Mock(path='value.upper')), DEFAULT_SELECTIVITY
+        )
+
+    def test_rank(self):
+        """Test the lookups rejecting the most objects for their cost are tested first."""
+        rows = [TestMemoryModel(pk=pk, value=None if pk % 5 else f'Value {pk}') for pk in range(20)]
+        snapshot = MemorySnapshot(TestMemoryModel, rows)
+        snapshot.rank_threshold = 10
+        lookups = compile_q(
+            TestMemoryModel,
+            Q(pk__gte=2, value__icontains='1') & (Q(pk=3) | Q(pk=4)) & Q(value__isnull=False),
+        )
+        tested = []
+
+        def leaf(lookup):
+            return lambda obj: tested.append(lookup.key) or lookup.predicate(obj)
+
+        with mock.patch(
+            'memory_db.snapshot.compile_predicate',
+            side_effect=lambda lookups, rank: compile_predicate(lookups, leaf, rank)
+        ):
+            self.assertEqual(list(snapshot.filter(range(20), lookups)), [])
+            self.assertEqual(tested[:3], ['value__isnull', 'pk', 'pk'])
+            self.assertEqual(set(tested), {'value__isnull', 'pk'})
+            tested.clear()
+
+            self.assertEqual(list(snapshot.filter(range(5), lookups)), [])
+            self.assertEqual(tested[:2], ['value__isnull', 'pk__gte'])
+
+    def test_unhashable(self):
+        """Test unhashable field values are not indexed."""
+        snapshot = MemorySnapshot(TestMemoryModel, [TestMemoryModel(pk=1, value=['One'])])
+
+        self.assertIsNone(snapshot.get_index('value'))
+
+    def test_changed(self):
+        """Test MemorySnapshot.changed keep the positions and update the built indexes."""
+        rows = [TestMemoryModel(pk=pk, value=f'Value {pk % 3}') for pk in range(10)]
+        snapshot = MemorySnapshot(TestMemoryModel, rows, version=1)
+        snapshot.get_index('value')
+        snapshot.get_index('id', SortedIndex)
+
+        result = snapshot.changed(
+            2,
+            created=[TestMemoryModel(pk=10, value='Value 1')],
+            updated={1: TestMemoryModel(pk=1, value='Value 2')},
+            deleted=[2, 5],
+        )
+
+        self.assertEqual(result.version, 2)
+        self.assertEqual(len(result), 9)
+        self.assertEqual(result.all_positions(), [0, 1, 3, 4, 6, 7, 8, 9, 10])
+        self.assertTrue(result.is_all(result.all_positions()))
+        self.assertEqual([obj.pk for obj in result], [0, 1, 3, 4, 6, 7, 8, 9, 10])
+        self.assertEqual(result.get_index('value').lookup('exact', 'Value 1'), [4, 7, 10])
+        self.assertEqual(list(result.ordered('id', reverse=True)), [10, 9, 8, 7, 6, 4, 3, 1, 0])
+        self.assertEqual(len(snapshot), 10)
+        self.assertEqual(snapshot[1].value, 'Value 1')
+        for key in [('value', HashIndex), ('id', SortedIndex)]:
+            with self.subTest(key=key):
+                rebuilt = result.changed(3)
+                rebuilt.indexes = {}
+
+                self.assertEqual(vars(rebuilt.get_index(*key)), vars(result.get_index(*key)))
+
+    def test_changed_concurrent_reads(self):
+        """Test the indexes and statistics built by a reader thread while a change is applied."""
+        rows = [TestMemoryModel(pk=pk, value=f'Value {pk % 3}') for pk in range(10)]
+        snapshot = MemorySnapshot(TestMemoryModel, rows)
+        snapshot.get_index('id')
+        snapshot.get_statistics('id')
+
+        def read(function, *args):
+            """Call the function in a reader thread, wait for it."""
+            thread = threading.Thread(target=function, args=args)
+            thread.start()
+            thread.join()
+
+        def updated(*args):
+            read(snapshot.get_statistics, 'value')
+            return _updated(*args)
+
+        def changed(index, removed, added):
+            read(snapshot.get_index, 'value')
+            return index_changed(index, removed, added)
+
+        index_changed = HashIndex.changed
+        with mock.patch('memory_db.snapshot._updated', side_effect=updated), \
+                mock.patch.object(HashIndex, 'changed', autospec=True, side_effect=changed):
+            result = snapshot.changed(2, updated={1: TestMemoryModel(pk=1, value='First')})
+
+        self.assertEqual(result.get_index('id').lookup('exact', 1), [1])
+        self.assertEqual(result.get_statistics('value').min, 'First')
+        self.assertIn(('value', HashIndex), snapshot.indexes)
+        self.assertIn('value', snapshot.statistics)
+
+    def test_changed_not_indexed(self):
+        """Test the indexes which can't be changed are built again on their first use."""
+        rows = [TestMemoryModel(pk=pk, value=[f'Value {pk}']) for pk in range(5)]
+        snapshot = MemorySnapshot(TestMemoryModel, rows)
+        snapshot.get_index('value')
+        snapshot.get_index('id', SortedIndex)
+
+        result = snapshot.changed(2, created=[TestMemoryModel(pk='5', value=['Value 5'])])
+
+        self.assertEqual(set(result.indexes), set())
+        self.assertIsNone(result.get_index('value'))
+        self.assertIsNone(result.get_index('id', SortedIndex))
+        self.assertEqual(result.get_index('id').lookup('exact', '5'), [5])
+
+    def test_changed_compact(self):
+        """Test MemorySnapshot.changed compact the snapshot after many deletions."""
+        result = self.snapshot.changed(2, deleted=[0, 2])
+
+        self.assertEqual(result.deleted, frozenset())
+        self.assertEqual(result.rows, self.rows[1:2])
+        self.assertTrue(result.is_source(self.rows))
+
+    def test_reloaded(self):
+        """Test MemorySnapshot.reloaded apply the changed rows only."""
+        self.snapshot.get_index('value')
+        rows = [
+            TestMemoryModel(pk=3, value='Three'),
+            TestMemoryModel(pk=1, value='First'),
+            TestMemoryModel(pk=4, value='Four'),
+        ]
+
+        result, diff = self.snapshot.reloaded(rows, 2)
+
+        self.assertEqual(diff, SnapshotDiff(created=1, updated=1, deleted=1))
+        self.assertEqual(result.version, 2)
+        self.assertEqual(list(result), [rows[1], self.rows[2], rows[2]])
+        self.assertIs(result[2], self.rows[2])
+        self.assertEqual(result.get_index('value').lookup('exact', 'Four'), [3])
+        self.assertTrue(result.is_source(rows))
+        self.assertEqual(
+            result.row_keys(), {
+                1: mock.ANY,
+                3: (2, mock.ANY, (3, 'Three')),
+                4: (3, mock.ANY, (4, 'Four')),
+            }
+        )
+
+        result, diff = result.reloaded(list(rows), 3)
+
+        self.assertEqual(diff, SnapshotDiff(created=0, updated=0, deleted=0))
+        self.assertIsNone(result.reloaded(rows * 2, 4))
+
+    def test_reloaded_content(self):
+        """Test the contents are compared, not only their hashes."""
+        self.assertEqual(hash((1, -1)), hash((1, -2)))
+        tests = [
+            ([TestMemoryModel(pk=1, value=-1)], [TestMemoryModel(pk=1, value=-2)]),
+            ([TestMemoryModel(pk=1, value=['One'])], [TestMemoryModel(pk=1, value=['First'])]),
+        ]
+        for rows, changed_rows in tests:
+            with self.subTest(rows=rows):
+                snapshot = MemorySnapshot(TestMemoryModel, rows)
+
+                result, diff = snapshot.reloaded(changed_rows, 2)
+
+                self.assertEqual(diff, SnapshotDiff(created=0, updated=1, deleted=0))
+                self.assertEqual(list(result), changed_rows)
+                self.assertEqual(result.reloaded(list(changed_rows), 3)[1], SnapshotDiff(0, 0, 0))
+
+    def test_reloaded_without_pk(self):
+        """Test the rows of a model without primary key can't be compared."""
+        with mock.patch.object(TestMemoryModel._meta, 'pk', None):
+            self.assertIsNone(self.snapshot.reloaded(self.rows, 2))
+
+    def test_ordered(self):
+        """Test MemorySnapshot.ordered method."""
+        self.assertEqual(list(self.snapshot.ordered('value')), [0, 2, 1])
+        self.assertEqual(list(self.snapshot.ordered('value', reverse=True)), [1, 2, 0])
+        self.assertIsNone(self.snapshot.ordered('invalid'))
+
+    def test_order(self):
+        """Test MemorySnapshot.order with several keys and null values."""
+        snapshot = MemorySnapshot(
+            TestMemoryModel, [
+                TestMemoryModel(pk=1, value='B'),
+                TestMemoryModel(pk=2, value=None),
+                TestMemoryModel(pk=3, value='A'),
+                TestMemoryModel(pk=4, value='B'),
+            ]
+        )
+        tests = [
+            ([('value', False)], None, [2, 0, 3, 1]),
+            ([('value', True)], None, [1, 0, 3, 2]),
+            ([('value', False), ('id', True)], None, [2, 3, 0, 1]),
+            ([('value', True), ('id', False)], None, [1, 0, 3, 2]),
+            ([('value', True), ('id', True)], None, [1, 3, 0, 2]),
+            ([('value', False), ('id', True)], 2, [2, 3]),
+            ([('value', True)], 3, [1, 0, 3]),
+        ]
+        for keys, limit, expected_result in tests:
+            with self.subTest(keys=keys, limit=limit):
+                self.assertEqual(list(snapshot.order(range(4), keys, limit)), expected_result)
+
+    def test_order_path(self):
+        """Test MemorySnapshot.order sort by attributes of the fields."""
+        snapshot = MemorySnapshot(
+            TestMemoryModel, [
+                TestMemoryModel(pk=1, value=datetime.date(2020, 1, 2)),
+                TestMemoryModel(pk=2, value=datetime.date(2019, 6, 1)),
+                TestMemoryModel(pk=3, value=datetime.date(2020, 1, 1)),
+            ]
+        )
+
+        result = snapshot.order(range(3), [('value.year', True), ('value.day', False)])
+
+        self.assertEqual(list(result), [2, 0, 1])
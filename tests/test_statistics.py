@@ -0,0 +1,85 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from unittest import TestCase
+
+from memory_db.statistics import DEFAULT_SELECTIVITY, FieldStatistics
+
+
+class TestFieldStatistics(TestCase):
+    """Test FieldStatistics."""
+
+    def setUp(self):
+        """Collect the statistics of test values."""
+        self.statistics = FieldStatistics([1, 2, 2, None, 3, 2, 10, 1, None, 4], top_size=2)
+
+    def test_statistics(self):
+        """Test the collected statistics."""
+        statistics = self.statistics
+
+        self.assertEqual((statistics.count, statistics.nulls, statistics.distinct), (10, 2, 5))
+        self.assertEqual((statistics.min, statistics.max), (1, 10))
+        self.assertEqual(statistics.most_common, [(2, 3), (1, 2)])
+
+    def test_selectivity(self):
+        """Test the estimated fractions of the matching values."""
+        tests = [
+            ('exact', 2, 0.3),
+            ('exact', '1', 0.2),
+            ('exact', 3, 0.1),
+            ('exact', None, 0.2),
+            ('in', [1, 2], 0.5),
+            ('isnull', True, 0.2),
+            ('isnull', False, 0.8),
+            ('lt', 1, 0),
+            ('lte', 100, 0.8),
+            ('gt', 5.5, 0.4),
+            ('gte', 0, 0.8),
+            ('icontains', 'a', DEFAULT_SELECTIVITY),
+        ]
+        for function_name, filter_value, expected_result in tests:
+            with self.subTest(function_name=function_name, filter_value=filter_value):
+                self.assertAlmostEqual(
+                    self.statistics.selectivity(function_name, filter_value), expected_result
+                )
+
+    def test_not_comparable(self):
+        """Test the unhashable and not comparable values."""
+        statistics = FieldStatistics([[1], [2], None, 'a'])
+
+        self.assertEqual((statistics.count, statistics.nulls), (4, 1))
+        self.assertIsNone(statistics.distinct)
+        self.assertIsNone(statistics.min)
+        self.assertEqual(statistics.selectivity('exact', [1]), DEFAULT_SELECTIVITY)
+        self.assertEqual(statistics.selectivity('lt', 'b'), 0)
+        self.assertEqual(FieldStatistics([]).selectivity('exact', 1), 0)
+        self.assertEqual(statistics.selectivity('gt', 'b'), 0)
+        self.assertEqual(FieldStatistics([1, 'a']).selectivity('exact', [1]), 0)
+
+    def test_estimation_errors(self):
+        """Test the default selectivity of the filter values which can't be compared."""
+        self.assertEqual(self.statistics.selectivity('lt', 'a'), DEFAULT_SELECTIVITY)
+        self.assertEqual(self.statistics.selectivity('gt', [1]), DEFAULT_SELECTIVITY)
+
+    def test_all_common(self):
+        """Test the values which are not among the most common values of a small field."""
+        self.assertEqual(FieldStatistics([1, 2, 2]).selectivity('exact', 3), 0)
+
+    def test_repr(self):
+        """Test the statistics representation."""
+        self.assertEqual(
+            repr(self.statistics),
+            '<FieldStatistics: count=10, nulls=2, distinct=5, min=1, max=10>',
+        )
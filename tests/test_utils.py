@@ -13,9 +13,15 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from unittest import TestCase
+import datetime
+from decimal import Decimal
+from unittest import mock, TestCase
 
-from memory_db.utils import cast_value
+from django.core.exceptions import ValidationError
+from django.db.models import DateField, DecimalField, IntegerField
+
+from memory_db.utils import cast_value, compile_row_converter
+from tests.utils import setup_django
 
 
 class TestCastValue(TestCase):
@@ -49,3 +55,45 @@ class TestCastValue(TestCase):
                 result = cast_value(value, filter_value)
                 self.assertEqual(result, expected_result)
                 self.assertIsInstance(result, type(expected_result))
+
+
+class TestCompileRowConverter(TestCase):
+    """Test compile_row_converter util."""
+
+    @setup_django
+    def test(self):
+        """Test the converter map the columns to the fields attnames."""
+        convert = compile_row_converter([
+            IntegerField(name='id'),
+            IntegerField(name='value', db_column='Value', blank=True, default=list),
+            DecimalField(name='price', max_digits=4, decimal_places=2, null=True),
+        ])
+
+        result = convert(dict(id='1', Value='2', price='1.5'))
+
+        self.assertEqual(result, dict(id=1, value=2, price=Decimal('1.5')))
+        self.assertEqual(convert({'id': 1, 'Value': ''}), {'id': 1, 'value': [], 'price': None})
+        with self.assertRaises(ValidationError) as context:
+            convert({'id': 'one', 'Value': '', 'price': 'ten'})
+        self.assertEqual(list(context.exception.message_dict), ['id', 'price'])
+
+    def test_memoize(self):
+        """Test the conversions of the dates strings are memoized."""
+        field = DateField(name='date')
+        with mock.patch.object(field, 'to_python', wraps=field.to_python) as to_python:
+            convert = compile_row_converter([field], memoize=True)
+            results = [convert({'date': '2020-01-01'}) for _ in range(3)]
+
+        self.assertEqual(results, [{'date': datetime.date(2020, 1, 1)}] * 3)
+        self.assertEqual(to_python.call_count, 1)
+
+    def test_memoize_not_string(self):
+        """Test the values which are not strings are converted each time."""
+        field = DateField(name='date')
+        date = datetime.date(2020, 1, 1)
+        with mock.patch.object(field, 'to_python', wraps=field.to_python) as to_python:
+            convert = compile_row_converter([field], memoize=True)
+            results = [convert({'date': date}) for _ in range(2)]
+
+        self.assertEqual(results, [{'date': date}] * 2)
+        self.assertEqual(to_python.call_count, 2)
@@ -0,0 +1,286 @@
+# memory_db
+# Copyright (C) 2020 Leni Marvaud
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
+from typing import Iterable, List
+from unittest import mock, TestCase
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Avg, BooleanField, CharField, Count, DateField, Field, FloatField, \
+    IntegerField, Max, Min, Q, Sum
+
+from memory_db import MemoryManager, MemoryMeta, MemoryModel
+from memory_db.aggregates import MemoryAggregate
+from memory_db.columnar import MemoryColumnarSnapshot
+import numpy
+
+from memory_db.lookups import MemoryCondition, MemoryLookup
+from memory_db.vectorized import MemoryNumpySnapshot, OPERATORS, Vector
+
+
+class ColumnarManager(MemoryManager):
+    """Manager evaluated without numpy."""
+
+    snapshot_class = MemoryColumnarSnapshot
+
+    def get_all(self) -> Iterable['NumpyModel']:
+        """Create test models."""
+        return [
+            NumpyModel(pk=1, name='One', price=1.5, active=True, date=datetime.date(2020, 1, 1)),
+            NumpyModel(pk=2, name='Two', price=2.5, active=False, count=2),
+            NumpyModel(pk=3, name='Three', price=0.5, active=True, count=3),
+            NumpyModel(pk=4, name='Four', price=2.5, active=False, date=datetime.date(2021, 1, 1)),
+            NumpyModel(pk=5, name='Five', price=1.5, active=True, count=2),
+        ]
+
+
+class NumpyManager(ColumnarManager):
+    """Same data evaluated with numpy."""
+
+    snapshot_class = MemoryNumpySnapshot
+
+
+class NumpyModel(MemoryModel):
+    """Test model."""
+
+    objects = NumpyManager()
+    columnar = ColumnarManager()
+
+    class Meta(MemoryMeta):
+        """Test model options."""
+
+        pk: Field = IntegerField(primary_key=True, name='id')
+        fields: Iterable[Field] = [
+            pk,
+            CharField(name='name'),
+            FloatField(name='price'),
+            BooleanField(name='active'),
+            IntegerField(name='count', null=True),
+            DateField(name='date', null=True),
+        ]
+
+
+def pks(queryset) -> List[int]:
+    """Return the primary keys of the queryset objects."""
+    return [obj.pk for obj in queryset]
+
+
+class TestMemoryNumpySnapshot(TestCase):
+    """Test MemoryNumpySnapshot."""
+
+    def test_vectors(self):
+        """Test the columns are converted to numpy arrays."""
+        snapshot = NumpyModel.objects.get_snapshot()
+
+        self.assertEqual(snapshot.get_vector('id').values.tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(snapshot.get_vector('active').values.dtype.kind, 'b')
+        self.assertEqual(
+            snapshot.get_vector('count').nulls.tolist(), [True, False, False, True, False]
+        )
+        self.assertEqual(
+            snapshot.get_vector('date').nulls.tolist(), [False, True, True, False, True]
+        )
+        self.assertIsNone(snapshot.get_vector('name'))
+        self.assertIsNone(snapshot.get_vector('date.year'))
+
+    def test_filter(self):
+        """Test the filters give the same result as the columnar snapshot."""
+        tests = [
+            dict(pk=2),
+            dict(pk='2'),
+            dict(pk=None),
+            dict(active=True),
+            dict(active='false'),
+            dict(price__gt=1),
+            dict(price__lte='1.5'),
+            dict(count=2),
+            dict(count=None),
+            dict(count__isnull=True),
+            dict(count__isnull=False, count__gte=3),
+            dict(date__isnull=False, date__lt=datetime.date(2021, 1, 1)),
+            dict(date=datetime.date(2021, 1, 1)),
+            dict(pk__in=[1, 3, 10]),
+            dict(price__in=(2.5, 0)),
+            dict(count__in={2}),
+            dict(date__in=[datetime.date(2020, 1, 1)]),
+            dict(pk__in=[]),
+            dict(pk__in=['1']),
+            dict(pk__isnull=False),
+            dict(pk='abc'),
+            dict(pk__gt=1, name__icontains='o'),
+            dict(pk__gt=2**64),
+            dict(price__gt=1, date__isnull=False, date__year=2020),
+        ]
+        for filters in tests:
+            with self.subTest(filters=filters):
+                self.assertEqual(
+                    pks(NumpyModel.objects.filter(**filters)),
+                    pks(NumpyModel.columnar.filter(**filters)),
+                )
+                self.assertEqual(
+                    pks(NumpyModel.objects.exclude(**filters)),
+                    pks(NumpyModel.columnar.exclude(**filters)),
+                )
+
+    def test_mask_fallback(self):
+        """Test the lookups which can't be evaluated as masks."""
+        snapshot = NumpyModel.objects.get_snapshot()
+        tests = [
+            MemoryLookup(NumpyModel, 'count__isnull', 'yes'),
+            MemoryLookup(NumpyModel, 'pk__in', 1),
+            MemoryLookup(NumpyModel, 'pk__contains', 1),
+            MemoryLookup(NumpyModel, 'name', 'One'),
+            MemoryCondition(NumpyModel, Q()),
+        ]
+        for lookup in tests:
+            with self.subTest(lookup=lookup):
+                self.assertIsNone(snapshot.mask(lookup))
+        with mock.patch.dict(OPERATORS, gt=mock.Mock(side_effect=OverflowError)):
+            self.assertIsNone(snapshot.mask(MemoryLookup(NumpyModel, 'pk__gt', 1)))
+
+    def test_filter_q(self):
+        """Test the Q objects are evaluated with masks."""
+        tests = [
+            Q(count=2) | Q(price__lt=1),
+            ~Q(active=True) | Q(count__isnull=True),
+            Q(count=2) | Q(name__icontains='f'),
+        ]
+        for q in tests:
+            with self.subTest(q=q):
+                self.assertEqual(
+                    pks(NumpyModel.objects.filter(q, pk__gt=1)),
+                    pks(NumpyModel.columnar.filter(q, pk__gt=1)),
+                )
+                self.assertEqual(
+                    pks(NumpyModel.objects.exclude(q)), pks(NumpyModel.columnar.exclude(q))
+                )
+        with mock.patch('memory_db.columnar.MemoryColumnarSnapshot.filter') as filter_:
+            self.assertEqual(pks(NumpyModel.objects.filter(tests[0])), [2, 3, 5])
+
+        filter_.assert_not_called()
+
+    def test_filter_positions(self):
+        """Test masks are applied on the positions of a previous filter."""
+        result = NumpyModel.objects.filter(name__startswith='T').filter(count=3)
+
+        self.assertEqual(pks(result), [3])
+
+    def test_nulls(self):
+        """Test null values never match comparisons."""
+        self.assertEqual(pks(NumpyModel.objects.filter(count__lt=10)), [2, 3, 5])
+
+    def test_order_by(self):
+        """Test order_by give the same result as the columnar snapshot."""
+        tests = [
+            ['price'],
+            ['-price'],
+            ['-active', 'price'],
+            ['active', '-pk'],
+            ['price', '-pk'],
+            ['name'],
+        ]
+        for keys in tests:
+            with self.subTest(keys=keys):
+                self.assertEqual(
+                    pks(NumpyModel.objects.filter(pk__gt=1).order_by(*keys)),
+                    pks(NumpyModel.columnar.filter(pk__gt=1).order_by(*keys)),
+                )
+                self.assertEqual(
+                    pks(NumpyModel.objects.order_by(*keys[:1]).exclude(pk=5)),
+                    pks(NumpyModel.columnar.order_by(*keys[:1]).exclude(pk=5)),
+                )
+
+    def test_sort_key(self):
+        """Test reversed sort keys do not overflow."""
+        vector = Vector(numpy.array([0, -2**63, 5]), None, 0)
+        positions = numpy.arange(3)
+
+        self.assertEqual(
+            numpy.argsort(vector.sort_key(positions, reverse=True)).tolist(), [2, 0, 1]
+        )
+        dates = Vector(numpy.array(['2021-01-01', '2020-01-01'], dtype='datetime64[D]'), None, 0)
+        self.assertEqual(numpy.argsort(dates.sort_key([0, 1])).tolist(), [1, 0])
+
+    def test_from_column(self):
+        """Test the columns which can't be converted to arrays."""
+        tests = [
+            ('IntegerField', [1, 'One']),
+            ('IntegerField', [2**64, None]),
+            ('DateField', [datetime.datetime(2020, 1, 1)]),
+            ('CharField', ['One']),
+        ]
+        for internal_type, data in tests:
+            with self.subTest(internal_type=internal_type, data=data):
+                self.assertIsNone(Vector.from_column(internal_type, data))
+        self.assertEqual(
+            Vector.from_column('IntegerField', [1, None]).nulls.tolist(), [False, True]
+        )
+
+    def test_aggregate(self):
+        """Test the aggregates computed on the arrays give the values of the columns."""
+        aggregates = dict(
+            count=Count('count'),
+            total=Sum('price'),
+            average=Avg('count'),
+            low=Min('price'),
+            high=Max('count'),
+            distinct=Count('price', distinct=True),
+        )
+        for filters in ({}, {'pk__gt': 1}, {'active': False}):
+            with self.subTest(filters=filters):
+                with mock.patch.object(
+                    MemoryColumnarSnapshot,
+                    'value_getter',
+                    autospec=True,
+                    side_effect=MemoryColumnarSnapshot.value_getter
+                ) as value_getter:
+                    result = NumpyModel.objects.filter(**filters).aggregate(**aggregates)
+
+                self.assertEqual(
+                    result,
+                    NumpyModel.columnar.filter(**filters).aggregate(**aggregates)
+                )
+                self.assertEqual([call[0][1] for call in value_getter.call_args_list], ['price'])
+
+    def test_aggregate_overflow(self):
+        """Test the sums which may overflow are computed by python."""
+        snapshot = MemoryNumpySnapshot(
+            NumpyModel,
+            [NumpyModel(pk=pk, name='Big', price=0.0, active=True, count=2**62) for pk in range(4)]
+        )
+        aggregates = {'total': MemoryAggregate(NumpyModel, Sum('count'))}
+
+        self.assertEqual(snapshot.aggregate(range(4), aggregates), {'total': 2**64})
+        self.assertEqual(snapshot.aggregate(iter([0, 1]), aggregates), {'total': 2**63})
+
+    def test_aggregate_fallbacks(self):
+        """Test the aggregates of no values and of the columns which are not numbers arrays."""
+        snapshot = NumpyModel.objects.get_snapshot()
+        aggregates = {
+            'low': MemoryAggregate(NumpyModel, Min('count')),
+            'name': MemoryAggregate(NumpyModel, Max('name')),
+        }
+
+        self.assertEqual(snapshot.aggregate([], aggregates), {'low': None, 'name': None})
+        self.assertEqual(
+            snapshot.aggregate(snapshot.all_positions(), aggregates)['name'],
+            max(NumpyModel.objects.values_list('name', flat=True)),
+        )
+
+    def test_without_numpy(self):
+        """Test an error is raised when numpy is not installed."""
+        with mock.patch('memory_db.vectorized.numpy', None):
+            with self.assertRaises(ImproperlyConfigured):
+                MemoryNumpySnapshot(NumpyModel, [])
@@ -13,8 +13,9 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
 from functools import wraps
-from typing import Callable
+from typing import Any, Awaitable, Callable
 
 
 def setup_django(test: Callable):
@@ -31,3 +32,12 @@ def setup_django(test: Callable):
         test(*args, **kwargs)
 
     return wrapper
+
+
+def run(awaitable: Awaitable) -> Any:
+    """Run the awaitable in a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.close()